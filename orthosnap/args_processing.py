@@ -5,7 +5,7 @@ import re
 import sys
 from Bio import SeqIO
 
-from .helper import InparalogToKeep
+from .helper import InparalogToKeep, load_inputs
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +73,32 @@ def process_args(args) -> dict:
     bootstrap_trees = getattr(args, "bootstrap_trees", None)
     consensus_min_frequency = getattr(args, "consensus_min_frequency", None)
     consensus_trees = getattr(args, "consensus_trees", False)
+    raw_engine = getattr(args, "engine", None)
+    engine = raw_engine if raw_engine is not None else "legacy"
+    raw_fasta_backend = getattr(args, "fasta_backend", None)
+    fasta_backend = raw_fasta_backend if raw_fasta_backend is not None else "memory"
+    raw_input_hash = getattr(args, "input_hash", None)
+    input_hash = raw_input_hash if raw_input_hash is not None else "sha256"
+    raw_fasta_output = getattr(args, "fasta_output", None)
+    fasta_output = raw_fasta_output if raw_fasta_output is not None else "formatted"
+    # raw output copies records by byte offset, which the index provides
+    if fasta_output == "raw":
+        fasta_backend = "indexed"
+
+    jobs = getattr(args, "jobs", None)
+    if jobs is None:
+        jobs = 1
+    if jobs < 1:
+        logger.warning("Number of jobs must be at least 1.")
+        sys.exit()
+
+    cache_dir = getattr(args, "cache_dir", None)
+    cache_max_size = getattr(args, "cache_max_size", None)
+    if cache_max_size is None:
+        cache_max_size = 1024
+    if cache_max_size < 1:
+        logger.warning("Cache size limit must be at least 1 megabyte.")
+        sys.exit()
 
     if consensus_min_frequency is None:
         consensus_min_frequency = 0.5
@@ -109,10 +135,15 @@ def process_args(args) -> dict:
     elif occupancy_fraction is not None:
         occupancy_mode = "fraction"
 
-    if fasta is not None:
+    # the FASTA is parsed once here and the loaded inputs are handed on
+    # to validation and extraction; manifest rows load their own
+    inputs = None
+    total_taxa = None
+    if fasta is not None and not manifest:
+        inputs = load_inputs(tree, fasta, delimiter, fasta_backend, fasta_output)
+        total_taxa = inputs.unique_taxa
+    elif fasta is not None:
         total_taxa = count_unique_taxa_in_fasta(fasta, delimiter)
-    else:
-        total_taxa = None
 
     resolved_occupancy = None
     if occupancy_mode == "count":
@@ -124,13 +155,44 @@ def process_args(args) -> dict:
         resolved_occupancy = max(1, int(math.ceil(occupancy_fraction * total_taxa)))
     elif occupancy is not None:
         resolved_occupancy = occupancy
-    elif fasta is not None:
-        resolved_occupancy = determine_occupancy_threshold(fasta, delimiter)
+    elif total_taxa is not None:
+        resolved_occupancy = occupancy_threshold_for_taxa(total_taxa)
 
     if resolved_occupancy is not None and resolved_occupancy <= 0:
         logger.warning("Occupancy threshold must be greater than 0.")
         sys.exit()
 
+    sweep = None
+    sweep_values = [
+        getattr(args, "sweep_support", None),
+        getattr(args, "sweep_occupancy", None),
+        getattr(args, "sweep_inparalog_to_keep", None),
+    ]
+    if any(value is not None for value in sweep_values):
+        if manifest or bootstrap_trees is not None:
+            logger.warning("A parameter sweep cannot be combined with --manifest or --bootstrap-trees.")
+            sys.exit()
+        try:
+            sweep_support = parse_sweep_values(sweep_values[0], float)
+            sweep_occupancy = parse_sweep_values(sweep_values[1], float)
+            sweep_inparalog_to_keep = parse_sweep_values(
+                sweep_values[2], InparalogToKeep
+            )
+        except ValueError:
+            logger.warning("Sweep values must be comma-separated lists of valid values.")
+            sys.exit()
+        if any(value > 100 or value < 0 for value in sweep_support):
+            logger.warning("Support threshold must range from 0 to 100.")
+            sys.exit()
+        if any(value <= 0 for value in sweep_occupancy):
+            logger.warning("Occupancy threshold must be greater than 0.")
+            sys.exit()
+        sweep = dict(
+            support=sweep_support or [support],
+            occupancy=sweep_occupancy or [resolved_occupancy],
+            inparalog_to_keep=sweep_inparalog_to_keep or [inparalog_to_keep],
+        )
+
     return dict(
         tree=tree,
         fasta=fasta,
@@ -148,6 +210,12 @@ def process_args(args) -> dict:
         plot_snap_ogs_output=plot_snap_ogs_output,
         plot_format=plot_format,
         manifest=manifest,
+        jobs=jobs,
+        cache_dir=cache_dir,
+        cache_max_size=cache_max_size,
+        input_hash=input_hash,
+        sweep=sweep,
+        sweep_outputs=getattr(args, "sweep_outputs", False),
         validate_only=validate_only,
         resume=resume,
         structured_output=structured_output,
@@ -155,21 +223,26 @@ def process_args(args) -> dict:
         consensus_min_frequency=consensus_min_frequency,
         consensus_trees=consensus_trees,
         total_taxa=total_taxa,
+        engine=engine,
+        fasta_backend=fasta_backend,
+        fasta_output=fasta_output,
+        inputs=inputs,
     )
 
 
-def determine_occupancy_threshold(fasta: str, delimiter: str) -> int:
-    fasta = SeqIO.parse(fasta, "fasta")
-    unique_names = []
-
-    for i in fasta:
-        i = i.id.split(delimiter, 1)[0]
-        if i not in unique_names:
-            unique_names.append(i)
+def parse_sweep_values(text: str, value_type) -> list:
+    """Comma-separated sweep values, in order and without repeats."""
+    if text is None:
+        return []
+    values = [value_type(value.strip()) for value in text.split(",") if value.strip()]
+    if not values:
+        raise ValueError("no sweep values")
+    return list(dict.fromkeys(values))
 
-    occupancy_threshold = proper_round(len(unique_names) / 2)
 
-    return occupancy_threshold
+def occupancy_threshold_for_taxa(unique_taxa: int) -> int:
+    """Default occupancy: half of the taxa in the FASTA, rounded half up."""
+    return proper_round(unique_taxa / 2)
 
 
 def count_unique_taxa_in_fasta(fasta: str, delimiter: str) -> int:
@@ -0,0 +1,186 @@
+import numpy as np
+from tqdm import tqdm
+
+from .flat_tree import FlatTree
+from .helper import (
+    ExtractionTables,
+    InparalogToKeep,
+    SubtreeView,
+    build_snap_tree,
+    intern_taxa,
+    resolve_inparalogs,
+    write_output_fasta_and_account_for_assigned_tips_single_copy_case,
+)
+
+
+def count_distinct_taxa(flat: FlatTree, tip_taxa: np.ndarray) -> np.ndarray:
+    """
+    Count distinct taxa below every node, merging taxon sets bottom-up
+    from smaller into larger.
+    """
+    taxa_sets = [None] * flat.size
+    counts = np.zeros(flat.size, dtype=np.int64)
+    parents = flat.parent.tolist()
+    tip_start = flat.tip_start.tolist()
+    is_terminal = flat.is_terminal.tolist()
+    tip_taxa = tip_taxa.tolist()
+
+    # children always carry larger preorder ids than their parent
+    for node in range(flat.size - 1, -1, -1):
+        if is_terminal[node]:
+            taxa = {tip_taxa[tip_start[node]]}
+        else:
+            taxa = taxa_sets[node]
+            taxa_sets[node] = None
+        counts[node] = len(taxa)
+
+        parent = parents[node]
+        if parent == -1:
+            continue
+        parent_taxa = taxa_sets[parent]
+        if parent_taxa is None:
+            taxa_sets[parent] = taxa
+        elif len(parent_taxa) < len(taxa):
+            taxa.update(parent_taxa)
+            taxa_sets[parent] = taxa
+        else:
+            parent_taxa.update(taxa)
+
+    return counts
+
+
+class ArrayTables(ExtractionTables):
+    """
+    ExtractionTables of a FlatTree, with taxa interned per tip and
+    counted per node.
+    """
+
+    def __init__(self, flat: FlatTree, delimiter: str):
+        super().__init__(flat, 0)
+        self.tip_names = flat.tip_names()
+        self.tip_taxa, _ = intern_taxa(self.tip_names, delimiter)
+        self.taxa_counts = count_distinct_taxa(flat, self.tip_taxa).tolist()
+        self.tip_start = flat.tip_start.tolist()
+        self.tip_end = flat.tip_end.tolist()
+        self.subtree_end = flat.subtree_end.tolist()
+        self.internal_nodes = np.flatnonzero(~flat.is_terminal)[1:].tolist()
+
+    @classmethod
+    def from_tree(cls, tree, delimiter: str):
+        flat = tree if isinstance(tree, FlatTree) else FlatTree.from_phylo(tree)
+        return cls(flat, delimiter)
+
+
+def extract_subgroups_array(
+    tree,
+    fasta: str,
+    fasta_dict: dict,
+    support: float,
+    occupancy: float,
+    snap_trees: bool,
+    inparalog_to_keep: InparalogToKeep,
+    output_path: str,
+    report_inparalog_handling: bool,
+    delimiter: str,
+    write_outputs: bool,
+    seq_lengths: dict = None,
+    tables: ArrayTables = None,
+):
+    """
+    Run the SNAP-OG scan on a flattened copy of the tree.
+
+    Emits the same subgroups, in the same order, as the Clade-based scan.
+    tree may already be a FlatTree (e.g., from read_flat_newick) unless
+    SNAP-OG trees are written, which are cloned from Bio.Phylo clades.
+    tables, if given, are the ArrayTables of tree and delimiter.
+    """
+    if tables is None:
+        tables = ArrayTables.from_tree(tree, delimiter)
+    tip_names = tables.tip_names
+    tip_taxa = tables.tip_taxa
+    taxa_counts = tables.taxa_counts
+    tip_start = tables.tip_start
+    tip_end = tables.tip_end
+    subtree_end = tables.subtree_end
+    collapsed_tree = tables.collapsed(support)
+
+    assigned = np.zeros(len(tip_names), dtype=bool)
+    assigned_tips = set()
+    # every tip below skip_end is already assigned; below partial_end
+    # some tips were pruned rather than assigned and must be checked
+    skip_end = 0
+    partial_end = 0
+    subgroup_counter = 0
+    inparalog_handling = dict()
+    inparalog_handling_summary = dict()
+    subgroup_records = []
+    if seq_lengths is None:
+        seq_lengths = dict()
+
+    for node in tqdm(tables.internal_nodes):
+        if node < skip_end or taxa_counts[node] < occupancy:
+            continue
+        start = tip_start[node]
+        end = tip_end[node]
+        if node < partial_end and assigned[start:end].any():
+            continue
+
+        if taxa_counts[node] == end - start:
+            pruned_groups = []
+        else:
+            pruned_groups = resolve_inparalogs(
+                SubtreeView(collapsed_tree, node),
+                tip_names,
+                tip_taxa,
+                fasta_dict,
+                inparalog_to_keep,
+                inparalog_handling,
+                report_inparalog_handling,
+                seq_lengths,
+            )
+            if pruned_groups is None:
+                continue
+
+        pruned_tip_set = {tip for group in pruned_groups for tip in group}
+        terms = [
+            name for name in tip_names[start:end] if name not in pruned_tip_set
+        ]
+
+        newtree = None
+        if snap_trees and write_outputs:
+            newtree = build_snap_tree(collapsed_tree, node, pruned_groups)
+
+        (
+            subgroup_counter,
+            assigned_tips,
+            inparalog_handling_summary,
+        ) = write_output_fasta_and_account_for_assigned_tips_single_copy_case(
+            fasta,
+            subgroup_counter,
+            terms,
+            fasta_dict,
+            assigned_tips,
+            snap_trees,
+            newtree,
+            output_path,
+            inparalog_handling,
+            inparalog_handling_summary,
+            report_inparalog_handling,
+            subgroup_records,
+            write_outputs,
+        )
+
+        if pruned_tip_set:
+            assigned[start:end] = [
+                name not in pruned_tip_set for name in tip_names[start:end]
+            ]
+            partial_end = max(partial_end, subtree_end[node])
+        else:
+            assigned[start:end] = True
+            skip_end = subtree_end[node]
+
+    return {
+        "single_copy": False,
+        "subgroup_counter": subgroup_counter,
+        "subgroup_records": subgroup_records,
+    }
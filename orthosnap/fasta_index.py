@@ -0,0 +1,239 @@
+import mmap
+import os
+from collections.abc import Mapping
+
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+INDEX_SUFFIX = ".orthosnap.fai"
+_INDEX_MAGIC = "#orthosnap-fasta-index"
+# whitespace Bio.SeqIO drops from sequence lines
+_SEQUENCE_WHITESPACE = b" \t\r\n"
+
+
+class IndexedFasta(Mapping):
+    """
+    Read-only FASTA mapping backed by byte offsets into the input file.
+
+    Headers are scanned once (or read back from a sidecar index next to
+    the FASTA file) and every record is stored as the offsets of its
+    header line and sequence block. Sequence data stays in the memory
+    mapped file until a record is requested, so memory no longer grows
+    with alignment size. Records are built the same way Bio.SeqIO's
+    FASTA parser builds them, so writers and selection code can use this
+    in place of a SeqIO.to_dict dictionary.
+    """
+
+    def __init__(self, path: str, entries: list, raw_output: bool = False):
+        self.path = path
+        # write subgroup FASTA files by copying record bytes verbatim
+        self.raw_output = raw_output
+        # (id, header offset, sequence offset, record end) in file order
+        self.entries = entries
+        self.ids = [entry[0] for entry in entries]
+        self._offsets = dict()
+        for entry in entries:
+            self._offsets.setdefault(entry[0], entry[1:])
+
+        self._handle = open(path, "rb")
+        if os.fstat(self._handle.fileno()).st_size:
+            self._data = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b""
+
+    def __getitem__(self, name: str) -> SeqRecord:
+        header_start, sequence_start, record_end = self._offsets[name]
+        title = self._data[header_start + 1:sequence_start].decode().rstrip()
+        return SeqRecord(
+            Seq(self.sequence_bytes(name)),
+            id=name,
+            name=name,
+            description=title,
+        )
+
+    def __contains__(self, name) -> bool:
+        return name in self._offsets
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def sequence_bytes(self, name: str) -> bytes:
+        """Sequence of a record with line breaks and whitespace removed."""
+        _, sequence_start, record_end = self._offsets[name]
+        return self._data[sequence_start:record_end].translate(
+            None, _SEQUENCE_WHITESPACE
+        )
+
+    def ungapped_length(self, name: str) -> int:
+        sequence = self.sequence_bytes(name)
+        return len(sequence) - sequence.count(b"-")
+
+    def copy_records(self, names: list, output_file_name: str):
+        """
+        Write records to a new file exactly as they appear in the input,
+        copying byte ranges in the kernel where the platform allows it.
+        """
+        source = self._handle.fileno()
+        target = os.open(
+            output_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666
+        )
+        try:
+            for name in names:
+                header_start, _, record_end = self._offsets[name]
+                _copy_range(
+                    source, target, header_start, record_end - header_start, self._data
+                )
+                # the last record of a file may lack its newline
+                if record_end and self._data[record_end - 1:record_end] != b"\n":
+                    os.write(target, b"\n")
+        finally:
+            os.close(target)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._handle.close()
+
+
+def _copy_range(source: int, target: int, offset: int, count: int, data):
+    """
+    Append count bytes at offset of source to target with
+    copy_file_range, then sendfile, then a plain buffered write.
+    """
+    for copy in (_copy_file_range, _sendfile):
+        if copy is None:
+            continue
+        try:
+            while count > 0:
+                copied = copy(source, target, offset, count)
+                if copied == 0:
+                    break
+                offset += copied
+                count -= copied
+        except OSError:
+            # e.g. not supported between these file systems; fall back
+            # from wherever the copy got to
+            continue
+        if count == 0:
+            return
+    while count > 0:
+        written = os.write(target, data[offset:offset + count])
+        offset += written
+        count -= written
+
+
+def _copy_file_range_impl(source: int, target: int, offset: int, count: int) -> int:
+    return os.copy_file_range(source, target, count, offset)
+
+
+def _sendfile_impl(source: int, target: int, offset: int, count: int) -> int:
+    return os.sendfile(target, source, offset, count)
+
+
+_copy_file_range = (
+    _copy_file_range_impl if hasattr(os, "copy_file_range") else None
+)
+_sendfile = _sendfile_impl if hasattr(os, "sendfile") else None
+
+
+def scan_fasta_offsets(data) -> list:
+    """
+    Return (id, header offset, sequence offset, record end) for every
+    record of a FASTA file held in a bytes-like object.
+    """
+    entries = []
+    size = len(data)
+
+    if data[:1] == b">":
+        header_start = 0
+    else:
+        header_start = data.find(b"\n>")
+        if header_start != -1:
+            header_start += 1
+
+    while header_start != -1:
+        line_end = data.find(b"\n", header_start)
+        if line_end == -1:
+            line_end = size
+        next_header = data.find(b"\n>", line_end)
+        record_end = size if next_header == -1 else next_header + 1
+
+        title = data[header_start + 1:line_end].decode().rstrip()
+        words = title.split(None, 1)
+        entries.append(
+            (
+                words[0] if words else "",
+                header_start,
+                min(line_end + 1, size),
+                record_end,
+            )
+        )
+        header_start = -1 if next_header == -1 else next_header + 1
+
+    return entries
+
+
+def _index_path(fasta: str) -> str:
+    return fasta + INDEX_SUFFIX
+
+
+def _source_stamp(fasta: str) -> str:
+    stat = os.stat(fasta)
+    return f"{stat.st_size}\t{stat.st_mtime_ns}"
+
+
+def _read_index(fasta: str):
+    """Entries from the sidecar index, or None if missing or stale."""
+    try:
+        with open(_index_path(fasta), "r") as handle:
+            header = handle.readline().rstrip("\n").split("\t", 1)
+            if header != [_INDEX_MAGIC, _source_stamp(fasta)]:
+                return None
+            entries = []
+            for line in handle:
+                name, header_start, sequence_start, record_end = \
+                    line.rstrip("\n").split("\t")
+                entries.append(
+                    (name, int(header_start), int(sequence_start), int(record_end))
+                )
+            return entries
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index(fasta: str, entries: list):
+    """Persist offsets next to the FASTA; read-only locations are skipped."""
+    index_path = _index_path(fasta)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as handle:
+            handle.write(f"{_INDEX_MAGIC}\t{_source_stamp(fasta)}\n")
+            for name, header_start, sequence_start, record_end in entries:
+                handle.write(
+                    f"{name}\t{header_start}\t{sequence_start}\t{record_end}\n"
+                )
+        os.replace(tmp_path, index_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def open_indexed_fasta(fasta: str, raw_output: bool = False) -> IndexedFasta:
+    """
+    Open a FASTA file through its byte-offset index, scanning headers and
+    writing the sidecar index only when no up-to-date one exists.
+    """
+    entries = _read_index(fasta)
+    if entries is None:
+        with open(fasta, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size:
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    entries = scan_fasta_offsets(data)
+            else:
+                entries = []
+        _write_index(fasta, entries)
+
+    return IndexedFasta(fasta, entries, raw_output)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+HASH_MODES = ("sha256", "blake2b", "sampled")
+# key suffix of each mode's digests in run.json, e.g., fasta_sha256
+DIGEST_NAMES = {
+    "sha256": "sha256",
+    "blake2b": "blake2b",
+    "sampled": "sampled_blake2b",
+}
+STORE_NAME = "fingerprints.json"
+
+_CHUNK_SIZE = 1024 * 1024
+_SAMPLE_SIZE = 64 * 1024
+_SAMPLE_COUNT = 64
+# files modified this recently may change again within the same mtime
+# tick, so their digests are not stored
+_SETTLE_NS = 2 * 10**9
+
+
+def _full_digest(path: str, digest) -> str:
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sampled_digest(path: str, size: int) -> str:
+    """
+    BLAKE2b of the file size and of evenly spaced blocks, first and last
+    included; files smaller than the samples are hashed whole
+    """
+    digest = hashlib.blake2b()
+    digest.update(size.to_bytes(8, "little"))
+    if size <= _SAMPLE_SIZE * _SAMPLE_COUNT:
+        return _full_digest(path, digest)
+
+    step = (size - _SAMPLE_SIZE) / (_SAMPLE_COUNT - 1)
+    with open(path, "rb") as handle:
+        for sample in range(_SAMPLE_COUNT):
+            handle.seek(round(sample * step))
+            digest.update(handle.read(_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    """
+    Small JSON store of file digests, keyed by hash mode and absolute
+    path and valid while the file keeps its inode, size and mtime_ns.
+    Writes merge with what other processes stored meanwhile and replace
+    the file atomically; a store that cannot be read or written only
+    costs rehashing.
+    """
+
+    def __init__(self, path: str, max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+
+    @classmethod
+    def default(cls, cache_dir: str = None):
+        """The store in cache_dir, else in the user cache directory."""
+        if cache_dir is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+                os.path.expanduser("~"), ".cache"
+            )
+            cache_dir = os.path.join(cache_home, "orthosnap")
+        return cls(os.path.join(cache_dir, STORE_NAME))
+
+    @staticmethod
+    def _key(path: str, mode: str) -> str:
+        return f"{mode}\t{os.path.abspath(path)}"
+
+    @staticmethod
+    def _stamp(stat: os.stat_result) -> list:
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as handle:
+                entries = json.load(handle)
+        except (OSError, ValueError):
+            return dict()
+        return entries if isinstance(entries, dict) else dict()
+
+    def get(self, path: str, mode: str, stat: os.stat_result):
+        entry = self._load().get(self._key(path, mode))
+        if entry is None or entry[:3] != self._stamp(stat):
+            return None
+        return entry[3]
+
+    def put(self, path: str, mode: str, stat: os.stat_result, digest: str):
+        if time.time_ns() - stat.st_mtime_ns < _SETTLE_NS:
+            return
+        entries = self._load()
+        key = self._key(path, mode)
+        entries.pop(key, None)
+        entries[key] = self._stamp(stat) + [digest]
+        # entries are kept in insertion order; the oldest go first
+        for stale in list(entries)[: max(0, len(entries) - self.max_entries)]:
+            del entries[stale]
+
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.path) or ".", suffix=".tmp"
+            )
+            with os.fdopen(handle, "w") as output:
+                json.dump(entries, output)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def file_digest(path: str, mode: str = "sha256", store: FingerprintStore = None) -> str:
+    """
+    Digest of a file: full SHA-256 or BLAKE2b, or BLAKE2b of sampled
+    blocks; read from store when the file is unchanged since it was
+    last hashed.
+    """
+    stat = os.stat(path)
+    if store is not None:
+        digest = store.get(path, mode, stat)
+        if digest is not None:
+            return digest
+
+    if mode == "sha256":
+        digest = _full_digest(path, hashlib.sha256())
+    elif mode == "blake2b":
+        digest = _full_digest(path, hashlib.blake2b())
+    elif mode == "sampled":
+        digest = _sampled_digest(path, stat.st_size)
+    else:
+        raise ValueError(f"unknown hash mode: {mode}")
+
+    if store is not None:
+        store.put(path, mode, stat, digest)
+    return digest
+
+
+def input_digests(
+    tree: str, fasta: str, mode: str = "sha256", store: FingerprintStore = None
+) -> dict:
+    """Digests of a run's tree and FASTA file, named as in run.json."""
+    name = DIGEST_NAMES[mode]
+    return {
+        f"tree_{name}": file_digest(tree, mode, store),
+        f"fasta_{name}": file_digest(fasta, mode, store),
+    }
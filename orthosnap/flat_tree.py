@@ -0,0 +1,202 @@
+import math
+
+import numpy as np
+
+from .lca import EulerTourLCA
+
+
+class FlatTree:
+    """
+    Flat, array-backed view of a rooted phylogeny.
+
+    Nodes are numbered in preorder with the root at 0, so the subtree of
+    node v occupies the contiguous id range [v, subtree_end[v]). Topology
+    is stored as parent/first-child/next-sibling index arrays (-1 when
+    absent); per-node attributes are parallel arrays with NaN standing in
+    for a missing branch length or support value.
+    """
+
+    def __init__(
+        self,
+        parent,
+        first_child,
+        next_sibling,
+        branch_length,
+        confidence,
+        names: list,
+        clades: list = None,
+    ):
+        self.parent = np.asarray(parent, dtype=np.int64)
+        self.first_child = np.asarray(first_child, dtype=np.int64)
+        self.next_sibling = np.asarray(next_sibling, dtype=np.int64)
+        self.branch_length = np.asarray(branch_length, dtype=np.float64)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.names = names
+        # source Bio.Phylo clades, kept so outputs that need Clade
+        # objects (e.g., SNAP-OG Newick files) can be materialized
+        self.clades = clades
+
+        self.size = len(self.parent)
+        self.is_terminal = self.first_child == -1
+        self.subtree_end = _compute_subtree_end(self.parent)
+
+        # tips numbered left to right, so the tips of node v are the
+        # contiguous tip positions [tip_start[v], tip_end[v])
+        self.tip_nodes = np.flatnonzero(self.is_terminal)
+        tip_offsets = np.concatenate(
+            ([0], np.cumsum(self.is_terminal, dtype=np.int64))
+        )
+        self.tip_start = tip_offsets[:-1]
+        self.tip_end = tip_offsets[self.subtree_end]
+
+        # plain-list copies for the scalar lookups of SubtreeView, which
+        # are much faster on lists than on NumPy arrays
+        self._parents = self.parent.tolist()
+        self._branch_lengths = [
+            None if math.isnan(length) else length
+            for length in self.branch_length.tolist()
+        ]
+        self._confidences = [
+            None if math.isnan(value) else value
+            for value in self.confidence.tolist()
+        ]
+        self._subtree_ends = self.subtree_end.tolist()
+        self._tip_starts = self.tip_start.tolist()
+        self._tip_ends = self.tip_end.tolist()
+        self._tip_nodes = self.tip_nodes.tolist()
+        self._lca = None
+
+    @classmethod
+    def from_phylo(cls, tree):
+        """
+        Flatten a Bio.Phylo tree in one iterative preorder pass.
+        """
+        parent = []
+        first_child = []
+        next_sibling = []
+        branch_length = []
+        confidence = []
+        names = []
+        clades = []
+        last_child = []
+
+        stack = [(tree.root, -1)]
+        while stack:
+            clade, parent_id = stack.pop()
+            node_id = len(parent)
+
+            parent.append(parent_id)
+            first_child.append(-1)
+            next_sibling.append(-1)
+            last_child.append(-1)
+            branch_length.append(
+                np.nan if clade.branch_length is None else clade.branch_length
+            )
+            confidence.append(
+                np.nan if clade.confidence is None else clade.confidence
+            )
+            names.append(clade.name)
+            clades.append(clade)
+
+            if parent_id != -1:
+                if first_child[parent_id] == -1:
+                    first_child[parent_id] = node_id
+                else:
+                    next_sibling[last_child[parent_id]] = node_id
+                last_child[parent_id] = node_id
+
+            for child in reversed(clade.clades):
+                stack.append((child, node_id))
+
+        return cls(
+            parent,
+            first_child,
+            next_sibling,
+            branch_length,
+            confidence,
+            names,
+            clades,
+        )
+
+    @classmethod
+    def from_preorder(cls, parent, branch_length, confidence, names: list):
+        """
+        Build from per-node lists already in preorder, with the children
+        of every node in their original order.
+        """
+        size = len(parent)
+        first_child = [-1] * size
+        next_sibling = [-1] * size
+        last_child = [-1] * size
+        for node in range(1, size):
+            parent_id = parent[node]
+            if first_child[parent_id] == -1:
+                first_child[parent_id] = node
+            else:
+                next_sibling[last_child[parent_id]] = node
+            last_child[parent_id] = node
+
+        return cls(
+            parent, first_child, next_sibling, branch_length, confidence, names
+        )
+
+    def children(self, node: int) -> list:
+        """Return child ids of node in their original order."""
+        child_ids = []
+        child = self.first_child[node]
+        while child != -1:
+            child_ids.append(int(child))
+            child = self.next_sibling[child]
+        return child_ids
+
+    def tip_names(self) -> list:
+        """Return terminal names in left-to-right (preorder) order."""
+        return [self.names[idx] for idx in self._tip_nodes]
+
+    # tree index interface used by helper.SubtreeView
+
+    def parent_of(self, node: int) -> int:
+        return self._parents[node]
+
+    def children_of(self, node: int) -> list:
+        return self.children(node)
+
+    def branch_length_of(self, node: int):
+        return self._branch_lengths[node]
+
+    def confidence_of(self, node: int):
+        return self._confidences[node]
+
+    def tip_span(self, node: int) -> tuple:
+        return self._tip_starts[node], self._tip_ends[node]
+
+    def tip_node(self, tip: int) -> int:
+        return self._tip_nodes[tip]
+
+    def clade_of(self, node: int):
+        return self.clades[node]
+
+    def tip_lca(self, first_tip: int, last_tip: int) -> int:
+        """
+        Return the deepest node whose tip interval spans tip positions
+        first_tip..last_tip (inclusive).
+        """
+        if self._lca is None:
+            self._lca = EulerTourLCA(self._parents)
+        return self._lca.query(
+            self._tip_nodes[first_tip], self._tip_nodes[last_tip]
+        )
+
+
+def _compute_subtree_end(parent) -> np.ndarray:
+    """
+    Exclusive preorder end of every subtree, from subtree sizes
+    accumulated in reverse preorder.
+    """
+    parent_list = parent.tolist()
+    sizes = [1] * len(parent_list)
+    for node in range(len(parent_list) - 1, 0, -1):
+        sizes[parent_list[node]] += sizes[node]
+    return np.arange(len(parent_list), dtype=np.int64) + np.asarray(
+        sizes, dtype=np.int64
+    )
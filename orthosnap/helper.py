@@ -1,11 +1,26 @@
-from collections import Counter
 from enum import Enum
+import math
 import re
 import sys
+from bisect import bisect_left, insort
 
+import numpy as np
 from Bio import Phylo
 from Bio import SeqIO
-from Bio.Phylo.BaseTree import TreeMixin, Tree
+from Bio.Phylo.BaseTree import Tree
+
+from .fasta_index import IndexedFasta, open_indexed_fasta
+from .flat_tree import FlatTree
+from .induced_subtrees import InducedSubtrees
+from .lca import EulerTourLCA
+from .midpoint import flat_root_at_midpoint, root_at_midpoint
+from .newick import read_flat_newick
+from .tree_index import (
+    read_phylo_tree_index,
+    read_tree_index,
+    write_phylo_tree_index,
+    write_tree_index,
+)
 
 
 class InparalogToKeep(Enum):
@@ -17,17 +32,68 @@ class InparalogToKeep(Enum):
     longest_branch_len = "longest_branch_len"
 
 
+# builtin sum() switched to compensated (Neumaier) summation in Python
+# 3.12; root distances accumulate branch lengths the same way so they
+# match TreeMixin.distance to the last bit
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+
+def _add_branch_length(total: tuple, length) -> tuple:
+    """
+    add one branch length to a running (sum, compensation) pair, in the
+    same way the builtin sum() does
+    """
+    value, compensation = total
+    result = value + length
+    if _COMPENSATED_SUM:
+        if abs(value) >= abs(length):
+            compensation += (value - result) + length
+        else:
+            compensation += (length - result) + value
+    return result, compensation
+
+
+def _total_length(total: tuple):
+    value, compensation = total
+    if compensation and math.isfinite(compensation):
+        value += compensation
+    return value
+
+
+SEQ_LEN_STRATEGIES = [
+    "shortest_seq_len",
+    "median_seq_len",
+    "longest_seq_len",
+]
+
+
+def ungapped_length(record) -> int:
+    """
+    sequence length without gaps; bytes.count avoids copying the row
+    """
+    return len(record.seq) - record.seq.count("-")
+
+
+def ungapped_sequence_lengths(fasta_dict: dict) -> dict:
+    """
+    ungapped length of every sequence, computed once per FASTA so
+    inparalog selection is a dictionary lookup
+    """
+    return {name: ungapped_length(record) for name, record in fasta_dict.items()}
+
+
+def _clone_clade(clade):
+    clone = clade.__class__()
+    for key, value in clade.__dict__.items():
+        if key != "clades":
+            setattr(clone, key, value)
+    clone.clades = []
+    return clone
+
+
 def clone_subtree_as_tree(subtree):
     """Clone a clade subtree into a standalone Bio.Phylo Tree."""
 
-    def _clone_clade(clade):
-        clone = clade.__class__()
-        for key, value in clade.__dict__.items():
-            if key != "clades":
-                setattr(clone, key, value)
-        clone.clades = []
-        return clone
-
     root_clone = _clone_clade(subtree)
     stack = [(subtree, root_clone)]
 
@@ -51,135 +117,41 @@ def collapse_low_support_bipartitions(newtree, support: float):
     return newtree
 
 
-def determine_if_dups_are_sister(
-    subtree_tips: list,
-    clade_terminal_index: dict,
-):
+def intern_taxa(tip_names: list, delimiter: str):
     """
-    determine if dups are sister to one another
-    """
-    tip_bits = clade_terminal_index["tip_bits"]
-    duplicate_mask = 0
-    for tip in subtree_tips:
-        bit = tip_bits.get(tip)
-        if bit is None:
-            return False
-        duplicate_mask |= bit
-    return duplicate_mask in clade_terminal_index["masks"]
-
+    map every tip to an integer taxon id, numbered by first appearance
 
-def build_clade_terminal_set_index(tree):
-    """
-    Build a bitmask index for terminal membership across all clades.
+    return an id array aligned with tip_names and the taxon name of each id
     """
-
-    terminal_names = sorted(
-        term.name for term in tree.get_terminals() if term.name is not None
+    taxon_index = dict()
+    taxon_ids = np.array(
+        [
+            taxon_index.setdefault(name.split(delimiter, 1)[0], len(taxon_index))
+            for name in tip_names
+        ],
+        dtype=np.int64,
     )
-    tip_bits = {name: (1 << idx) for idx, name in enumerate(terminal_names)}
-    clade_to_mask = dict()
-    masks = set()
 
-    for clade in tree.find_clades(order="postorder"):
-        if clade.is_terminal():
-            mask = tip_bits[clade.name]
-        else:
-            merged_mask = 0
-            for child in clade.clades:
-                merged_mask |= clade_to_mask[child]
-            mask = merged_mask
+    return taxon_ids, list(taxon_index)
 
-        clade_to_mask[clade] = mask
-        masks.add(mask)
-    return {"masks": masks, "tip_bits": tip_bits}
 
-
-def update_clade_terminal_set_index_for_pruned_tips(
-    clade_terminal_index: dict,
-    pruned_tips: list,
-):
-    """
-    Incrementally update bitmask index after pruning one or more tips.
+def group_duplicate_taxa(taxon_ids: np.ndarray) -> list:
     """
+    group positions of taxa represented more than once
 
-    if not pruned_tips:
-        return clade_terminal_index
-
-    prune_mask = 0
-    tip_bits = clade_terminal_index["tip_bits"]
-    for tip in pruned_tips:
-        bit = tip_bits.get(tip)
-        if bit is not None:
-            prune_mask |= bit
-
-    if prune_mask == 0:
-        return clade_terminal_index
-
-    updated_masks = set()
-    for mask in clade_terminal_index["masks"]:
-        trimmed_mask = mask & ~prune_mask
-        if trimmed_mask:
-            updated_masks.add(trimmed_mask)
-
-    return {"masks": updated_masks, "tip_bits": tip_bits}
-
-
-def build_terminal_parent_maps(tree):
-    """
-    Build terminal-node and parent lookups for fast terminal pruning.
+    groups are ordered by the first appearance of their taxon
     """
+    _, first_seen, counts = np.unique(
+        taxon_ids, return_index=True, return_counts=True
+    )
+    by_taxon = np.argsort(taxon_ids, kind="stable")
+    group_starts = np.concatenate(([0], np.cumsum(counts)))
 
-    parent_lookup = dict()
-    terminal_lookup = dict()
-
-    stack = [tree.root]
-    while stack:
-        parent = stack.pop()
-        for child in parent.clades:
-            parent_lookup[child] = parent
-            if child.is_terminal() and child.name is not None:
-                terminal_lookup[child.name] = child
-            else:
-                stack.append(child)
-
-    return terminal_lookup, parent_lookup
-
-
-def prune_terminal_fast(tree, terminal_name: str, terminal_lookup: dict, parent_lookup: dict):
-    """
-    Prune one terminal by name using parent links to avoid full-tree traversals.
-    """
-
-    target = terminal_lookup.pop(terminal_name, None)
-    if target is None:
-        raise ValueError("can't find a matching target below this root")
-
-    parent = parent_lookup.get(target)
-    if parent is None:
-        raise ValueError("can't find parent for matching target")
-
-    parent.clades.remove(target)
-    parent_lookup.pop(target, None)
-
-    if len(parent.clades) == 1:
-        child = parent.clades[0]
-        if child.branch_length is not None:
-            child.branch_length += parent.branch_length or 0.0
-
-        grandparent = parent_lookup.get(parent)
-        if grandparent is None:
-            tree.root = child
-            parent_lookup.pop(parent, None)
-            if not child.is_terminal():
-                for grandchild in child.clades:
-                    parent_lookup[grandchild] = child
-        else:
-            idx = grandparent.clades.index(parent)
-            grandparent.clades[idx] = child
-            parent_lookup[child] = grandparent
-            parent_lookup.pop(parent, None)
-
-    return tree
+    return [
+        by_taxon[group_starts[idx]:group_starts[idx + 1]].tolist()
+        for idx in np.argsort(first_seen)
+        if counts[idx] > 1
+    ]
 
 
 def get_all_tips_and_taxa_names(tree, delimiter: str):
@@ -188,19 +160,17 @@ def get_all_tips_and_taxa_names(tree, delimiter: str):
 
     return lists with information from each
     """
-    taxa = []
-    all_tips = []
+    if isinstance(tree, FlatTree):
+        all_tips = tree.tip_names()
+    else:
+        all_tips = [term.name for term in tree.get_terminals()]
 
-    # loop through the tree and collect terminal names
-    for term in tree.get_terminals():
-        try:
-            taxa_name = term.name[: term.name.index(delimiter)]
-        except ValueError:
+    for tip in all_tips:
+        if delimiter not in tip:
             print("\nERROR: Delimiter does not exist in FASTA headers.\nSpecify the delimiter using the -d argument.")
             sys.exit()
-        if taxa_name not in taxa:
-            taxa.append(taxa_name)
-        all_tips.append(term.name)
+
+    _, taxa = intern_taxa(all_tips, delimiter)
 
     return taxa, all_tips
 
@@ -230,68 +200,494 @@ def check_if_single_copy(taxa: list, all_tips: list):
         return False
 
 
-def get_tips_and_taxa_names_and_taxa_counts_from_subtrees(inter, delimiter: str):
+class SubtreeTaxaCache:
     """
-    get taxa, counts of each taxa, and all terminal names
+    Subtree tips and taxon occupancy for every internal clade.
+
+    Tips are numbered in depth-first order, so each clade covers a
+    contiguous [start, end) range of one shared tip list. Taxa are
+    interned once as integer ids aligned with that list, so per-clade
+    taxon counts are a bincount over the clade's range and memory stays
+    linear in the number of tips whatever the tree shape.
     """
-    taxa_from_terms = []
-    terms = []
-    # get taxa and terminal names from subtree
-    for term in inter.get_terminals():
-        taxa_from_terms.append(term.name.split(delimiter, 1)[0])
-        terms.append(term.name)
-    # count number of taxa in subtree
-    counts_of_taxa_from_terms = Counter(taxa_from_terms)
-    # count number of times each taxon is present
-    counts = list(counts_of_taxa_from_terms.values())
 
-    return taxa_from_terms, terms, counts_of_taxa_from_terms, counts
+    def __init__(
+        self,
+        terms: list,
+        taxon_ids: np.ndarray,
+        taxon_names: list,
+        intervals: dict,
+        internal_counts: dict,
+        parents: dict = None,
+        tip_clades: list = None,
+        preorder_clades: list = None,
+        preorder_parents: list = None,
+        tip_ids: list = None,
+    ):
+        self.terms = terms
+        self.taxon_ids = taxon_ids
+        self.taxon_names = taxon_names
+        self.intervals = intervals
+        self.internal_counts = internal_counts
+        self.parents = parents
+        self.tip_clades = tip_clades
+        self.preorder_clades = preorder_clades
+        self.preorder_parents = preorder_parents
+        self.tip_ids = tip_ids
+        self._lca = None
+        self.tip_positions = {term: idx for idx, term in enumerate(terms)}
+
+    def get_terms(self, clade) -> list:
+        start, end = self.intervals[clade]
+        return self.terms[start:end]
+
+    def get_taxon_ids(self, clade) -> np.ndarray:
+        start, end = self.intervals[clade]
+        return self.taxon_ids[start:end]
+
+    def get_taxon_counts(self, clade) -> np.ndarray:
+        """
+        number of tips per taxon id in the clade; absent taxa count zero
+        """
+        return np.bincount(self.get_taxon_ids(clade))
+
+    def is_disjoint(self, clade, assigned_flags: bytearray) -> bool:
+        """
+        check that no tip of the clade is flagged in assigned_flags,
+        a bytearray indexed by tip position
+        """
+        start, end = self.intervals[clade]
+        return assigned_flags.find(1, start, end) == -1
+
+    # tree index interface used by SubtreeView
+
+    def parent_of(self, clade):
+        return self.parents[clade]
+
+    def children_of(self, clade) -> list:
+        return list(clade.clades)
+
+    def branch_length_of(self, clade):
+        return clade.branch_length
+
+    def confidence_of(self, clade):
+        return clade.confidence
+
+    def tip_span(self, clade) -> tuple:
+        return self.intervals[clade]
+
+    def tip_node(self, tip: int):
+        return self.tip_clades[tip]
+
+    def clade_of(self, clade):
+        return clade
+
+    def tip_lca(self, first_tip: int, last_tip: int):
+        """
+        deepest clade whose tips span positions first_tip..last_tip
+        """
+        if self._lca is None:
+            self._lca = EulerTourLCA(self.preorder_parents)
+        node = self._lca.query(self.tip_ids[first_tip], self.tip_ids[last_tip])
+        return self.preorder_clades[node]
 
 
 def build_subtree_taxa_cache(tree, delimiter: str):
     """
-    Cache subtree term and taxa-count data for each internal clade.
+    Index subtree tips and interned taxa for each internal clade.
     """
 
-    term_cache = dict()
-    taxa_count_cache = dict()
-    subtree_cache = dict()
-
-    for clade in tree.find_clades(order="postorder"):
+    terms = []
+    tip_clades = []
+    intervals = dict()
+    internal_counts = dict()
+    parents = {tree.root: None}
+    preorder_clades = []
+    preorder_parents = []
+    tip_ids = []
+    internal_seen = 0
+
+    # iterative postorder, so deep (caterpillar) trees do not hit the
+    # recursion limit; first visits are numbered in preorder for LCAs
+    stack = [(tree.root, False, -1)]
+    while stack:
+        clade, visited, parent_id = stack.pop()
+        if not visited:
+            node_id = len(preorder_clades)
+            preorder_clades.append(clade)
+            preorder_parents.append(parent_id)
         if clade.is_terminal():
-            term_name = clade.name
-            term_cache[clade] = [term_name]
-            taxa_count_cache[clade] = Counter([term_name.split(delimiter, 1)[0]])
-            continue
+            intervals[clade] = (len(terms), len(terms) + 1)
+            terms.append(clade.name)
+            tip_clades.append(clade)
+            tip_ids.append(node_id)
+        elif not visited:
+            stack.append((clade, True, parent_id))
+            intervals[clade] = len(terms)
+            internal_counts[clade] = internal_seen
+            internal_seen += 1
+            for child in reversed(clade.clades):
+                parents[child] = clade
+                stack.append((child, False, node_id))
+        else:
+            intervals[clade] = (intervals[clade], len(terms))
+            internal_counts[clade] = internal_seen - internal_counts[clade]
 
-        terms = []
-        counts_of_taxa_from_terms = Counter()
+    taxon_ids, taxon_names = intern_taxa(terms, delimiter)
 
-        for child in clade.clades:
-            terms.extend(term_cache[child])
-            counts_of_taxa_from_terms.update(taxa_count_cache[child])
+    return SubtreeTaxaCache(
+        terms,
+        taxon_ids,
+        taxon_names,
+        intervals,
+        internal_counts,
+        parents,
+        tip_clades,
+        preorder_clades,
+        preorder_parents,
+        tip_ids,
+    )
 
-        term_cache[clade] = terms
-        taxa_count_cache[clade] = counts_of_taxa_from_terms
-        subtree_cache[clade] = (
-            terms,
-            set(terms),
-            counts_of_taxa_from_terms,
-            list(counts_of_taxa_from_terms.values()),
-        )
 
-    return subtree_cache
+class CollapsedTree:
+    """
+    Low-support bipartitions of a whole tree, collapsed once.
+
+    Mirrors Tree.collapse_all on a clone of the tree rooted at root:
+    collapsed records the removed nodes, parent maps every node to its
+    nearest surviving ancestor, children holds the final child order of
+    every surviving internal node and branch_length the lengths that
+    collapsed ancestors hand down. The support threshold is global, so
+    every candidate clade below root reuses this one pass.
+    """
+
+    def __init__(
+        self,
+        index,
+        root,
+        support: float,
+        collapsed: set,
+        parent: dict,
+        children: dict,
+        branch_length: dict,
+    ):
+        self.index = index
+        self.root = root
+        self.support = support
+        self.collapsed = collapsed
+        self.parent = parent
+        self.children = children
+        self.branch_length = branch_length
+
+
+def collapse_low_support_once(index, root, support: float) -> CollapsedTree:
+    """
+    collapse bipartitions with support less than threshold below root in
+    a single level-order pass over a tree index
+    """
+    collapsed = set()
+    parent = dict()
+    children = dict()
+    branch_length = {root: index.branch_length_of(root)}
+
+    level = [root]
+    collapse_order = []
+    while level:
+        next_level = []
+        for node in level:
+            child_nodes = index.children_of(node)
+            if not child_nodes:
+                continue
+            children[node] = dict.fromkeys(child_nodes)
+            node_collapsed = node in collapsed
+            for child in child_nodes:
+                # ancestors come first in level order, so parent and
+                # branch length of node are already final here
+                parent[child] = parent[node] if node_collapsed else node
+                length = index.branch_length_of(child)
+                if node_collapsed and length is not None:
+                    length += branch_length[node] or 0
+                branch_length[child] = length
+                confidence = index.confidence_of(child)
+                if confidence is not None and confidence < support:
+                    collapsed.add(child)
+                    collapse_order.append(child)
+            next_level.extend(child_nodes)
+        level = next_level
+
+    # as in TreeMixin.collapse, a collapsed node is popped from its
+    # parent and its children are appended to the end of the parent
+    for node in collapse_order:
+        siblings = children[parent[node]]
+        del siblings[node]
+        siblings.update(children.pop(node, {}))
+
+    children = {node: list(child_nodes) for node, child_nodes in children.items()}
+
+    return CollapsedTree(
+        index, root, support, collapsed, parent, children, branch_length
+    )
 
 
-def get_subtree_tips(terms: list, name: str, delimiter: str):
+class ExtractionTables:
     """
-    get lists of subsubtrees from subtree
+    What SNAP-OG extraction derives from a tree before scanning it: a
+    tree index with the taxa below every node, and the tree collapsed at
+    each support threshold asked for. Runs on one tree that differ only
+    in support, occupancy or inparalog handling can share them.
     """
-    # get the duplicate sequences
-    dups = [e for e in terms if e.split(delimiter, 1)[0] == name]
-    # This helper is only used for duplicate discovery.
-    # Keep return shape for compatibility with older callers/tests.
-    return [], dups
+
+    def __init__(self, index, root):
+        self.index = index
+        self.root = root
+        self._collapsed = dict()
+
+    @classmethod
+    def from_tree(cls, tree, delimiter: str):
+        return cls(build_subtree_taxa_cache(tree, delimiter), tree.root)
+
+    def collapsed(self, support: float) -> CollapsedTree:
+        if support not in self._collapsed:
+            self._collapsed[support] = collapse_low_support_once(
+                self.index, self.root, support
+            )
+        return self._collapsed[support]
+
+
+class SubtreeView:
+    """
+    Read-only view of a candidate clade as it would look after collapsing
+    low-support bipartitions and pruning inparalogs.
+
+    The view reads topology through a tree index (SubtreeTaxaCache for
+    Bio.Phylo clades, FlatTree for integer node ids) and the tree's
+    CollapsedTree, and copies nothing up front: pruning only records
+    overrides for the nodes it touches. Branch lengths are accumulated in
+    the same order as Tree.collapse_all and TreeMixin.prune, so
+    tip-to-root distances match those of a cloned, collapsed and pruned
+    subtree.
+    """
+
+    def __init__(self, collapsed_tree: CollapsedTree, clade):
+        self.collapsed_tree = collapsed_tree
+        self.index = collapsed_tree.index
+        self.clade = clade
+        self.root = clade
+        # the candidate root is never collapsed in its own clone, so the
+        # nodes handed to it by collapsing differ from the whole tree
+        self.root_collapsed = clade in collapsed_tree.collapsed
+        self.pruned = []
+        self._pruned_nodes = set()
+        self._parent = dict()
+        self._branch_length = dict()
+        self._child_count = dict()
+        self._replaced = dict()
+        self._root_children = None
+        self._root_distance = {clade: (0, 0.0)}
+
+    def is_collapsed(self, node) -> bool:
+        """True for nodes that collapse_low_support_bipartitions removes."""
+        return node != self.clade and node in self.collapsed_tree.collapsed
+
+    def dups_are_sister(self, dups: list) -> bool:
+        """
+        True if the tip positions in dups form exactly one clade of the
+        collapsed, pruned view.
+        """
+        node = self.index.tip_lca(dups[0], dups[-1])
+        if self.is_collapsed(node):
+            node = self._surviving_ancestor(node)
+        start, end = self.index.tip_span(node)
+        pruned_below = bisect_left(self.pruned, end) - bisect_left(self.pruned, start)
+        return end - start - pruned_below == len(dups)
+
+    def distance(self, tip: int) -> float:
+        """Tip-to-root distance of a tip position, as TreeMixin.distance."""
+        return _total_length(self._distance_from_root(self.index.tip_node(tip)))
+
+    def _distance_from_root(self, node) -> tuple:
+        """
+        running root distance of node, memoized top-down so paths shared
+        by several duplicates are summed once
+        """
+        path = []
+        while node not in self._root_distance:
+            path.append(node)
+            node = self.parent(node)
+
+        total = self._root_distance[node]
+        for node in reversed(path):
+            length = self.branch_length(node)
+            if length is not None:
+                total = _add_branch_length(total, length)
+            self._root_distance[node] = total
+        return total
+
+    def prune(self, tip: int):
+        """Remove a tip position, merging its parent away if left unary."""
+        node = self.index.tip_node(tip)
+        parent = self.parent(node)
+        insort(self.pruned, tip)
+        self._pruned_nodes.add(node)
+
+        if parent in self._child_count:
+            self._child_count[parent] -= 1
+        else:
+            self._child_count[parent] = len(self.children(parent))
+
+        if self._child_count[parent] == 1:
+            (child,) = self.children(parent)
+            child_length = self.branch_length(child)
+            if child_length is not None:
+                self._branch_length[child] = \
+                    child_length + (self.branch_length(parent) or 0.0)
+            if parent == self.root:
+                self.root = child
+            else:
+                self._parent[child] = self.parent(parent)
+                self._replaced[parent] = child
+            # merging changes the lengths (or root) below child
+            self._root_distance = {self.root: (0, 0.0)}
+
+    def _surviving_ancestor(self, node):
+        """Nearest ancestor of node that survives collapsing in the view."""
+        ancestor = self.collapsed_tree.parent[node]
+        if self.root_collapsed \
+                and ancestor == self.collapsed_tree.parent[self.clade]:
+            return self.clade
+        return ancestor
+
+    def parent(self, node):
+        """Nearest ancestor of node that survives collapsing and pruning."""
+        if node not in self._parent:
+            self._parent[node] = self._surviving_ancestor(node)
+        return self._parent[node]
+
+    def children(self, node) -> list:
+        """
+        Children of a surviving node in the collapsed, pruned view, in
+        the order Tree.collapse_all leaves them.
+        """
+        if node == self.clade and self.root_collapsed:
+            child_nodes = self._collapse_root_children()
+        else:
+            child_nodes = self.collapsed_tree.children.get(node, [])
+
+        children = []
+        for child in child_nodes:
+            while child in self._replaced:
+                child = self._replaced[child]
+            if child not in self._pruned_nodes:
+                children.append(child)
+        return children
+
+    def _collapse_root_children(self) -> list:
+        if self._root_children is None:
+            children = dict.fromkeys(self.index.children_of(self.clade))
+            queue = [child for child in children if self.is_collapsed(child)]
+            for node in queue:
+                del children[node]
+                for child in self.index.children_of(node):
+                    children[child] = None
+                    if self.is_collapsed(child):
+                        queue.append(child)
+            self._root_children = list(children)
+        return self._root_children
+
+    def branch_length(self, node):
+        """
+        Branch length of a surviving node, including the lengths that
+        collapsed ancestors hand down to it.
+        """
+        if node in self._branch_length:
+            return self._branch_length[node]
+        if node == self.clade:
+            return self.index.branch_length_of(node)
+        if not (self.root_collapsed and self._surviving_ancestor(node) == self.clade):
+            return self.collapsed_tree.branch_length[node]
+
+        # lengths handed down from collapsed nodes below the candidate
+        # root only; the root and its ancestors are not part of the clone
+        chain = [node]
+        parent = self.index.parent_of(node)
+        while parent != self.clade:
+            chain.append(parent)
+            parent = self.index.parent_of(parent)
+
+        length = self.index.branch_length_of(chain[-1])
+        for ancestor in reversed(chain[:-1]):
+            own_length = self.index.branch_length_of(ancestor)
+            if own_length is not None:
+                own_length += length or 0
+            length = own_length
+        return length
+
+
+def resolve_inparalogs(
+    view: SubtreeView,
+    tip_names: list,
+    taxon_ids: np.ndarray,
+    fasta_dict: dict,
+    inparalog_to_keep: InparalogToKeep,
+    inparalog_handling: dict,
+    report_inparalog_handling: bool,
+    seq_lengths: dict,
+):
+    """
+    trim species-specific inparalogs that are sister to one another,
+    following the approach in PhyloTreePruner
+
+    return the pruned tip names grouped per taxon, or None when the
+    duplicates of some taxon are not sister and the clade cannot be a
+    SNAP-OG
+    """
+    start, end = view.index.tip_span(view.clade)
+
+    pruned_groups = []
+    resolved = True
+    for dup_positions in group_duplicate_taxa(taxon_ids[start:end]):
+        dups = [start + idx for idx in dup_positions]
+
+        if not view.dups_are_sister(dups):
+            resolved = False
+            # the inparalog report also lists taxa resolved in clades
+            # that are ultimately rejected, so keep going when reporting
+            if not report_inparalog_handling:
+                return None
+            continue
+
+        # keep inparalog based on sequence length
+        lengths = dict()
+        if inparalog_to_keep.value in SEQ_LEN_STRATEGIES:
+            for dup in dups:
+                name = tip_names[dup]
+                if name not in seq_lengths:
+                    seq_lengths[name] = ungapped_length(fasta_dict[name])
+                lengths[name] = seq_lengths[name]
+        # keep inparalog based on tip to root length
+        else:
+            for dup in dups:
+                lengths[tip_names[dup]] = view.distance(dup)
+        seq_to_keep = select_inparalog_to_keep(lengths, inparalog_to_keep)
+
+        pruned_tips = []
+        for dup in dups:
+            if tip_names[dup] != seq_to_keep:
+                view.prune(dup)
+                pruned_tips.append(tip_names[dup])
+        pruned_groups.append(pruned_tips)
+        inparalog_handling[seq_to_keep] = pruned_tips
+
+    return pruned_groups if resolved else None
+
+
+def build_snap_tree(collapsed_tree: CollapsedTree, clade, pruned_groups: list):
+    """
+    clone a SNAP-OG clade as a collapsed and pruned Bio.Phylo tree, taking
+    the collapsed topology from the precomputed CollapsedTree
+    """
+    induced_subtrees = InducedSubtrees.from_view(SubtreeView(collapsed_tree, clade))
+    return induced_subtrees.prune([tip for group in pruned_groups for tip in group])
 
 
 def handle_multi_copy_subtree(
@@ -302,59 +698,48 @@ def handle_multi_copy_subtree(
     support: float,
     fasta_dict: dict,
     assigned_tips: set,
-    counts_of_taxa_from_terms,
+    subtree_cache: SubtreeTaxaCache,
     snap_trees: bool,
     inparalog_to_keep: InparalogToKeep,
     output_path: str,
     inparalog_handling: dict,
     inparalog_handling_summary: dict,
     report_inparalog_handling: bool,
-    delimiter: str,
     subgroup_records: list = None,
     write_outputs: bool = True,
+    collapsed_tree: CollapsedTree = None,
+    seq_lengths: dict = None,
 ):
     """
-    handling case where subtree contains all single copy genes
-    """
-    newtree = clone_subtree_as_tree(subtree)
-
-    # collapse bipartition with low support
-    newtree = collapse_low_support_bipartitions(newtree, support)
-    clade_terminal_sets = build_clade_terminal_set_index(newtree)
-
-    # remove duplicate sequences if they are sister to one another
-    # following the approach in PhyloTreePruner
-    for name in counts_of_taxa_from_terms:
-        # if the taxon is represented by more than one sequence
-        if counts_of_taxa_from_terms[name] > 1:
-            # get subtree tips
-            _, dups = get_subtree_tips(terms, name, delimiter)
-            if not dups:
-                continue
-
-            # check if subtrees are sister to one another
-            are_sisters = determine_if_dups_are_sister(
-                dups, clade_terminal_sets
-            )
+    handling case where subtree contains multi copy genes
 
-            # if duplicate sequences are sister, get the longest sequence
-            if are_sisters:
-                # trim short sequences and keep long sequences in newtree
-                newtree, terms, inparalog_handling, pruned_tips = \
-                    inparalog_to_keep_determination(
-                        newtree, fasta_dict, dups, terms,
-                        inparalog_to_keep, inparalog_handling
-                    )
-                clade_terminal_sets = update_clade_terminal_set_index_for_pruned_tips(
-                    clade_terminal_sets, pruned_tips
-                )
+    inparalogs are resolved on a read-only view of the collapsed subtree;
+    a tree is only cloned for SNAP-OGs written with --snap_trees
+    """
+    if collapsed_tree is None:
+        collapsed_tree = collapse_low_support_once(subtree_cache, subtree, support)
+    view = SubtreeView(collapsed_tree, subtree)
+    pruned_groups = resolve_inparalogs(
+        view,
+        subtree_cache.terms,
+        subtree_cache.taxon_ids,
+        fasta_dict,
+        inparalog_to_keep,
+        inparalog_handling,
+        report_inparalog_handling,
+        dict() if seq_lengths is None else seq_lengths,
+    )
 
     # if the resulting subtree has only single copy genes
     # create a fasta file with sequences from tip labels
-    _, _, _, counts = \
-        get_tips_and_taxa_names_and_taxa_counts_from_subtrees(newtree, delimiter)
+    if pruned_groups is not None:
+        pruned_tip_set = {tip for group in pruned_groups for tip in group}
+        terms = [term for term in terms if term not in pruned_tip_set]
+
+        newtree = None
+        if snap_trees and write_outputs:
+            newtree = build_snap_tree(collapsed_tree, subtree, pruned_groups)
 
-    if set(counts) == set([1]):
         (
             subgroup_counter,
             assigned_tips,
@@ -395,14 +780,20 @@ def handle_single_copy_subtree(
     report_inparalog_handling: bool,
     subgroup_records: list = None,
     write_outputs: bool = True,
+    collapsed_tree: CollapsedTree = None,
 ):
     """
     handling case where subtree contains all single copy genes
     """
-    newtree = clone_subtree_as_tree(subtree)
-
-    # collapse bipartition with low support
-    newtree = collapse_low_support_bipartitions(newtree, support)
+    # the collapsed tree is only needed for --snap_trees output
+    newtree = None
+    if snap_trees and write_outputs:
+        if collapsed_tree is None:
+            newtree = collapse_low_support_bipartitions(
+                clone_subtree_as_tree(subtree), support
+            )
+        else:
+            newtree = build_snap_tree(collapsed_tree, subtree, [])
 
     # add list of terms to assigned_tips list
     # and create subgroup fasta files
@@ -431,102 +822,266 @@ def handle_single_copy_subtree(
         inparalog_handling, inparalog_handling_summary
 
 
-def inparalog_to_keep_determination(
-    newtree,
-    fasta_dict: dict,
-    dups: list,
-    terms: list,
-    inparalog_to_keep: InparalogToKeep,
-    inparalog_handling: dict,
-):
+def _select_median_key(values: dict):
+    """Select deterministic median key by value, tie-broken by key."""
+    sorted_items = sorted(values.items(), key=lambda item: (item[1], item[0]))
+    return sorted_items[len(sorted_items) // 2][0]
+
+
+def select_inparalog_to_keep(lengths: dict, inparalog_to_keep: InparalogToKeep):
     """
-    remove_short_sequences_among_duplicates_that_are_sister
+    pick the inparalog to keep from a dict of sequence or tip-to-root lengths
     """
-    lengths = dict()
-    pruned_tips = []
-    def _select_median_key(values: dict):
-        """Select deterministic median key by value, tie-broken by key."""
-        sorted_items = sorted(values.items(), key=lambda item: (item[1], item[0]))
-        return sorted_items[len(sorted_items) // 2][0]
-
-    # keep inparalog based on sequence length
-    if inparalog_to_keep.value in [
-        "shortest_seq_len",
-        "median_seq_len",
-        "longest_seq_len",
-    ]:
-        for dup in dups:
-            lengths[dup] = len(re.sub("-", "", str(fasta_dict[dup].seq)))
-        # determine which sequences to keep
-        if inparalog_to_keep.value == "shortest_seq_len":
-            seq_to_keep = min(lengths, key=lengths.get)
-        elif len(lengths) > 2 and inparalog_to_keep.value == "median_seq_len":
-            seq_to_keep = _select_median_key(lengths)
-        elif len(lengths) == 2 and inparalog_to_keep.value == "median_seq_len":
-            seq_to_keep = max(lengths, key=lengths.get)
-        elif inparalog_to_keep.value == "longest_seq_len":
-            seq_to_keep = max(lengths, key=lengths.get)
-    # keep inparalog based on tip to root length
-    else:
-        for dup in dups:
-            lengths[dup] = TreeMixin.distance(newtree, dup)
-        if inparalog_to_keep.value == "shortest_branch_len":
-            seq_to_keep = min(lengths, key=lengths.get)
-        elif len(lengths) > 2 and \
-                inparalog_to_keep.value == "median_branch_len":
-            seq_to_keep = _select_median_key(lengths)
-        elif len(lengths) == 2 and \
-                inparalog_to_keep.value == "median_branch_len":
-            seq_to_keep = max(lengths, key=lengths.get)
-        elif inparalog_to_keep.value == "longest_branch_len":
-            seq_to_keep = max(lengths, key=lengths.get)
-
-    # trim unwanted species-specific
-    # paralogous sequences from the tree
-    for seq_name in lengths:
-        if seq_name != seq_to_keep:
-            pruned_tips.append(seq_name)
-
-    if pruned_tips:
-        terminal_lookup, parent_lookup = build_terminal_parent_maps(newtree)
-        for tip_name in pruned_tips:
-            prune_terminal_fast(newtree, tip_name, terminal_lookup, parent_lookup)
-        pruned_tip_set = set(pruned_tips)
-        terms = [term for term in terms if term not in pruned_tip_set]
-
-    inparalog_handling[seq_to_keep] = [dup for dup in dups if dup != seq_to_keep]
+    if inparalog_to_keep.value in ["shortest_seq_len", "shortest_branch_len"]:
+        seq_to_keep = min(lengths, key=lengths.get)
+    elif len(lengths) > 2 and \
+            inparalog_to_keep.value in ["median_seq_len", "median_branch_len"]:
+        seq_to_keep = _select_median_key(lengths)
+    elif len(lengths) == 2 and \
+            inparalog_to_keep.value in ["median_seq_len", "median_branch_len"]:
+        seq_to_keep = max(lengths, key=lengths.get)
+    elif inparalog_to_keep.value in ["longest_seq_len", "longest_branch_len"]:
+        seq_to_keep = max(lengths, key=lengths.get)
 
-    return newtree, terms, inparalog_handling, pruned_tips
+    return seq_to_keep
 
 
-def prune_subtree(all_tips: list, terms: list, newtree):
+class LoadedInputs:
     """
-    prune tips not of interest for subtree
+    Tree and FASTA of one run, parsed once and shared by validation,
+    argument processing and SNAP-OG extraction.
+
+    FASTA records and taxon statistics are read up front; the tree is
+    parsed on first use so a malformed Newick file is still reported by
+    input validation rather than while processing arguments.
     """
 
-    tips_to_prune = [
-        i for i in all_tips + terms if i not in all_tips or i not in terms
-    ]
+    def __init__(
+        self,
+        tree_path: str,
+        fasta_path: str,
+        delimiter: str,
+        records: list = None,
+        fasta_index: IndexedFasta = None,
+        fasta_output: str = "formatted",
+    ):
+        self.tree_path = tree_path
+        self.fasta_path = fasta_path
+        self.delimiter = delimiter
+        self.records = records
+        self.fasta_index = fasta_index
+        self.fasta_backend = "memory" if fasta_index is None else "indexed"
+        self.fasta_output = fasta_output
+        if fasta_index is None:
+            self.fasta_ids = [record.id for record in records]
+        else:
+            self.fasta_ids = fasta_index.ids
+        self.taxa = {
+            seq_id.split(delimiter, 1)[0] if delimiter in seq_id else seq_id
+            for seq_id in self.fasta_ids
+        }
+        self._tree = None
+        self._midpoint_rooted = False
+        self._flat_tree = None
+        self._flat_midpoint_rooted = False
+        self._fasta_dict = None
+        self._seq_lengths = None
+        self._fasta_positions = None
+
+    @property
+    def unique_taxa(self) -> int:
+        return len(self.taxa)
+
+    def close(self):
+        """release the memory-mapped FASTA of the indexed backend"""
+        if self.fasta_index is not None:
+            self.fasta_index.close()
+
+    def matches(
+        self,
+        tree_path: str,
+        fasta_path: str,
+        delimiter: str,
+        fasta_backend: str = "memory",
+        fasta_output: str = "formatted",
+    ) -> bool:
+        return (
+            self.tree_path == tree_path
+            and self.fasta_path == fasta_path
+            and self.delimiter == delimiter
+            and self.fasta_backend == fasta_backend
+            and self.fasta_output == fasta_output
+        )
+
+    def get_tree(self, rooted: bool = True):
+        """
+        parsed tree; midpoint rooted (once) unless the input is rooted
+
+        like get_flat_tree, the tree is kept in the sidecar index, which
+        later runs turn back into clades instead of parsing and rooting
+        the Newick file again
+        """
+        if self._tree is None:
+            indexed = read_phylo_tree_index(self.tree_path, not rooted)
+            if indexed is not None:
+                self._tree = indexed
+                self._midpoint_rooted = not rooted
+                return indexed
+            self._tree = Phylo.read(self.tree_path, "newick")
+            if rooted:
+                write_phylo_tree_index(self.tree_path, self._tree, False)
+        if not rooted and not self._midpoint_rooted:
+            root_at_midpoint(self._tree)
+            self._midpoint_rooted = True
+            write_phylo_tree_index(self.tree_path, self._tree, True)
+        return self._tree
+
+    def get_flat_tree(self, rooted: bool = True) -> FlatTree:
+        """
+        parsed tree as a FlatTree, read without building Bio.Phylo clades;
+        midpoint rooted (once) unless the input is rooted
+
+        the tree is kept in a sidecar index next to the tree file
+        (<tree>.orthosnap.treeidx) that later runs memory-map instead of
+        parsing and rooting it again
+        """
+        if self._flat_tree is None:
+            indexed = read_tree_index(self.tree_path, not rooted)
+            if indexed is not None:
+                self._flat_tree = indexed
+                self._flat_midpoint_rooted = not rooted
+                return indexed
+            self._flat_tree = read_flat_newick(self.tree_path)
+            if rooted:
+                write_tree_index(self.tree_path, self._flat_tree, False)
+        if not rooted and not self._flat_midpoint_rooted:
+            self._flat_tree = _midpoint_root_flat_tree(
+                self._flat_tree, self.tree_path
+            )
+            self._flat_midpoint_rooted = True
+            write_tree_index(self.tree_path, self._flat_tree, True)
+        return self._flat_tree
+
+    @property
+    def fasta_dict(self):
+        if self.fasta_index is not None:
+            return self.fasta_index
+        if self._fasta_dict is None:
+            self._fasta_dict = SeqIO.to_dict(self.records)
+        return self._fasta_dict
+
+    @property
+    def seq_lengths(self) -> dict:
+        if self._seq_lengths is None:
+            if self.fasta_index is None:
+                self._seq_lengths = ungapped_sequence_lengths(self.fasta_dict)
+            else:
+                # filled on demand, so only duplicated sequences are read
+                self._seq_lengths = _IndexedLengths(self.fasta_index)
+        return self._seq_lengths
 
-    for tip in tips_to_prune:
-        newtree.prune(tip)
+    @property
+    def fasta_positions(self) -> dict:
+        """position of every record id in the FASTA file"""
+        if self._fasta_positions is None:
+            self._fasta_positions = {
+                seq_id: position for position, seq_id in enumerate(self.fasta_ids)
+            }
+        return self._fasta_positions
 
-    return newtree
 
+class _IndexedLengths(dict):
+    """Ungapped lengths read from an IndexedFasta the first time asked."""
+
+    def __init__(self, fasta_index: IndexedFasta):
+        super().__init__()
+        self.fasta_index = fasta_index
+
+    def __contains__(self, name) -> bool:
+        return name in self.fasta_index
+
+    def __missing__(self, name) -> int:
+        length = self.fasta_index.ungapped_length(name)
+        self[name] = length
+        return length
+
+
+def load_inputs(
+    tree: str,
+    fasta: str,
+    delimiter: str,
+    fasta_backend: str = "memory",
+    fasta_output: str = "formatted",
+) -> LoadedInputs:
+    """
+    parse the FASTA file of a run once; the indexed backend only scans
+    headers and leaves sequences in the memory-mapped file
+
+    raw output copies record bytes by offset, so it needs the indexed
+    backend
+    """
+
+    if fasta_backend == "indexed" or fasta_output == "raw":
+        fasta_index = open_indexed_fasta(fasta, raw_output=fasta_output == "raw")
+        return LoadedInputs(
+            tree, fasta, delimiter, fasta_index=fasta_index, fasta_output=fasta_output
+        )
+    return LoadedInputs(tree, fasta, delimiter, list(SeqIO.parse(fasta, "fasta")))
 
-def read_input_files(tree: str, fasta: str, rooted: bool):
+
+def read_tree(tree, rooted: bool):
     """
-    read input files and midpoint root tree
+    read a tree file (path or text handle) and midpoint root it;
+    sequences are left to the caller, e.g., bootstrap replicates reuse
+    those already loaded
     """
 
     tree = Phylo.read(tree, "newick")
 
     if not rooted:
-        tree.root_at_midpoint()
+        root_at_midpoint(tree)
+
+    return tree
+
+
+def read_flat_tree(tree, rooted: bool) -> FlatTree:
+    """
+    read a tree file (path or seekable text handle) straight into a
+    FlatTree and midpoint root it
+    """
+
+    flat = read_flat_newick(tree)
+
+    if not rooted:
+        flat = _midpoint_root_flat_tree(flat, tree)
+
+    return flat
 
-    fasta = SeqIO.to_dict(SeqIO.parse(fasta, "fasta"))
 
-    return tree, fasta
+def _midpoint_root_flat_tree(flat: FlatTree, tree_path) -> FlatTree:
+    rooted_flat = flat_root_at_midpoint(flat)
+    if rooted_flat is None:
+        # trees only Bio.Phylo can root go through its clades
+        if not isinstance(tree_path, str):
+            tree_path.seek(0)
+        tree = Phylo.read(tree_path, "newick")
+        root_at_midpoint(tree)
+        rooted_flat = FlatTree.from_phylo(tree)
+    return rooted_flat
+
+
+def write_fasta_records(fasta_dict, names: list, output_file_name: str):
+    """
+    write the records of names to a FASTA file, copying the input bytes
+    verbatim when the indexed backend runs with raw output
+    """
+    if getattr(fasta_dict, "raw_output", False):
+        fasta_dict.copy_records(names, output_file_name)
+        return
+
+    with open(output_file_name, "w") as output_handle:
+        for name in names:
+            SeqIO.write(fasta_dict[name], output_handle, "fasta")
 
 
 def write_output_fasta_and_account_for_assigned_tips_single_copy_case(
@@ -553,9 +1108,7 @@ def write_output_fasta_and_account_for_assigned_tips_single_copy_case(
         output_file_name = (
             f"{output_path}/{fasta_path_stripped}.orthosnap.{subgroup_counter}.fa"
         )
-        with open(output_file_name, "w") as output_handle:
-            for term in terms:
-                SeqIO.write(fasta_dict[term], output_handle, "fasta")
+        write_fasta_records(fasta_dict, terms, output_file_name)
 
         if snap_tree:
             output_file_name = (
@@ -0,0 +1,251 @@
+from bisect import bisect_left
+from copy import copy
+
+import numpy as np
+from Bio.Phylo.BaseTree import Tree
+
+from .flat_tree import FlatTree
+
+
+class InducedSubtrees:
+    """
+    Subtrees of one rooted tree induced by subsets of its tips.
+
+    The tree is indexed once. Each subset then gives its induced (virtual)
+    tree: tips sorted in preorder plus the lowest common ancestors of
+    neighboring tips, i.e., O(k log n) for k tips on top of the nodes
+    spliced out of its edges. Subtrees look exactly as pruning the other
+    tips one at a time with Tree.prune leaves them: nodes left with one
+    child are spliced out in the order Tree.prune would splice them, so
+    merged branch lengths are summed in the same order, and supports,
+    names and other clade attributes are carried over. Trees with unary
+    nodes, where Tree.prune leaves empty clades behind, are pruned with
+    Tree.prune itself.
+    """
+
+    def __init__(self, index: FlatTree, branch_lengths: list, clades: list, tree=None):
+        self.index = index
+        # per-node lengths; may differ from the clades' own, e.g., after
+        # low-support bipartitions were collapsed
+        self.branch_lengths = branch_lengths
+        self.clades = clades
+        # source Tree whose attributes (e.g., rooted) subtrees keep
+        self.tree = tree
+
+        child_counts = np.bincount(index.parent[1:], minlength=index.size)
+        self.has_unary_nodes = bool((child_counts == 1).any())
+        self.tip_positions = dict()
+        for position, name in enumerate(index.tip_names()):
+            self.tip_positions.setdefault(name, []).append(position)
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Index a Bio.Phylo tree."""
+        index = FlatTree.from_phylo(tree)
+        return cls(
+            index,
+            [clade.branch_length for clade in index.clades],
+            index.clades,
+            tree,
+        )
+
+    @classmethod
+    def from_view(cls, view):
+        """
+        Index the candidate clade of a SubtreeView as its collapsed clone
+        would look, before any pruning.
+        """
+        parents = []
+        branch_lengths = []
+        clades = []
+        stack = [(view.root, -1)]
+        while stack:
+            node, parent_id = stack.pop()
+            clade = view.index.clade_of(node)
+            parents.append(parent_id)
+            branch_lengths.append(
+                clade.branch_length if parent_id == -1 else view.branch_length(node)
+            )
+            clades.append(clade)
+            for child in reversed(view.children(node)):
+                stack.append((child, len(parents) - 1))
+
+        index = FlatTree.from_preorder(
+            parents,
+            [np.nan] * len(parents),
+            [np.nan] * len(parents),
+            [clade.name for clade in clades],
+        )
+        return cls(index, branch_lengths, clades)
+
+    def subtree(self, tips) -> Tree:
+        """
+        Tree induced by tips, as left by pruning every other terminal in
+        preorder.
+        """
+        kept = self._positions(tips)
+        if self.has_unary_nodes or not kept:
+            subtree = self._clone(range(self.index.size))
+            keep_tips = set(tips)
+            for terminal in list(subtree.get_terminals()):
+                if terminal.name not in keep_tips:
+                    subtree.prune(terminal)
+            return subtree
+
+        tip_starts = self.index._tip_starts
+        tip_ends = self.index._tip_ends
+
+        def pruned_at(node, kept_child):
+            # the last terminal of node outside kept_child, in preorder
+            if tip_ends[node] > tip_ends[kept_child]:
+                return tip_ends[node] - 1
+            return tip_starts[kept_child] - 1
+
+        return self._induced(kept, pruned_at)
+
+    def prune(self, pruned_tips: list) -> Tree:
+        """
+        Tree left by pruning pruned_tips, one at a time and in order,
+        from a copy of the tree.
+        """
+        if not pruned_tips:
+            return self._clone(range(self.index.size))
+
+        pruned = self._positions(pruned_tips)
+        pruned_set = set(pruned)
+        kept = [
+            position
+            for position in range(len(self.index._tip_nodes))
+            if position not in pruned_set
+        ]
+        if self.has_unary_nodes or not kept:
+            subtree = self._clone(range(self.index.size))
+            terminals = {
+                terminal.name: terminal for terminal in subtree.get_terminals()
+            }
+            for name in pruned_tips:
+                subtree.prune(terminals[name])
+            return subtree
+
+        rank = dict()
+        for order, name in enumerate(pruned_tips):
+            for position in self.tip_positions[name]:
+                rank[position] = order
+        tip_starts = self.index._tip_starts
+        tip_ends = self.index._tip_ends
+
+        def pruned_at(node, kept_child):
+            # every terminal of node outside kept_child is pruned
+            return max(
+                rank[position]
+                for start, end in (
+                    (tip_starts[node], tip_starts[kept_child]),
+                    (tip_ends[kept_child], tip_ends[node]),
+                )
+                for position in pruned[
+                    bisect_left(pruned, start):bisect_left(pruned, end)
+                ]
+            )
+
+        return self._induced(kept, pruned_at)
+
+    def _positions(self, tips) -> list:
+        return sorted(
+            position
+            for name in set(tips)
+            for position in self.tip_positions.get(name, [])
+        )
+
+    def _induced(self, kept: list, pruned_at) -> Tree:
+        """
+        Build the virtual tree of the tip positions in kept; pruned_at
+        gives the pruning step at which a spliced node loses its last
+        child other than the one toward kept tips.
+        """
+        index = self.index
+        tip_nodes = index._tip_nodes
+        subtree_end = index._subtree_ends
+
+        # kept tips and the lowest common ancestors of neighboring ones
+        # are the nodes that keep two or more children
+        nodes = {tip_nodes[position] for position in kept}
+        for first, second in zip(kept[:-1], kept[1:]):
+            nodes.add(index.tip_lca(first, second))
+        nodes = sorted(nodes)
+
+        clones = dict()
+        virtual_root = nodes[0]
+        clones[virtual_root] = self._clone_node(
+            virtual_root, self._spliced_branch_length(virtual_root, -1, pruned_at)
+        )
+
+        stack = [virtual_root]
+        for node in nodes[1:]:
+            while node >= subtree_end[stack[-1]]:
+                stack.pop()
+            ancestor = stack[-1]
+            clone = self._clone_node(
+                node, self._spliced_branch_length(node, ancestor, pruned_at)
+            )
+            clones[ancestor].clades.append(clone)
+            clones[node] = clone
+            stack.append(node)
+
+        return self._as_tree(clones[virtual_root])
+
+    def _spliced_branch_length(self, node: int, ancestor: int, pruned_at):
+        """
+        Branch length of node once the nodes between it and ancestor (-1
+        for above the root) are spliced out. Tree.prune splices a node
+        once it has one child left and adds its current length to that
+        child's.
+        """
+        parents = self.index._parents
+        # bottom-up: node, then the nodes spliced out above it
+        members = [node]
+        spliced_at = [None]
+        parent = parents[node]
+        while parent != ancestor:
+            spliced_at.append(pruned_at(parent, members[-1]))
+            members.append(parent)
+            parent = parents[parent]
+
+        lengths = [self.branch_lengths[member] for member in members]
+        # every splice joins a segment to the one below it, whose lowest
+        # node carries the merged length
+        lowest = list(range(len(members)))
+        for position in sorted(range(1, len(members)), key=spliced_at.__getitem__):
+            below = position - 1
+            while lowest[below] != below:
+                below = lowest[below]
+            # point the walked segments straight at their lowest node
+            walked = position - 1
+            while lowest[walked] != below:
+                lowest[walked], walked = below, lowest[walked]
+            if lengths[below] is not None:
+                lengths[below] += lengths[position] or 0.0
+            lowest[position] = below
+        return lengths[0]
+
+    def _clone_node(self, node: int, branch_length):
+        clone = copy(self.clades[node])
+        clone.clades = []
+        clone.branch_length = branch_length
+        return clone
+
+    def _clone(self, nodes) -> Tree:
+        """Copy of the tree on the given nodes, all of them in preorder."""
+        parents = self.index._parents
+        clones = dict()
+        for node in nodes:
+            clones[node] = self._clone_node(node, self.branch_lengths[node])
+            if parents[node] != -1:
+                clones[parents[node]].clades.append(clones[node])
+        return self._as_tree(clones[0])
+
+    def _as_tree(self, root) -> Tree:
+        if self.tree is None:
+            return Tree(root=root)
+        subtree = copy(self.tree)
+        subtree.root = root
+        return subtree
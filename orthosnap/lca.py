@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class EulerTourLCA:
+    """
+    Constant-time lowest common ancestor queries on a rooted tree.
+
+    Nodes are numbered in preorder with the root at 0 and the tree is
+    given by its parent array. The Euler tour lists every node each time
+    the depth-first walk enters or returns to it; the LCA of u and v is
+    the shallowest node on the tour between their first visits, found
+    with a sparse table of range-minimum positions.
+    """
+
+    def __init__(self, parent):
+        parent = list(parent)
+        size = len(parent)
+
+        children = [[] for _ in range(size)]
+        for node in range(1, size):
+            children[parent[node]].append(node)
+
+        depth = [0] * size
+        first_visit = [0] * size
+        tour = []
+        stack = [(0, 0)]
+        while stack:
+            node, next_child = stack.pop()
+            if next_child == 0:
+                first_visit[node] = len(tour)
+            tour.append(node)
+            if next_child < len(children[node]):
+                child = children[node][next_child]
+                depth[child] = depth[node] + 1
+                stack.append((node, next_child + 1))
+                stack.append((child, 0))
+
+        self.first_visit = first_visit
+        self.tour = np.asarray(tour, dtype=np.int64)
+        self.tour_depth = np.asarray(depth, dtype=np.int64)[self.tour]
+
+        # levels[k][i] holds the tour position of the shallowest node in
+        # tour[i:i + 2**k]
+        positions = np.arange(len(tour), dtype=np.int64)
+        self.levels = [positions]
+        span = 1
+        while 2 * span <= len(tour):
+            previous = self.levels[-1]
+            left = previous[: len(previous) - span]
+            right = previous[span:]
+            self.levels.append(
+                np.where(
+                    self.tour_depth[left] <= self.tour_depth[right], left, right
+                )
+            )
+            span *= 2
+
+    def query(self, first: int, second: int) -> int:
+        """Return the lowest common ancestor of two node ids."""
+        start = self.first_visit[first]
+        end = self.first_visit[second]
+        if start > end:
+            start, end = end, start
+        level = (end - start + 1).bit_length() - 1
+        table = self.levels[level]
+        left = table[start]
+        right = table[end - (1 << level) + 1]
+        if self.tour_depth[right] < self.tour_depth[left]:
+            left = right
+        return int(self.tour[left])
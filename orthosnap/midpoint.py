@@ -0,0 +1,415 @@
+import math
+
+import numpy as np
+
+from .flat_tree import FlatTree
+
+
+def root_at_midpoint(tree):
+    """
+    Midpoint root tree in place.
+
+    Reproduces Bio.Phylo's Tree.root_at_midpoint exactly: the same pair of
+    most distant tips on ties, the same split of the midpoint branch and
+    the same order of clades afterwards. Bio.Phylo re-roots the tree on
+    every tip in turn to find the farthest pair; here the pair comes from
+    farthest-tip sweeps over an unrooted copy of the tree and the side
+    effects of those re-roots on clade order are replayed on adjacency
+    lists, so the tree itself is only rebuilt once.
+
+    The sweeps take linear time. Tips tied for the longest path are
+    re-scored with Bio.Phylo's summation order, sharing the depth sums of
+    the paths they have in common, so trees with many equal branch
+    lengths stay close to linear as well.
+
+    Trees Bio.Phylo handles with missing or negative branch lengths, or
+    where it would raise, are passed to Tree.root_at_midpoint unchanged.
+    """
+    midpoint = _UnrootedTree.from_phylo(tree)
+    if midpoint is None or not midpoint.find_midpoint():
+        tree.root_at_midpoint()
+        return
+    midpoint.apply(tree)
+
+
+def flat_root_at_midpoint(flat: FlatTree):
+    """
+    Midpoint rooted copy of a FlatTree, rooted exactly as root_at_midpoint
+    roots the same tree, or None when that needs Bio.Phylo's own method.
+    """
+    midpoint = _UnrootedTree.from_flat(flat)
+    if midpoint is None or not midpoint.find_midpoint():
+        return None
+    return midpoint.to_flat(flat)
+
+
+class _UnrootedTree:
+    """
+    Clades of a rooted tree as an unrooted graph.
+
+    Every node keeps its neighbors in one list whose first entry is its
+    parent under the current rooting, followed by its children in order.
+    Re-rooting Bio.Phylo clades on a target moves, on every node along
+    the path to the target, the neighbor toward the target to the front
+    of that list; a bifurcating root is dropped and its two branches
+    merged, as Tree.root_with_outgroup does.
+    """
+
+    def __init__(self, parent, lengths, tips, root_length, clades=None):
+        self.clades = clades
+        self.parent = parent
+        self.tips = tips
+        # depth the old root contributes to every Tree.depths() value
+        self.root_length = root_length
+
+        size = len(parent)
+        self.depth = [0] * size
+        for node in range(1, size):
+            self.depth[node] = self.depth[parent[node]] + 1
+
+        root_children = [node for node in range(1, size) if parent[node] == 0]
+        self.drop_root = len(root_children) == 2
+
+        # neighbor toward the original root and the length of that branch
+        self.up = list(parent)
+        self.up_length = list(lengths)
+        self.neighbors = [[] if node == 0 else [parent[node]] for node in range(size)]
+        for node in range(1, size):
+            self.neighbors[parent[node]].append(node)
+        if self.drop_root:
+            first, second = root_children
+            merged = lengths[first] + lengths[second]
+            self.up[first], self.up[second] = second, first
+            self.up_length[first] = self.up_length[second] = merged
+            self.neighbors[first][0] = second
+            self.neighbors[second][0] = first
+            self.neighbors[0] = []
+
+        self.position = None
+
+    @classmethod
+    def from_phylo(cls, tree):
+        """
+        Index the clades of tree in preorder, or return None when the
+        tree needs Bio.Phylo's own implementation.
+        """
+        root = tree.root
+        root_length = root.branch_length or 0
+        if len(root.clades) < 2 or not _usable_length(root_length):
+            return None
+
+        clades = []
+        parent = []
+        tips = []
+        stack = [(root, -1)]
+        while stack:
+            clade, parent_id = stack.pop()
+            node = len(clades)
+            if parent_id != -1 and not _usable_length(clade.branch_length):
+                return None
+            clades.append(clade)
+            parent.append(parent_id)
+            if not clade.clades:
+                tips.append(node)
+            for child in reversed(clade.clades):
+                stack.append((child, node))
+
+        return cls(
+            parent,
+            [clade.branch_length for clade in clades],
+            tips,
+            root_length,
+            clades,
+        )
+
+    @classmethod
+    def from_flat(cls, flat: FlatTree):
+        """As from_phylo, for a FlatTree (already numbered in preorder)."""
+        lengths = flat._branch_lengths
+        root_length = lengths[0] or 0
+        if len(flat.children(0)) < 2 or not _usable_length(root_length):
+            return None
+        if not all(_usable_length(length) for length in lengths[1:]):
+            return None
+        return cls(flat._parents, lengths, flat._tip_nodes, root_length)
+
+    def length(self, first: int, second: int):
+        if self.up[first] == second:
+            return self.up_length[first]
+        return self.up_length[second]
+
+    def path(self, start: int, end: int) -> list:
+        """Nodes from start to end, skipping a dropped root."""
+        head = [start]
+        tail = [end]
+        while head[-1] != tail[-1]:
+            if self.depth[head[-1]] >= self.depth[tail[-1]]:
+                head.append(self.parent[head[-1]])
+            else:
+                tail.append(self.parent[tail[-1]])
+        tail.pop()
+        nodes = head + tail[::-1]
+        if self.drop_root and 0 in nodes:
+            nodes.remove(0)
+        return nodes
+
+    def distances_from(self, source: int) -> list:
+        """Path lengths from source to every node."""
+        distances = [None] * len(self.parent)
+        distances[source] = 0.0
+        stack = [source]
+        while stack:
+            node = stack.pop()
+            for neighbor in self.neighbors[node]:
+                if distances[neighbor] is None:
+                    distances[neighbor] = distances[node] + self.length(
+                        node, neighbor
+                    )
+                    stack.append(neighbor)
+        return distances
+
+    def depths_from_tip(self, tip: int, ordered: bool = False):
+        """
+        Tree.depths() of the tree rooted on tip, accumulated in the same
+        order; with ordered, (node, depth) pairs in its preorder.
+        """
+        # the root added next to the tip has the old root's branch length
+        # and a zero-length branch to the tip
+        start = self.neighbors[tip][0]
+        start_depth = self.root_length + self.length(tip, start)
+        depths = [(None, self.root_length)]
+        stack = [(start, tip, start_depth)]
+        while stack:
+            node, previous, depth = stack.pop()
+            depths.append((node, depth))
+            children = self.neighbors[node]
+            if ordered:
+                # children of a node follow its parent in the list
+                children = children[1:]
+            for neighbor in reversed(children):
+                if neighbor != previous:
+                    stack.append(
+                        (neighbor, node, depth + self.length(node, neighbor))
+                    )
+        depths.append((tip, self.root_length + 0.0))
+        return depths
+
+    def farthest_depth(self, tip: int, farthest: dict) -> float:
+        """
+        max(Tree.depths().values()) of the tree rooted on tip, summed in
+        the same order as depths_from_tip.
+
+        The deepest depth behind a node only depends on the node, the
+        depth it is reached with and the neighbor it is reached from, so
+        farthest keeps, per (node, depth), the deepest depth behind each
+        neighbor. Tips whose paths meet with equal sums, as on trees with
+        tied branch lengths, share that work instead of each walking the
+        whole tree.
+        """
+        start = self.neighbors[tip][0]
+        start_depth = self.root_length + self.length(tip, start)
+        stack = [[tip, start, start_depth, None, None]]
+        # deepest depth behind the frame popped last, which the frame
+        # below it is waiting for
+        result = None
+        while stack:
+            frame = stack[-1]
+            previous, node, depth, waiting, unseen = frame
+            entry = farthest.get((node, depth))
+            if entry is None:
+                entry = farthest[(node, depth)] = (dict(), [])
+            behind, deepest = entry
+            if waiting is not None:
+                behind[waiting] = result
+                _keep_deepest(deepest, result, waiting)
+                frame[3] = None
+            if unseen is None:
+                # a node reached again from another side is not rescanned
+                missing = len(self.neighbors[node]) - len(behind)
+                if missing == 0 or (missing == 1 and previous not in behind):
+                    unseen = iter(())
+                else:
+                    unseen = iter(self.neighbors[node])
+                frame[4] = unseen
+            for neighbor in unseen:
+                if neighbor != previous and neighbor not in behind:
+                    frame[3] = neighbor
+                    stack.append(
+                        [node, neighbor, depth + self.length(node, neighbor), None, None]
+                    )
+                    break
+            else:
+                stack.pop()
+                # every neighbor but previous is in behind by now
+                result = next(
+                    (value for value, neighbor in deepest if neighbor != previous),
+                    depth,
+                )
+        return result
+
+    def reroot(self, target: int):
+        """
+        Replay the clade reordering of re-rooting from the current root
+        position to target.
+        """
+        if self.position is None:
+            nodes = self.path(0, target)
+        elif self.position == target:
+            return
+        else:
+            # the current root sits on the branch above a tip
+            nodes = self.path(self.position, target)[1:]
+        for node, toward in zip(nodes[:-1], nodes[1:]):
+            neighbors = self.neighbors[node]
+            neighbors.remove(toward)
+            neighbors.insert(0, toward)
+        self.position = target
+
+    def find_midpoint(self) -> bool:
+        """
+        Find the tips and branch Tree.root_at_midpoint would root on;
+        False when Bio.Phylo would fail or the tree needs it anyway.
+        """
+        tips = self.tips
+        # the farthest tip from any node is an end of a longest path, so
+        # two sweeps give both ends and every tip's eccentricity
+        first_end = _farthest_tip(self.distances_from(tips[0]), tips)
+        from_first = self.distances_from(first_end)
+        second_end = _farthest_tip(from_first, tips)
+        from_second = self.distances_from(second_end)
+        eccentricity = [max(from_first[tip], from_second[tip]) for tip in tips]
+        longest = max(eccentricity)
+        if not longest > 0:
+            return False
+
+        # Bio.Phylo sums branch lengths outward from each tip, so nearly
+        # tied tips are compared with its own sums
+        tolerance = 16 * (len(self.parent) + 2) * _EPSILON * (
+            longest + self.root_length
+        )
+        max_distance = 0.0
+        tip1 = None
+        farthest = dict()
+        for tip, value in zip(tips, eccentricity):
+            if value < longest - tolerance:
+                continue
+            distance = self.farthest_depth(tip, farthest)
+            if distance > max_distance:
+                tip1 = tip
+                max_distance = distance
+        if tip1 is None:
+            return False
+
+        tip2 = None
+        for tip in tips:
+            self.reroot(tip)
+            if tip == tip1:
+                # the first clade of greatest depth in preorder
+                tip2 = next(
+                    node
+                    for node, depth in self.depths_from_tip(tip, ordered=True)
+                    if depth == max_distance
+                )
+        if tip2 is None or tip2 == tip1:
+            return False
+        self.reroot(tip1)
+
+        root_remainder = 0.5 * (max_distance - self.root_length)
+        if not root_remainder >= 0:
+            return False
+        path = self.path(tip1, tip2)
+        for previous, node in zip(path[:-1], path[1:]):
+            root_remainder -= self.length(previous, node)
+            if root_remainder < 0:
+                break
+        else:
+            return False
+
+        self.tip1 = tip1
+        self.outgroup = node
+        self.above_outgroup = previous
+        self.outgroup_branch_length = -root_remainder
+        self.reroot(node)
+        return True
+
+    def _root_branch_lengths(self) -> tuple:
+        """Branch lengths of the two sides of the new root."""
+        outgroup_length = self.length(self.outgroup, self.above_outgroup) or 0.0
+        if self.above_outgroup == self.tip1:
+            # Tree.root_with_outgroup gives the tip back its whole branch
+            # when the midpoint falls on it
+            return outgroup_length, self.outgroup_branch_length
+        return (
+            outgroup_length - self.outgroup_branch_length,
+            self.outgroup_branch_length,
+        )
+
+    def apply(self, tree):
+        """Rebuild tree's clades rooted at the midpoint found."""
+        clades = self.clades
+        root_branch_length = tree.root.branch_length
+        for node in range(len(clades)):
+            if node == 0 and self.drop_root:
+                continue
+            neighbors = self.neighbors[node]
+            clade = clades[node]
+            clade.clades = [clades[child] for child in neighbors[1:]]
+            clade.branch_length = self.length(node, neighbors[0])
+
+        outgroup = clades[self.outgroup]
+        above = clades[self.above_outgroup]
+        above.branch_length, outgroup.branch_length = self._root_branch_lengths()
+
+        tree.root = tree.root.__class__(
+            branch_length=root_branch_length, clades=[above, outgroup]
+        )
+        tree.rooted = True
+
+    def to_flat(self, flat: FlatTree) -> FlatTree:
+        """FlatTree of flat rooted at the midpoint found, in preorder."""
+        above_length, outgroup_length = self._root_branch_lengths()
+        parent = [-1]
+        branch_lengths = [flat.branch_length[0]]
+        confidences = [np.nan]
+        names = [None]
+
+        stack = [(self.outgroup, 0), (self.above_outgroup, 0)]
+        while stack:
+            node, parent_id = stack.pop()
+            node_id = len(parent)
+            neighbors = self.neighbors[node]
+            parent.append(parent_id)
+            if node == self.above_outgroup:
+                branch_lengths.append(above_length)
+            elif node == self.outgroup:
+                branch_lengths.append(outgroup_length)
+            else:
+                branch_lengths.append(self.length(node, neighbors[0]))
+            confidences.append(flat.confidence[node])
+            names.append(flat.names[node])
+            for child in reversed(neighbors[1:]):
+                stack.append((child, node_id))
+
+        return FlatTree.from_preorder(parent, branch_lengths, confidences, names)
+
+
+_EPSILON = 2.0 ** -52
+
+
+def _usable_length(length) -> bool:
+    return (
+        isinstance(length, (int, float))
+        and math.isfinite(length)
+        and length >= 0
+    )
+
+
+def _keep_deepest(deepest: list, depth: float, neighbor: int):
+    """Keep the two deepest (depth, neighbor) pairs, deepest first."""
+    deepest.append((depth, neighbor))
+    deepest.sort(key=lambda pair: pair[0], reverse=True)
+    del deepest[2:]
+
+
+def _farthest_tip(distances: list, tips: list) -> int:
+    return max(tips, key=distances.__getitem__)
@@ -0,0 +1,277 @@
+import re
+from contextlib import nullcontext
+
+from Bio.Phylo.NewickIO import NewickError
+
+from .flat_tree import FlatTree
+
+_CHUNK_SIZE = 1 << 20
+
+# Bio.Phylo.NewickIO's token grammar, in its order, one group per kind
+_TOKENS = re.compile(
+    r"(\()"
+    r"|(\))"
+    r"|([^\s\(\)\[\]\'\:\;\,]+)"
+    r"|(\:\ ?[+-]?[0-9]*\.?[0-9]+(?:[eE][+-]?[0-9]+)?)"
+    r"|(\,)"
+    r"|(\[(?:\\.|[^\]])*\])"
+    r"|(\'(?:\\.|[^\'])*\')"
+    r"|(\;)"
+)
+(
+    _OPEN,
+    _CLOSE,
+    _LABEL,
+    _LENGTH,
+    _COMMA,
+    _COMMENT,
+    _QUOTED,
+    _SEMICOLON,
+) = range(1, 9)
+
+
+def read_flat_newick(path, chunk_size: int = _CHUNK_SIZE) -> FlatTree:
+    """
+    Parse the single tree of a Newick file (a path or an open text
+    handle) straight into a FlatTree.
+
+    The file is read in chunks and tokenized as it arrives; no Bio.Phylo
+    clades are built, and nesting depth is only bounded by memory. Names,
+    branch lengths and support values come out as Bio.Phylo.read would
+    give them (numeric internal labels become support values), so the
+    result matches FlatTree.from_phylo of the same file. Comments are
+    skipped, and the returned tree has no clades to hand out; callers
+    that need Clade objects read the file with Bio.Phylo instead.
+    """
+    builder = _FlatTreeBuilder()
+    tree = None
+    # trailing whitespace of the line read so far; Bio.Phylo strips it
+    # only once the line turns out to end there
+    pending = ""
+
+    with open(path) if isinstance(path, str) else nullcontext(path) as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), ""):
+            lines = chunk.split("\n")
+            for line_number, line in enumerate(lines):
+                line_end = line_number < len(lines) - 1
+                line = pending + line
+                content = line.rstrip()
+                pending = "" if line_end else line[len(content):]
+                builder.feed(content)
+                if line_end and builder.text_ends_tree():
+                    builder.finish()
+                    if tree is not None:
+                        _raise_multiple_trees()
+                    tree = builder
+                    builder = _FlatTreeBuilder()
+
+    if builder.started:
+        # the last tree may lack its terminal ';'
+        builder.finish()
+        if tree is not None:
+            _raise_multiple_trees()
+        tree = builder
+    if tree is None:
+        raise ValueError("There are no trees in this file.")
+
+    return tree.flat_tree()
+
+
+def iter_newick_trees(handle):
+    """
+    Yield the text of every tree in a multi-tree Newick stream, one at a
+    time. Trees are split as Bio.Phylo.NewickIO splits them: lines are
+    joined without trailing whitespace until one ends with ';'.
+    """
+    text = ""
+    for line in handle:
+        text += line.rstrip()
+        if text.endswith(";"):
+            yield text
+            text = ""
+    if text:
+        yield text
+
+
+def _raise_multiple_trees():
+    raise ValueError("There are multiple trees in this file; use parse() instead.")
+
+
+def _parse_confidence(text: str):
+    if text.isdigit():
+        return int(text)
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class _FlatTreeBuilder:
+    """
+    Node arrays grown token by token, following the clade construction of
+    Bio.Phylo.NewickIO.Parser. Nodes are numbered in creation order, which
+    is preorder unless the outer parentheses are missing, and a node joins
+    its parent's children when it is closed.
+    """
+
+    def __init__(self):
+        self.parent = [-1]
+        self.names = [None]
+        self.branch_lengths = [None]
+        # nodes in the order they were closed, i.e., attached to a parent
+        self.closed = []
+
+        self.root = 0
+        self.current = 0
+        self.open_count = 0
+        self.close_count = 0
+        self.after_semicolon = None
+        self.seen_semicolon = False
+
+        self.text = ""
+        self.position = 0
+        self.held = []
+        self.started = False
+        self.last_char = ""
+        # quoted labels and comments may hide any character, so their
+        # tree is only tokenized once its text is complete
+        self.streaming = True
+
+    def feed(self, content: str):
+        if not content:
+            return
+        self.started = True
+        self.last_char = content[-1]
+        if "'" in content or "[" in content:
+            self.streaming = False
+        if self.streaming:
+            self.text = self.text[self.position:] + content
+            self.position = 0
+            self._tokenize(final=False)
+        else:
+            self.held.append(content)
+
+    def text_ends_tree(self) -> bool:
+        return self.last_char == ";"
+
+    def _tokenize(self, final: bool):
+        text = self.text
+        end = len(text)
+        if not final:
+            # tokens never run across punctuation, so everything up to
+            # the last one tokenizes as it would in the complete text
+            end = max(text.rfind(mark) for mark in "(),;") + 1
+            if end <= self.position:
+                return
+        parent = self.parent
+        names = self.names
+        branch_lengths = self.branch_lengths
+        closed = self.closed
+        current = self.current
+
+        for match in _TOKENS.finditer(text, self.position, end):
+            if self.seen_semicolon:
+                if self.after_semicolon is None:
+                    self.after_semicolon = match.group()
+                continue
+
+            kind = match.lastindex
+            if kind == _LENGTH:
+                branch_lengths[current] = float(match.group()[1:])
+            elif kind == _LABEL:
+                names[current] = match.group()
+            elif kind == _COMMA:
+                if current == self.root:
+                    # no outer parentheses; a new root takes the tree
+                    self.root = len(parent)
+                    parent.append(-1)
+                    names.append(None)
+                    branch_lengths.append(None)
+                    parent[current] = self.root
+                closed.append(current)
+                parent.append(parent[current])
+                names.append(None)
+                branch_lengths.append(None)
+                current = len(parent) - 1
+            elif kind == _CLOSE:
+                if parent[current] == -1:
+                    raise NewickError("Parenthesis mismatch.")
+                closed.append(current)
+                current = parent[current]
+                self.close_count += 1
+            elif kind == _OPEN:
+                parent.append(current)
+                names.append(None)
+                branch_lengths.append(None)
+                current = len(parent) - 1
+                self.open_count += 1
+            elif kind == _QUOTED:
+                token = match.group()
+                if not names[current]:
+                    names[current] = token[1:-1]
+                else:
+                    # two adjacent quoted labels are an escaped quote
+                    names[current] += token[:-1]
+            elif kind == _SEMICOLON:
+                self.seen_semicolon = True
+
+        self.position = end
+        self.current = current
+
+    def finish(self):
+        self.text = self.text[self.position:] + "".join(self.held)
+        self.position = 0
+        self._tokenize(final=True)
+
+        if self.open_count != self.close_count:
+            raise NewickError(
+                f"Mismatch, {self.open_count} open vs "
+                f"{self.close_count} close parentheses."
+            )
+        if self.after_semicolon is not None:
+            raise NewickError(
+                f"Text after semicolon in Newick tree: {self.after_semicolon}"
+            )
+        if self.parent[self.current] != -1:
+            self.closed.append(self.current)
+
+    def flat_tree(self) -> FlatTree:
+        parent = self.parent
+        names = self.names
+
+        # numeric labels of internal nodes are support values
+        confidences = [None] * len(parent)
+        for node in set(parent[child] for child in self.closed):
+            name = names[node]
+            if name:
+                confidence = _parse_confidence(name)
+                if confidence is not None:
+                    confidences[node] = confidence
+                    names[node] = None
+
+        if self.root == 0:
+            return FlatTree.from_preorder(
+                parent, self.branch_lengths, confidences, names
+            )
+
+        # the root was created after its first child; renumber in preorder
+        children = [[] for _ in parent]
+        for node in self.closed:
+            children[parent[node]].append(node)
+        order = []
+        preorder_parent = []
+        stack = [(self.root, -1)]
+        while stack:
+            node, parent_id = stack.pop()
+            preorder_parent.append(parent_id)
+            node_id = len(order)
+            order.append(node)
+            for child in reversed(children[node]):
+                stack.append((child, node_id))
+
+        return FlatTree.from_preorder(
+            preorder_parent,
+            [self.branch_lengths[node] for node in order],
+            [confidences[node] for node in order],
+            [names[node] for node in order],
+        )
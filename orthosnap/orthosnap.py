@@ -1,43 +1,82 @@
 #!/usr/bin/env python
 
 import csv
+import gzip
 import hashlib
 import json
+import math
+import multiprocessing
 import os
 import re
 import sys
 import time
 from collections import Counter
-from copy import deepcopy
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from datetime import datetime, timezone
+from io import StringIO
+from itertools import product
 from pathlib import Path
 
+import numpy as np
 from Bio import Phylo
-from Bio import SeqIO
 from tqdm import tqdm
 
-from .args_processing import determine_occupancy_threshold, process_args
+from .args_processing import occupancy_threshold_for_taxa, process_args
+from .array_engine import ArrayTables, extract_subgroups_array
+from .fingerprint import FingerprintStore, input_digests
 from .helper import (
-    build_subtree_taxa_cache,
     check_if_single_copy,
     get_all_tips_and_taxa_names,
     handle_multi_copy_subtree,
     handle_single_copy_subtree,
-    read_input_files,
+    load_inputs,
+    read_flat_tree,
+    read_tree,
+    ungapped_sequence_lengths,
+    write_fasta_records,
+)
+from .helper import (
+    ExtractionTables,
+    InparalogToKeep,
+    LoadedInputs,
+    SEQ_LEN_STRATEGIES,
 )
-from .helper import InparalogToKeep
+from .induced_subtrees import InducedSubtrees
+from .newick import iter_newick_trees
 from .parser import create_parser
 from .plotter import plot_snap_ogs
+from .result_cache import ResultCache
 from .version import __version__
 from .writer import write_output_stats, write_user_args
 
 
-def _sha256(path: str) -> str:
-    digest = hashlib.sha256()
-    with open(path, "rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
+# bootstrap workers load their own inputs, so they need not be forked
+# from a parent that may be hashing inputs on a background thread
+_BOOTSTRAP_START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+
+def _start_input_digests(
+    tree: str, fasta: str, input_hash: str, store: FingerprintStore
+) -> Future:
+    """
+    Hash a run's inputs for provenance on a background thread, so reading
+    them overlaps extraction; hashlib releases the GIL while digesting.
+    """
+    pool = ThreadPoolExecutor(max_workers=1)
+    future = pool.submit(input_digests, tree, fasta, input_hash, store)
+    pool.shutdown(wait=False)
+    return future
 
 
 def _parse_bool(value, default=False):
@@ -48,27 +87,40 @@ def _parse_bool(value, default=False):
     return str(value).strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
-def _validate_inputs(tree_path: str, fasta_path: str, delimiter: str):
+def _validate_inputs(
+    tree_path: str,
+    fasta_path: str,
+    delimiter: str,
+    inputs: LoadedInputs = None,
+    flat_tree: bool = False,
+    rooted: bool = True,
+):
     errors = []
 
+    if inputs is None:
+        inputs = load_inputs(tree_path, fasta_path, delimiter)
+
     try:
-        tree = Phylo.read(tree_path, "newick")
+        # read as extraction uses it, so a sidecar index is reused
+        if flat_tree:
+            tip_names = inputs.get_flat_tree(rooted).tip_names()
+        else:
+            tip_names = [tip.name for tip in inputs.get_tree(rooted).get_terminals()]
     except Exception as exc:  # pragma: no cover - defensive
         return False, {"errors": [f"Failed to parse tree: {exc}"]}
 
-    fasta_records = list(SeqIO.parse(fasta_path, "fasta"))
-    if not fasta_records:
+    if not inputs.fasta_ids:
         errors.append("Input FASTA contains no sequences.")
 
-    fasta_ids = [record.id for record in fasta_records]
+    fasta_ids = inputs.fasta_ids
     duplicate_ids = [name for name, count in Counter(fasta_ids).items() if count > 1]
     if duplicate_ids:
         errors.append(
             "Duplicate FASTA IDs detected: " + ", ".join(sorted(duplicate_ids)[:10])
         )
 
-    tree_tips = [tip.name for tip in tree.get_terminals() if tip.name is not None]
-    missing_tree_names = ["<unnamed tip>"] if len(tree_tips) != len(tree.get_terminals()) else []
+    tree_tips = [name for name in tip_names if name is not None]
+    missing_tree_names = ["<unnamed tip>"] if len(tree_tips) != len(tip_names) else []
     if missing_tree_names:
         errors.append("Tree contains unnamed tips.")
 
@@ -98,14 +150,10 @@ def _validate_inputs(tree_path: str, fasta_path: str, delimiter: str):
             f"{len(missing_in_fasta)} tree tips are missing from FASTA headers."
         )
 
-    taxa = set()
-    for seq_id in fasta_ids:
-        taxa.add(seq_id.split(delimiter, 1)[0] if delimiter in seq_id else seq_id)
-
     summary = {
         "tree_tips": len(tree_tips),
         "fasta_sequences": len(fasta_ids),
-        "unique_taxa": len(taxa),
+        "unique_taxa": inputs.unique_taxa,
         "missing_in_tree": len(missing_in_tree),
         "missing_in_fasta": len(missing_in_fasta),
         "errors": errors,
@@ -123,6 +171,8 @@ def _write_structured_outputs(
     args_snapshot: dict,
     status: str = "completed",
     extra: dict = None,
+    input_hashes: dict = None,
+    input_hash: str = "sha256",
 ):
     fasta_path_stripped = re.sub("^.*/", "", fasta)
     prefix = f"{output_path}{fasta_path_stripped}.orthosnap"
@@ -155,6 +205,9 @@ def _write_structured_outputs(
                 ]
             )
 
+    if input_hashes is None:
+        input_hashes = input_digests(tree, fasta, input_hash, FingerprintStore.default())
+
     payload = {
         "status": status,
         "orthosnap_version": __version__,
@@ -164,8 +217,7 @@ def _write_structured_outputs(
         "input": {
             "tree": tree,
             "fasta": fasta,
-            "tree_sha256": _sha256(tree),
-            "fasta_sha256": _sha256(fasta),
+            **input_hashes,
         },
         "arguments": args_snapshot,
         "summary": {
@@ -197,7 +249,14 @@ def _extract_subgroups(
     report_inparalog_handling: bool,
     delimiter: str,
     write_outputs: bool,
+    engine: str = "legacy",
+    seq_lengths: dict = None,
+    tables: ExtractionTables = None,
 ):
+    """
+    tables, if given, are the ExtractionTables (ArrayTables for the array
+    engine) of tree and delimiter, shared with other runs on the tree
+    """
     taxa, all_tips = get_all_tips_and_taxa_names(tree, delimiter)
 
     if check_if_single_copy(taxa, all_tips):
@@ -207,70 +266,126 @@ def _extract_subgroups(
             "subgroup_records": [],
         }
 
+    # ungapped lengths are tabulated once rather than per duplicate
+    if seq_lengths is None and inparalog_to_keep.value in SEQ_LEN_STRATEGIES:
+        seq_lengths = ungapped_sequence_lengths(fasta_dict)
+
+    if engine == "array":
+        return extract_subgroups_array(
+            tree=tree,
+            fasta=fasta,
+            fasta_dict=fasta_dict,
+            support=support,
+            occupancy=occupancy,
+            snap_trees=snap_trees,
+            inparalog_to_keep=inparalog_to_keep,
+            output_path=output_path,
+            report_inparalog_handling=report_inparalog_handling,
+            delimiter=delimiter,
+            write_outputs=write_outputs,
+            seq_lengths=seq_lengths,
+            tables=tables,
+        )
+
+    if tables is None:
+        tables = ExtractionTables.from_tree(tree, delimiter)
+
     assigned_tips = set()
     subgroup_counter = 0
 
     inparalog_handling = dict()
     inparalog_handling_summary = dict()
     subgroup_records = []
-    subtree_cache = build_subtree_taxa_cache(tree, delimiter)
-
-    for inter in tqdm(tree.get_nonterminals()[1:]):
-        (
-            terms,
-            terms_set,
-            counts_of_taxa_from_terms,
-            counts,
-        ) = subtree_cache[inter]
-
-        if len(counts_of_taxa_from_terms) >= occupancy:
-            if set([1]) == set(counts) and assigned_tips.isdisjoint(terms_set):
-                (
-                    subgroup_counter,
-                    assigned_tips,
-                    inparalog_handling,
-                    inparalog_handling_summary,
-                ) = handle_single_copy_subtree(
-                    inter,
-                    terms,
-                    subgroup_counter,
-                    fasta,
-                    support,
-                    fasta_dict,
-                    assigned_tips,
-                    snap_trees,
-                    output_path,
-                    inparalog_handling,
-                    inparalog_handling_summary,
-                    report_inparalog_handling,
-                    subgroup_records,
-                    write_outputs,
-                )
-            elif assigned_tips.isdisjoint(terms_set):
-                (
-                    subgroup_counter,
-                    assigned_tips,
-                    inparalog_handling,
-                    inparalog_handling_summary,
-                ) = handle_multi_copy_subtree(
-                    inter,
-                    terms,
-                    subgroup_counter,
-                    fasta,
-                    support,
-                    fasta_dict,
-                    assigned_tips,
-                    counts_of_taxa_from_terms,
-                    snap_trees,
-                    inparalog_to_keep,
-                    output_path,
-                    inparalog_handling,
-                    inparalog_handling_summary,
-                    report_inparalog_handling,
-                    delimiter,
-                    subgroup_records,
-                    write_outputs,
-                )
+    subtree_cache = tables.index
+    # assigned tips flagged by their depth-first tip position, so
+    # disjointness checks are range scans rather than set operations
+    assigned_flags = bytearray(len(subtree_cache.terms))
+    # low-support bipartitions are collapsed once for the whole tree and
+    # shared by every candidate clade
+    collapsed_tree = tables.collapsed(support)
+
+    # explicit preorder stack, so the subtree of an emitted clade whose
+    # tips are now all assigned can be dropped without visiting it
+    progress = tqdm(total=subtree_cache.internal_counts[tree.root] - 1)
+    stack = [clade for clade in reversed(tree.root.clades) if not clade.is_terminal()]
+    while stack:
+        inter = stack.pop()
+        progress.update()
+        children_start = len(stack)
+        stack.extend(
+            child for child in reversed(inter.clades) if not child.is_terminal()
+        )
+
+        if not subtree_cache.is_disjoint(inter, assigned_flags):
+            continue
+        taxon_counts = subtree_cache.get_taxon_counts(inter)
+        if np.count_nonzero(taxon_counts) < occupancy:
+            continue
+
+        terms = subtree_cache.get_terms(inter)
+        previous_counter = subgroup_counter
+
+        if taxon_counts.max() == 1:
+            (
+                subgroup_counter,
+                assigned_tips,
+                inparalog_handling,
+                inparalog_handling_summary,
+            ) = handle_single_copy_subtree(
+                inter,
+                terms,
+                subgroup_counter,
+                fasta,
+                support,
+                fasta_dict,
+                assigned_tips,
+                snap_trees,
+                output_path,
+                inparalog_handling,
+                inparalog_handling_summary,
+                report_inparalog_handling,
+                subgroup_records,
+                write_outputs,
+                collapsed_tree,
+            )
+        else:
+            (
+                subgroup_counter,
+                assigned_tips,
+                inparalog_handling,
+                inparalog_handling_summary,
+            ) = handle_multi_copy_subtree(
+                inter,
+                terms,
+                subgroup_counter,
+                fasta,
+                support,
+                fasta_dict,
+                assigned_tips,
+                subtree_cache,
+                snap_trees,
+                inparalog_to_keep,
+                output_path,
+                inparalog_handling,
+                inparalog_handling_summary,
+                report_inparalog_handling,
+                subgroup_records,
+                write_outputs,
+                collapsed_tree,
+                seq_lengths,
+            )
+
+        if subgroup_counter != previous_counter:
+            emitted_tips = subgroup_records[-1]["tips"]
+            for tip in emitted_tips:
+                assigned_flags[subtree_cache.tip_positions[tip]] = 1
+            # pruned inparalogs stay unassigned, so only skip the subtree
+            # when every one of its tips was emitted
+            if len(emitted_tips) == len(terms):
+                del stack[children_start:]
+                progress.update(subtree_cache.internal_counts[inter] - 1)
+
+    progress.close()
 
     return {
         "single_copy": False,
@@ -279,15 +394,134 @@ def _extract_subgroups(
     }
 
 
-def _load_bootstrap_trees(bootstrap_tree_file: str):
-    trees = []
-    with open(bootstrap_tree_file, "r") as handle:
+def _open_bootstrap_trees(bootstrap_tree_file: str):
+    with open(bootstrap_tree_file, "rb") as handle:
+        magic = handle.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(bootstrap_tree_file, "rt")
+    return open(bootstrap_tree_file, "r")
+
+
+def _bootstrap_trees_format(bootstrap_tree_file: str) -> str:
+    """
+    "newick" when the file (optionally gzip-compressed) holds the
+    replicate trees themselves, "paths" when it lists tree files
+    """
+    with _open_bootstrap_trees(bootstrap_tree_file) as handle:
         for line in handle:
             value = line.strip()
             if not value or value.startswith("#"):
                 continue
-            trees.append(value)
-    return trees
+            if value.startswith("(") or value.endswith(";"):
+                return "newick"
+            return "paths"
+    return "paths"
+
+
+def _load_bootstrap_trees(bootstrap_tree_file: str, tree_format: str = "paths"):
+    """
+    Yield replicates one at a time: tree file paths, or the Newick text
+    of each tree of a multi-tree file, so replicates are never all held
+    in memory.
+    """
+    with _open_bootstrap_trees(bootstrap_tree_file) as handle:
+        if tree_format == "newick":
+            yield from iter_newick_trees(handle)
+            return
+        for line in handle:
+            value = line.strip()
+            if not value or value.startswith("#"):
+                continue
+            yield value
+
+
+def _bootstrap_replicate_signatures(
+    inputs: LoadedInputs, replicate: str, settings: dict
+) -> set:
+    """
+    Subgroups of one bootstrap replicate (a tree path, or Newick text for
+    multi-tree input) as signatures: sorted tuples of FASTA record
+    indices, or of tip names when a tip is not in the FASTA.
+    """
+    source = replicate
+    if settings["tree_format"] == "newick":
+        source = StringIO(replicate)
+    if settings["engine"] == "array":
+        tree_obj = read_flat_tree(source, settings["rooted"])
+    else:
+        tree_obj = read_tree(source, settings["rooted"])
+    seq_lengths = None
+    if settings["inparalog_to_keep"].value in SEQ_LEN_STRATEGIES:
+        seq_lengths = inputs.seq_lengths
+    extraction = _extract_subgroups(
+        tree=tree_obj,
+        fasta=settings["fasta"],
+        fasta_dict=inputs.fasta_dict,
+        support=settings["support"],
+        occupancy=settings["occupancy"],
+        snap_trees=False,
+        inparalog_to_keep=settings["inparalog_to_keep"],
+        output_path=settings["output_path"],
+        report_inparalog_handling=False,
+        delimiter=settings["delimiter"],
+        write_outputs=False,
+        engine=settings["engine"],
+        seq_lengths=seq_lengths,
+    )
+
+    positions = inputs.fasta_positions
+    signatures = set()
+    for record in extraction["subgroup_records"]:
+        tips = record["tips"]
+        if all(tip in positions for tip in tips):
+            signatures.add(tuple(sorted({positions[tip] for tip in tips})))
+        else:
+            signatures.add(tuple(sorted(set(tips))))
+    return signatures
+
+
+def _decode_subgroup_signatures(signature_counts: Counter, fasta_ids: list) -> Counter:
+    """Replicate counts keyed by the frozenset of tip names of each subgroup."""
+    support_counts = Counter()
+    for signature, count in signature_counts.items():
+        if signature and isinstance(signature[0], int):
+            support_counts[frozenset(fasta_ids[index] for index in signature)] += count
+        else:
+            support_counts[frozenset(signature)] += count
+    return support_counts
+
+
+# inputs of the consensus run, loaded once in every bootstrap worker
+_bootstrap_worker_inputs = None
+# inputs, tree and tables of a sweep, loaded once in every sweep worker
+_sweep_worker_state = None
+
+
+def _init_bootstrap_worker(tree: str, fasta: str, delimiter: str, fasta_backend: str):
+    global _bootstrap_worker_inputs
+    _bootstrap_worker_inputs = load_inputs(tree, fasta, delimiter, fasta_backend)
+
+
+def _bootstrap_worker_signatures(replicate: str, settings: dict) -> set:
+    return _bootstrap_replicate_signatures(
+        _bootstrap_worker_inputs, replicate, settings
+    )
+
+
+def _map_bootstrap_replicates(pool, replicates, settings: dict, window: int):
+    """
+    Yield the signatures of every replicate, in completion order, with
+    at most window replicates submitted to pool at any time.
+    """
+    pending = set()
+    for replicate in replicates:
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(pool.submit(_bootstrap_worker_signatures, replicate, settings))
+    for future in as_completed(pending):
+        yield future.result()
 
 
 def _write_consensus_outputs(
@@ -310,6 +544,7 @@ def _write_consensus_outputs(
     )
 
     emitted = 0
+    induced_subtrees = None
     with open(tsv_path, "w", newline="") as handle:
         writer = csv.writer(handle, delimiter="\t")
         writer.writerow(["consensus_id", "count", "frequency", "tip_count", "taxa_count", "tips"])
@@ -325,25 +560,113 @@ def _write_consensus_outputs(
             writer.writerow([consensus_id, count, round(frequency, 6), len(tips), taxa_count, ";".join(tips)])
 
             fasta_out = f"{output_path}{fasta_path_stripped}.orthosnap.{consensus_id}.fa"
-            with open(fasta_out, "w") as out_handle:
-                for tip in tips:
-                    if tip in fasta_dict:
-                        SeqIO.write(fasta_dict[tip], out_handle, "fasta")
+            write_fasta_records(
+                fasta_dict, [tip for tip in tips if tip in fasta_dict], fasta_out
+            )
             if consensus_trees:
-                reference_tree = Phylo.read(reference_tree_path, "newick")
-                if not rooted:
-                    reference_tree.root_at_midpoint()
-                pruned_tree = deepcopy(reference_tree)
-                keep_tips = set(tips)
-                for terminal in list(pruned_tree.get_terminals()):
-                    if terminal.name not in keep_tips:
-                        pruned_tree.prune(terminal)
+                if induced_subtrees is None:
+                    # the reference is parsed and rooted once per run
+                    induced_subtrees = InducedSubtrees.from_tree(
+                        read_tree(reference_tree_path, rooted)
+                    )
+                pruned_tree = induced_subtrees.subtree(tips)
                 tree_out = f"{output_path}{fasta_path_stripped}.orthosnap.{consensus_id}.tre"
                 Phylo.write(pruned_tree, tree_out, "newick")
 
     return tsv_path, emitted
 
 
+def _result_cache_parameters(
+    support: float,
+    occupancy: float,
+    rooted: bool,
+    snap_trees: bool,
+    inparalog_to_keep: InparalogToKeep,
+    report_inparalog_handling: bool,
+    delimiter: str,
+) -> dict:
+    """
+    Arguments that change which SNAP-OGs are found or what they hold;
+    the engine does not, as both write identical outputs.
+    """
+    return {
+        "support": support,
+        "occupancy": occupancy,
+        "rooted": rooted,
+        "snap_trees": snap_trees,
+        "inparalog_to_keep": inparalog_to_keep.value,
+        "report_inparalog_handling": report_inparalog_handling,
+        "delimiter": delimiter,
+    }
+
+
+def _result_cache_entry(
+    fasta: str,
+    output_path: str,
+    subgroup_counter: int,
+    subgroup_records: list,
+    snap_trees: bool,
+    report_inparalog_handling: bool,
+) -> dict:
+    """
+    Collect what a run wrote besides subgroup FASTA files. Report rows
+    are stored by subgroup number, so entries do not depend on file names.
+    """
+    fasta_path_stripped = re.sub("^.*/", "", fasta)
+    prefix = f"{output_path}{fasta_path_stripped}.orthosnap"
+
+    snap_tree_texts = []
+    if snap_trees:
+        for record in subgroup_records:
+            with open(f"{prefix}.{record['subgroup_id']}.tre", "r") as handle:
+                snap_tree_texts.append(handle.read())
+
+    report_rows = []
+    if report_inparalog_handling:
+        report_path = f"{output_path}{fasta_path_stripped}.inparalog_report.txt"
+        if os.path.isfile(report_path):
+            with open(report_path, "r") as handle:
+                for line in handle:
+                    name, kept, trimmed = line.rstrip("\n").split("\t")
+                    report_rows.append(
+                        [int(name.rsplit(".", 1)[1]), kept, trimmed]
+                    )
+
+    return {
+        "subgroup_counter": subgroup_counter,
+        "subgroup_records": subgroup_records,
+        "snap_trees": snap_tree_texts,
+        "inparalog_report": report_rows,
+    }
+
+
+def _restore_result_cache_entry(
+    entry: dict,
+    fasta: str,
+    fasta_dict: dict,
+    output_path: str,
+):
+    """Rewrite the outputs of a cached run from its entry and the FASTA file."""
+    fasta_path_stripped = re.sub("^.*/", "", fasta)
+    prefix = f"{output_path}{fasta_path_stripped}.orthosnap"
+
+    for record in entry["subgroup_records"]:
+        write_fasta_records(
+            fasta_dict, record["tips"], f"{prefix}.{record['subgroup_id']}.fa"
+        )
+    for record, text in zip(entry["subgroup_records"], entry["snap_trees"]):
+        with open(f"{prefix}.{record['subgroup_id']}.tre", "w") as handle:
+            handle.write(text)
+    if entry["inparalog_report"]:
+        report_path = f"{output_path}{fasta_path_stripped}.inparalog_report.txt"
+        with open(report_path, "w") as handle:
+            for subgroup_id, kept, trimmed in entry["inparalog_report"]:
+                handle.write(
+                    f"{fasta_path_stripped}.orthosnap.{subgroup_id}"
+                    f"\t{kept}\t{trimmed}\n"
+                )
+
+
 def execute(
     tree: str,
     fasta: str,
@@ -367,6 +690,14 @@ def execute(
     consensus_min_frequency: float = 0.5,
     consensus_trees: bool = False,
     total_taxa: int = None,
+    engine: str = "legacy",
+    fasta_backend: str = "memory",
+    fasta_output: str = "formatted",
+    inputs: LoadedInputs = None,
+    jobs: int = 1,
+    cache_dir: str = None,
+    cache_max_size: int = 1024,
+    input_hash: str = "sha256",
 ):
     """
     Master execute Function
@@ -378,7 +709,25 @@ def execute(
 
     os.makedirs(output_path, exist_ok=True)
 
-    valid, validation_summary = _validate_inputs(tree, fasta, delimiter)
+    # input digests are looked up by file identity before rehashing
+    fingerprint_store = FingerprintStore.default(cache_dir)
+
+    # inputs loaded while processing arguments are reused; anything else
+    # is parsed here, once, for validation and extraction alike
+    if fasta_output == "raw":
+        fasta_backend = "indexed"
+    if inputs is None or not inputs.matches(
+        tree, fasta, delimiter, fasta_backend, fasta_output
+    ):
+        inputs = load_inputs(tree, fasta, delimiter, fasta_backend, fasta_output)
+
+    # the array engine reads trees straight into flat arrays unless
+    # SNAP-OG trees or the plot need Bio.Phylo clades
+    flat_tree = engine == "array" and not snap_trees and not plot_snap_ogs_output
+
+    valid, validation_summary = _validate_inputs(
+        tree, fasta, delimiter, inputs, flat_tree, rooted
+    )
     if not valid:
         print("Input validation failed:")
         for error in validation_summary["errors"]:
@@ -407,6 +756,7 @@ def execute(
                 },
                 status="validation_failed",
                 extra={"validation": validation_summary},
+                input_hashes=input_digests(tree, fasta, input_hash, fingerprint_store),
             )
         sys.exit(1)
 
@@ -474,31 +824,50 @@ def execute(
     start_time = time.time()
 
     if bootstrap_trees:
-        tree_paths = _load_bootstrap_trees(bootstrap_trees)
-        if not tree_paths:
-            print("No bootstrap tree paths were provided.")
-            sys.exit(1)
+        digests = None
+        if structured_output:
+            digests = _start_input_digests(tree, fasta, input_hash, fingerprint_store)
+        tree_format = _bootstrap_trees_format(bootstrap_trees)
+        replicates = _load_bootstrap_trees(bootstrap_trees, tree_format)
 
-        fasta_dict = SeqIO.to_dict(SeqIO.parse(fasta, "fasta"))
+        fasta_dict = inputs.fasta_dict
+        settings = dict(
+            fasta=fasta,
+            support=support,
+            occupancy=occupancy,
+            inparalog_to_keep=inparalog_to_keep,
+            rooted=rooted,
+            output_path=output_path,
+            delimiter=delimiter,
+            engine=engine,
+            tree_format=tree_format,
+        )
         support_counts = Counter()
-        for tree_path in tree_paths:
-            tree_obj, _ = read_input_files(tree_path, fasta, rooted)
-            extraction = _extract_subgroups(
-                tree=tree_obj,
-                fasta=fasta,
-                fasta_dict=fasta_dict,
-                support=support,
-                occupancy=occupancy,
-                snap_trees=False,
-                inparalog_to_keep=inparalog_to_keep,
-                output_path=output_path,
-                report_inparalog_handling=False,
-                delimiter=delimiter,
-                write_outputs=False,
-            )
-            subgroup_sets = {frozenset(record["tips"]) for record in extraction["subgroup_records"]}
-            for subgroup in subgroup_sets:
-                support_counts[subgroup] += 1
+        replicate_count = 0
+        if jobs <= 1:
+            for replicate in replicates:
+                support_counts.update(
+                    _bootstrap_replicate_signatures(inputs, replicate, settings)
+                )
+                replicate_count += 1
+        else:
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=multiprocessing.get_context(_BOOTSTRAP_START_METHOD),
+                initializer=_init_bootstrap_worker,
+                initargs=(tree, fasta, delimiter, inputs.fasta_backend),
+            ) as pool:
+                for signatures in _map_bootstrap_replicates(
+                    pool, replicates, settings, window=jobs * 4
+                ):
+                    support_counts.update(signatures)
+                    replicate_count += 1
+        if not replicate_count:
+            print("No bootstrap trees were provided.")
+            sys.exit(1)
+        support_counts = _decode_subgroup_signatures(
+            support_counts, inputs.fasta_ids
+        )
 
         consensus_tsv, emitted = _write_consensus_outputs(
             fasta=fasta,
@@ -506,7 +875,7 @@ def execute(
             output_path=output_path,
             delimiter=delimiter,
             support_counts=support_counts,
-            num_trees=len(tree_paths),
+            num_trees=replicate_count,
             min_frequency=consensus_min_frequency,
             consensus_trees=consensus_trees,
             reference_tree_path=tree,
@@ -536,13 +905,19 @@ def execute(
                     "bootstrap_trees": bootstrap_trees,
                     "consensus_min_frequency": consensus_min_frequency,
                     "consensus_trees": consensus_trees,
+                    "engine": engine,
+                    "fasta_backend": fasta_backend,
+                    "fasta_output": fasta_output,
+                    "input_hash": input_hash,
                 },
                 status="completed",
                 extra={
                     "consensus_tsv": consensus_tsv,
                     "consensus_groups_emitted": emitted,
-                    "bootstrap_tree_count": len(tree_paths),
+                    "bootstrap_tree_count": replicate_count,
+                    "bootstrap_trees_format": tree_format,
                 },
+                input_hashes=digests.result(),
             )
 
         return {
@@ -551,27 +926,90 @@ def execute(
             "subgroup_records": [],
         }
 
-    tree_obj, fasta_dict = read_input_files(tree, fasta, rooted)
+    fasta_dict = inputs.fasta_dict
+
+    # a cached run for the same inputs and parameters gives back its
+    # subgroups without extraction; only its output files are rewritten
+    result_cache = None
+    cache_key = None
+    cache_entry = None
+    input_hashes = None
+    if cache_dir:
+        result_cache = ResultCache(cache_dir, cache_max_size * 1024 * 1024)
+        # cache keys always use full SHA-256, whatever --input-hash says
+        input_hashes = input_digests(tree, fasta, "sha256", fingerprint_store)
+        cache_key = ResultCache.key(
+            input_hashes["tree_sha256"],
+            input_hashes["fasta_sha256"],
+            _result_cache_parameters(
+                support,
+                occupancy,
+                rooted,
+                snap_trees,
+                inparalog_to_keep,
+                report_inparalog_handling,
+                delimiter,
+            ),
+        )
+        cache_entry = result_cache.get(cache_key)
 
-    extraction = _extract_subgroups(
-        tree=tree_obj,
-        fasta=fasta,
-        fasta_dict=fasta_dict,
-        support=support,
-        occupancy=occupancy,
-        snap_trees=snap_trees,
-        inparalog_to_keep=inparalog_to_keep,
-        output_path=output_path,
-        report_inparalog_handling=report_inparalog_handling,
-        delimiter=delimiter,
-        write_outputs=True,
-    )
+    digests = None
+    if structured_output and (input_hashes is None or input_hash != "sha256"):
+        digests = _start_input_digests(tree, fasta, input_hash, fingerprint_store)
+
+    tree_obj = None
+    if cache_entry is not None:
+        print(f"Result cache hit: {cache_key}; restoring subgroups without extraction.")
+        _restore_result_cache_entry(cache_entry, fasta, fasta_dict, output_path)
+        extraction = cache_entry
+    else:
+        if flat_tree:
+            tree_obj = inputs.get_flat_tree(rooted)
+        else:
+            tree_obj = inputs.get_tree(rooted)
+        extraction = _extract_subgroups(
+            tree=tree_obj,
+            fasta=fasta,
+            fasta_dict=fasta_dict,
+            support=support,
+            occupancy=occupancy,
+            snap_trees=snap_trees,
+            inparalog_to_keep=inparalog_to_keep,
+            output_path=output_path,
+            report_inparalog_handling=report_inparalog_handling,
+            delimiter=delimiter,
+            write_outputs=True,
+            engine=engine,
+            seq_lengths=(
+                inputs.seq_lengths
+                if inparalog_to_keep.value in SEQ_LEN_STRATEGIES
+                else None
+            ),
+        )
 
     subgroup_counter = extraction["subgroup_counter"]
     subgroup_records = extraction["subgroup_records"]
 
+    # already single-copy inputs are cheap to recognize and are not stored
+    if cache_entry is None and result_cache is not None and not extraction.get(
+        "single_copy"
+    ):
+        result_cache.put(
+            cache_key,
+            _result_cache_entry(
+                fasta,
+                output_path,
+                subgroup_counter,
+                subgroup_records,
+                snap_trees,
+                report_inparalog_handling,
+            ),
+        )
+
     plot_file = None
     if plot_snap_ogs_output and subgroup_counter > 0:
+        if tree_obj is None:
+            tree_obj = inputs.get_tree(rooted)
         plot_file = plot_snap_ogs(
             tree=tree_obj,
             subgroup_records=subgroup_records,
@@ -614,7 +1052,18 @@ def execute(
                 "plot_snap_ogs_output": plot_snap_ogs_output,
                 "plot_format": plot_format,
                 "total_taxa": total_taxa,
+                "engine": engine,
+                "fasta_backend": fasta_backend,
+                "fasta_output": fasta_output,
+                "cache_dir": cache_dir,
+                "input_hash": input_hash,
             },
+            extra=(
+                {"result_cache": "hit" if cache_entry is not None else "miss"}
+                if result_cache is not None
+                else None
+            ),
+            input_hashes=digests.result() if digests is not None else input_hashes,
         )
 
     return {
@@ -636,90 +1085,204 @@ def _coerce_int(value, fallback):
     return int(value)
 
 
+_MANIFEST_SUMMARY_FIELDS = [
+    "row",
+    "tree",
+    "fasta",
+    "status",
+    "subgroup_count",
+    "output_path",
+    "estimated_cost",
+    "actual_seconds",
+    "error",
+]
+
+
+def _manifest_run_config(config: dict, row: dict, output_root: str) -> dict:
+    run_output_path = row.get("output_path") or output_root
+    if not run_output_path.endswith("/"):
+        run_output_path += "/"
+
+    if row.get("id"):
+        run_output_path = f"{run_output_path}{row['id']}/"
+
+    run_cfg = dict(config)
+    run_cfg.update(
+        {
+            "tree": row.get("tree"),
+            "fasta": row.get("fasta"),
+            "support": _coerce_float(row.get("support"), config["support"]),
+            "occupancy": _coerce_float(row.get("occupancy"), config["occupancy"]),
+            "occupancy_count": _coerce_int(row.get("occupancy_count"), config.get("occupancy_count")),
+            "occupancy_fraction": _coerce_float(row.get("occupancy_fraction"), config.get("occupancy_fraction")),
+            "rooted": _parse_bool(row.get("rooted"), config["rooted"]),
+            "snap_trees": _parse_bool(row.get("snap_trees"), config["snap_trees"]),
+            "report_inparalog_handling": _parse_bool(
+                row.get("report_inparalog_handling"), config["report_inparalog_handling"]
+            ),
+            "output_path": run_output_path,
+            "delimiter": row.get("delimiter") or config["delimiter"],
+        }
+    )
+    run_cfg.pop("manifest", None)
+    run_cfg.pop("jobs", None)
+    run_cfg.pop("sweep", None)
+    run_cfg.pop("sweep_outputs", None)
+
+    inparalog_value = row.get("inparalog_to_keep")
+    if inparalog_value:
+        run_cfg["inparalog_to_keep"] = InparalogToKeep(inparalog_value)
+
+    return run_cfg
+
+
+def _count_newick_tips(tree: str, chunk_size: int = 1 << 20) -> int:
+    """Tips of a single-tree Newick file, from its commas, without parsing."""
+    commas = 0
+    with open(tree, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            commas += chunk.count(b",")
+    return commas + 1
+
+
+def _estimate_manifest_row_cost(run_cfg: dict) -> float:
+    """
+    Rough relative cost of a manifest row, read from file sizes and a
+    comma count of the tree: FASTA bytes plus tree bytes weighted by
+    log2 of the tip count. Only the order of estimates matters; rows
+    whose files cannot be read get 0 and fail when they run.
+    """
+    try:
+        tree_size = os.path.getsize(run_cfg["tree"])
+        fasta_size = os.path.getsize(run_cfg["fasta"])
+        tips = _count_newick_tips(run_cfg["tree"])
+    except (OSError, TypeError):
+        return 0.0
+    return float(fasta_size + tree_size * max(1.0, math.log2(tips)))
+
+
+def _run_manifest_row(idx: int, run_cfg: dict, estimated_cost: float = 0.0) -> dict:
+    """
+    Run one manifest row and return its summary row. Inputs are loaded
+    here, in the process that runs the row, and released once it is
+    done; any failure is recorded in the summary instead of being raised.
+    """
+    # the row's settings are resolved on a copy, so the loaded inputs do
+    # not outlive the row in the caller's list of runs
+    run_cfg = dict(run_cfg)
+    summary = {
+        "row": idx,
+        "tree": run_cfg["tree"],
+        "fasta": run_cfg["fasta"],
+        "status": "failed",
+        "subgroup_count": 0,
+        "output_path": run_cfg["output_path"],
+        "estimated_cost": estimated_cost,
+        "actual_seconds": 0.0,
+        "error": "",
+    }
+    start_time = time.perf_counter()
+    inputs = None
+    try:
+        os.makedirs(run_cfg["output_path"], exist_ok=True)
+
+        inputs = load_inputs(
+            run_cfg["tree"],
+            run_cfg["fasta"],
+            run_cfg["delimiter"],
+            run_cfg.get("fasta_backend", "memory"),
+            run_cfg.get("fasta_output", "formatted"),
+        )
+        run_cfg["inputs"] = inputs
+
+        if run_cfg.get("occupancy_fraction") is not None:
+            run_cfg["occupancy_mode"] = "fraction"
+            run_cfg["occupancy"] = max(
+                1,
+                int((run_cfg["occupancy_fraction"] * inputs.unique_taxa) + 0.999999),
+            )
+        elif run_cfg.get("occupancy_count") is not None:
+            run_cfg["occupancy_mode"] = "count"
+            run_cfg["occupancy"] = run_cfg["occupancy_count"]
+        elif run_cfg.get("occupancy") is None:
+            run_cfg["occupancy"] = occupancy_threshold_for_taxa(
+                inputs.unique_taxa
+            )
+
+        result = execute(**run_cfg)
+    except (Exception, SystemExit) as exc:
+        # validation exits with sys.exit; keep the other rows going
+        summary["error"] = str(exc) or exc.__class__.__name__
+        summary["actual_seconds"] = round(time.perf_counter() - start_time, 3)
+        return summary
+    finally:
+        if inputs is not None:
+            inputs.close()
+
+    summary["actual_seconds"] = round(time.perf_counter() - start_time, 3)
+    summary["status"] = result.get("status", "completed")
+    summary["subgroup_count"] = result.get("subgroup_counter", 0)
+    return summary
+
+
 def _execute_manifest_runs(config: dict):
     manifest_path = config["manifest"]
     output_root = config["output_path"]
     if not output_root.endswith("/"):
         output_root += "/"
     os.makedirs(output_root, exist_ok=True)
+    jobs = config.get("jobs") or 1
 
     delimiter = "\t" if manifest_path.endswith(".tsv") else ","
 
-    summary_rows = []
     with open(manifest_path, "r", newline="") as handle:
         reader = csv.DictReader(handle, delimiter=delimiter)
         required = {"tree", "fasta"}
         if reader.fieldnames is None or not required.issubset(set(reader.fieldnames)):
             raise SystemExit("Manifest must include 'tree' and 'fasta' columns.")
 
-        for idx, row in enumerate(reader, start=1):
-            tree = row.get("tree")
-            fasta = row.get("fasta")
-            run_output_path = row.get("output_path") or output_root
-            if not run_output_path.endswith("/"):
-                run_output_path += "/"
-
-            if row.get("id"):
-                run_output_path = f"{run_output_path}{row['id']}/"
-
-            os.makedirs(run_output_path, exist_ok=True)
-
-            run_cfg = dict(config)
-            run_cfg.update(
-                {
-                    "manifest": None,
-                    "tree": tree,
-                    "fasta": fasta,
-                    "support": _coerce_float(row.get("support"), config["support"]),
-                    "occupancy": _coerce_float(row.get("occupancy"), config["occupancy"]),
-                    "occupancy_count": _coerce_int(row.get("occupancy_count"), config.get("occupancy_count")),
-                    "occupancy_fraction": _coerce_float(row.get("occupancy_fraction"), config.get("occupancy_fraction")),
-                    "rooted": _parse_bool(row.get("rooted"), config["rooted"]),
-                    "snap_trees": _parse_bool(row.get("snap_trees"), config["snap_trees"]),
-                    "report_inparalog_handling": _parse_bool(
-                        row.get("report_inparalog_handling"), config["report_inparalog_handling"]
-                    ),
-                    "output_path": run_output_path,
-                    "delimiter": row.get("delimiter") or config["delimiter"],
-                }
-            )
-
-            inparalog_value = row.get("inparalog_to_keep")
-            if inparalog_value:
-                run_cfg["inparalog_to_keep"] = InparalogToKeep(inparalog_value)
+        runs = [
+            (idx, _manifest_run_config(config, row, output_root))
+            for idx, row in enumerate(reader, start=1)
+        ]
 
-            if run_cfg.get("occupancy_fraction") is not None:
-                run_cfg["occupancy_mode"] = "fraction"
-                unique_taxa = len(
-                    {
-                        rec.id.split(run_cfg["delimiter"], 1)[0]
-                        for rec in SeqIO.parse(fasta, "fasta")
-                    }
-                )
-                run_cfg["occupancy"] = max(
-                    1,
-                    int((run_cfg["occupancy_fraction"] * unique_taxa) + 0.999999),
-                )
-            elif run_cfg.get("occupancy_count") is not None:
-                run_cfg["occupancy_mode"] = "count"
-                run_cfg["occupancy"] = run_cfg["occupancy_count"]
-            elif run_cfg.get("occupancy") is None:
-                run_cfg["occupancy"] = determine_occupancy_threshold(
-                    fasta, run_cfg["delimiter"]
-                )
+    estimates = {idx: _estimate_manifest_row_cost(run_cfg) for idx, run_cfg in runs}
 
-            run_cfg.pop("manifest", None)
-            result = execute(**run_cfg)
-            summary_rows.append(
-                {
-                    "row": idx,
-                    "tree": tree,
-                    "fasta": fasta,
-                    "status": result.get("status", "completed"),
-                    "subgroup_count": result.get("subgroup_counter", 0),
-                    "output_path": run_output_path,
-                }
-            )
+    if jobs <= 1 or len(runs) <= 1:
+        summary_rows = [
+            _run_manifest_row(idx, run_cfg, estimates[idx]) for idx, run_cfg in runs
+        ]
+    else:
+        # a large row started last sets the total runtime, so the most
+        # expensive rows are dispatched first
+        runs.sort(key=lambda run: estimates[run[0]], reverse=True)
+        summary_rows = []
+        with ProcessPoolExecutor(max_workers=min(jobs, len(runs))) as pool:
+            futures = {
+                pool.submit(_run_manifest_row, idx, run_cfg, estimates[idx]): (idx, run_cfg)
+                for idx, run_cfg in runs
+            }
+            for future in as_completed(futures):
+                idx, run_cfg = futures[future]
+                try:
+                    summary_rows.append(future.result())
+                except Exception as exc:
+                    # the worker itself died, e.g., BrokenProcessPool
+                    summary_rows.append(
+                        {
+                            "row": idx,
+                            "tree": run_cfg["tree"],
+                            "fasta": run_cfg["fasta"],
+                            "status": "failed",
+                            "subgroup_count": 0,
+                            "output_path": run_cfg["output_path"],
+                            "estimated_cost": estimates[idx],
+                            "actual_seconds": 0.0,
+                            "error": str(exc) or exc.__class__.__name__,
+                        }
+                    )
+        # rows finish in any order; report them in manifest order
+        summary_rows.sort(key=lambda summary: summary["row"])
 
     stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%SZ")
     summary_tsv = f"{output_root}manifest_summary_{stamp}.tsv"
@@ -728,7 +1291,7 @@ def _execute_manifest_runs(config: dict):
     with open(summary_tsv, "w", newline="") as handle:
         writer = csv.DictWriter(
             handle,
-            fieldnames=["row", "tree", "fasta", "status", "subgroup_count", "output_path"],
+            fieldnames=_MANIFEST_SUMMARY_FIELDS,
             delimiter="\t",
         )
         writer.writeheader()
@@ -740,6 +1303,239 @@ def _execute_manifest_runs(config: dict):
     print(f"Manifest execution summary TSV: {summary_tsv}")
     print(f"Manifest execution summary JSON: {summary_json}")
 
+    failed = [summary["row"] for summary in summary_rows if summary["status"] == "failed"]
+    if failed:
+        print(f"Manifest rows that failed: {', '.join(str(row) for row in failed)}")
+
+    return summary_rows
+
+
+_SWEEP_SUMMARY_FIELDS = [
+    "combination",
+    "support",
+    "occupancy",
+    "inparalog_to_keep",
+    "subgroup_count",
+    "subgroup_tip_count",
+    "output_path",
+    "seconds",
+]
+
+
+def _sweep_output_path(
+    output_root: str, support: float, occupancy: float, inparalog_to_keep
+) -> str:
+    return (
+        f"{output_root}sweep/support_{support:g}.occupancy_{occupancy:g}."
+        f"{inparalog_to_keep.value}/"
+    )
+
+
+def _sweep_tree_and_tables(inputs: LoadedInputs, settings: dict):
+    """The tree of a sweep, and its extraction tables, built once."""
+    if settings["flat_tree"]:
+        tree_obj = inputs.get_flat_tree(settings["rooted"])
+    else:
+        tree_obj = inputs.get_tree(settings["rooted"])
+    tables_type = ArrayTables if settings["engine"] == "array" else ExtractionTables
+    return tree_obj, tables_type.from_tree(tree_obj, settings["delimiter"])
+
+
+def _evaluate_sweep_combination(
+    inputs: LoadedInputs,
+    tree_obj,
+    tables: ExtractionTables,
+    settings: dict,
+    combination: int,
+    support: float,
+    occupancy: float,
+    inparalog_to_keep: InparalogToKeep,
+) -> dict:
+    write_outputs = settings["sweep_outputs"]
+    output_path = _sweep_output_path(
+        settings["output_path"], support, occupancy, inparalog_to_keep
+    )
+    report_inparalog_handling = settings["report_inparalog_handling"] and write_outputs
+    if write_outputs:
+        os.makedirs(output_path, exist_ok=True)
+        # the report is appended to while subgroups are written
+        report_path = (
+            f"{output_path}{re.sub('^.*/', '', settings['fasta'])}"
+            ".inparalog_report.txt"
+        )
+        if os.path.isfile(report_path):
+            os.remove(report_path)
+
+    start_time = time.perf_counter()
+    extraction = _extract_subgroups(
+        tree=tree_obj,
+        fasta=settings["fasta"],
+        fasta_dict=inputs.fasta_dict,
+        support=support,
+        occupancy=occupancy,
+        snap_trees=settings["snap_trees"] and write_outputs,
+        inparalog_to_keep=inparalog_to_keep,
+        output_path=output_path,
+        report_inparalog_handling=report_inparalog_handling,
+        delimiter=settings["delimiter"],
+        write_outputs=write_outputs,
+        engine=settings["engine"],
+        seq_lengths=(
+            inputs.seq_lengths
+            if inparalog_to_keep.value in SEQ_LEN_STRATEGIES
+            else None
+        ),
+        tables=tables,
+    )
+
+    return {
+        "combination": combination,
+        "support": support,
+        "occupancy": occupancy,
+        "inparalog_to_keep": inparalog_to_keep.value,
+        "subgroup_count": extraction["subgroup_counter"],
+        "subgroup_tip_count": sum(
+            len(record["tips"]) for record in extraction["subgroup_records"]
+        ),
+        "output_path": output_path if write_outputs else "",
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
+
+
+def _init_sweep_worker(settings: dict):
+    global _sweep_worker_state
+    inputs = load_inputs(
+        settings["tree"],
+        settings["fasta"],
+        settings["delimiter"],
+        settings["fasta_backend"],
+        settings["fasta_output"],
+    )
+    _sweep_worker_state = (inputs, *_sweep_tree_and_tables(inputs, settings))
+
+
+def _sweep_worker_combination(settings: dict, combination: int, values: tuple) -> dict:
+    return _evaluate_sweep_combination(
+        *_sweep_worker_state, settings, combination, *values
+    )
+
+
+def _execute_sweep(config: dict):
+    """
+    Evaluate every combination of the swept support, occupancy and
+    inparalog values on one tree and FASTA file. Inputs are loaded and
+    validated once; the tree, its taxon tables and each collapsed tree
+    are built once (once per worker with --jobs) and shared by every
+    combination.
+    """
+    output_root = config["output_path"]
+    if not output_root.endswith("/"):
+        output_root += "/"
+    os.makedirs(output_root, exist_ok=True)
+    tree = config["tree"]
+    fasta = config["fasta"]
+    delimiter = config["delimiter"]
+    engine = config.get("engine", "legacy")
+    sweep = config["sweep"]
+    jobs = config.get("jobs") or 1
+
+    fasta_backend = config.get("fasta_backend", "memory")
+    fasta_output = config.get("fasta_output", "formatted")
+    inputs = config.get("inputs")
+    if inputs is None or not inputs.matches(
+        tree, fasta, delimiter, fasta_backend, fasta_output
+    ):
+        inputs = load_inputs(tree, fasta, delimiter, fasta_backend, fasta_output)
+
+    sweep_outputs = config.get("sweep_outputs", False)
+    settings = dict(
+        tree=tree,
+        fasta=fasta,
+        delimiter=delimiter,
+        fasta_backend=inputs.fasta_backend,
+        fasta_output=fasta_output,
+        rooted=config["rooted"],
+        engine=engine,
+        # SNAP-OG trees are cloned from Bio.Phylo clades
+        flat_tree=engine == "array" and not (config["snap_trees"] and sweep_outputs),
+        snap_trees=config["snap_trees"],
+        report_inparalog_handling=config["report_inparalog_handling"],
+        sweep_outputs=sweep_outputs,
+        output_path=output_root,
+    )
+
+    valid, validation_summary = _validate_inputs(
+        tree, fasta, delimiter, inputs, settings["flat_tree"], settings["rooted"]
+    )
+    if not valid:
+        print("Input validation failed:")
+        for error in validation_summary["errors"]:
+            print(f"- {error}")
+        sys.exit(1)
+
+    combinations = list(
+        product(sweep["support"], sweep["occupancy"], sweep["inparalog_to_keep"])
+    )
+    print(f"Parameter sweep: {len(combinations)} combinations")
+
+    tree_obj, tables = _sweep_tree_and_tables(inputs, settings)
+    taxa, all_tips = get_all_tips_and_taxa_names(tree_obj, delimiter)
+    if check_if_single_copy(taxa, all_tips):
+        summary_rows = [
+            {
+                "combination": combination,
+                "support": support,
+                "occupancy": occupancy,
+                "inparalog_to_keep": inparalog_to_keep.value,
+                "subgroup_count": 0,
+                "subgroup_tip_count": 0,
+                "output_path": "",
+                "seconds": 0.0,
+            }
+            for combination, (support, occupancy, inparalog_to_keep) in enumerate(
+                combinations, start=1
+            )
+        ]
+    elif jobs <= 1 or len(combinations) <= 1:
+        summary_rows = [
+            _evaluate_sweep_combination(
+                inputs, tree_obj, tables, settings, combination, *values
+            )
+            for combination, values in enumerate(combinations, start=1)
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(combinations)),
+            initializer=_init_sweep_worker,
+            initargs=(settings,),
+        ) as pool:
+            futures = [
+                pool.submit(_sweep_worker_combination, settings, combination, values)
+                for combination, values in enumerate(combinations, start=1)
+            ]
+            summary_rows = [future.result() for future in futures]
+
+    fasta_path_stripped = re.sub("^.*/", "", fasta)
+    summary_tsv = f"{output_root}{fasta_path_stripped}.orthosnap.sweep_summary.tsv"
+    summary_json = f"{output_root}{fasta_path_stripped}.orthosnap.sweep_summary.json"
+
+    with open(summary_tsv, "w", newline="") as handle:
+        writer = csv.DictWriter(
+            handle,
+            fieldnames=_SWEEP_SUMMARY_FIELDS,
+            delimiter="\t",
+        )
+        writer.writeheader()
+        writer.writerows(summary_rows)
+
+    with open(summary_json, "w") as handle:
+        json.dump(summary_rows, handle, indent=2)
+
+    print(f"Parameter sweep summary TSV: {summary_tsv}")
+    print(f"Parameter sweep summary JSON: {summary_json}")
+
+    return summary_rows
+
 
 def main(argv=None):
     """
@@ -756,10 +1552,16 @@ def main(argv=None):
     config = process_args(args)
 
     if config.get("manifest"):
-        _execute_manifest_runs(config)
+        summary_rows = _execute_manifest_runs(config)
+        if any(summary["status"] == "failed" for summary in summary_rows):
+            sys.exit(1)
+    elif config.get("sweep"):
+        _execute_sweep(config)
     else:
         execute_config = dict(config)
         execute_config.pop("manifest", None)
+        execute_config.pop("sweep", None)
+        execute_config.pop("sweep_outputs", None)
         execute(**execute_config)
 
 
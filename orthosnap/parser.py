@@ -114,6 +114,44 @@ def create_parser():
             Output format for SNAP-OG plot.
             Default: png
 
+        --engine <legacy|array>
+            SNAP-OG extraction engine.
+            Default: legacy
+
+        --fasta-backend <memory|indexed>
+            How FASTA sequences are held during a run.
+            Default: memory
+
+        --fasta-output <formatted|raw>
+            How subgroup FASTA records are written.
+            Default: formatted
+
+        --jobs <int>
+            Number of manifest rows, bootstrap replicates or sweep
+            combinations processed at the same time.
+            Default: 1
+
+        --cache-dir <directory>
+            Directory of cached SNAP-OG results shared between runs.
+            Default: no cache
+
+        --cache-max-size <int>
+            Size limit of the cache directory in megabytes.
+            Default: 1024
+
+        --input-hash <sha256|blake2b|sampled>
+            How input files are hashed for --structured-output.
+            Default: sha256
+
+        --sweep-support <list>, --sweep-occupancy <list>,
+        --sweep-inparalog-to-keep <list>
+            Comma-separated values to evaluate in every combination.
+            Default: no sweep
+
+        --sweep-outputs
+            Also write the subgroup files of every sweep combination.
+            Default: false
+
         Notes
         -----
         -t, --tree <newick tree file>
@@ -164,6 +202,66 @@ def create_parser():
 
         -pf, --plot_format <png|pdf|svg>
             File format for the SNAP-OG assignment plot.
+
+        --engine <legacy|array>
+            legacy walks Bio.Phylo clade objects; array flattens the tree
+            once into index arrays, which is faster on large gene families.
+            Both engines write identical SNAP-OG files and keep the
+            rooted tree in <tree>.orthosnap.treeidx, reused while the
+            tree file is unchanged.
+
+        --fasta-backend <memory|indexed>
+            memory parses every record up front; indexed scans headers
+            once, keeps a byte-offset index next to the FASTA file
+            (<fasta>.orthosnap.fai, reused by later runs) and reads
+            sequences from the memory-mapped file only when needed.
+
+        --fasta-output <formatted|raw>
+            formatted rewrites records with Biopython (60-column lines);
+            raw copies each record byte-for-byte from the input FASTA
+            (kernel-side where supported) and implies the indexed
+            backend.
+
+        --jobs <int>
+            With --manifest, rows run in separate processes, each
+            writing to its own output directory; the summary keeps
+            manifest row order and failed rows are recorded there
+            without stopping the others. With --bootstrap-trees,
+            replicate trees are split across processes; the consensus
+            output is the same as with one job. With a parameter sweep,
+            combinations are split across processes.
+
+        --cache-dir <directory>
+            Runs are looked up by the SHA-256 of the tree and FASTA
+            files, the support, occupancy, rooting, delimiter, engine,
+            inparalog and output options, and the orthosnap version. On
+            a hit, subgroups are read from the cache and their files
+            are rewritten without extraction. The least recently used
+            results are removed once the directory outgrows
+            --cache-max-size. Bootstrap consensus runs are not cached.
+
+        --input-hash <sha256|blake2b|sampled>
+            sha256 and blake2b hash whole files; sampled hashes the
+            file size and 64 evenly spaced 64 KiB blocks, which is much
+            faster on large alignments but does not notice every
+            change. Hashing runs on a background thread during
+            extraction. Digests are remembered in fingerprints.json
+            (in --cache-dir, else ~/.cache/orthosnap) and reused while
+            a file keeps its inode, size and modification time.
+
+        --sweep-support <list>, --sweep-occupancy <list>,
+        --sweep-inparalog-to-keep <list>
+            Parameter sweep: every combination of the listed values is
+            evaluated on one tree and FASTA file, which are read,
+            rooted and indexed once. Parameters that are not swept
+            keep their single value. Results are summarized in
+            <fasta>.orthosnap.sweep_summary.tsv/.json. With --jobs,
+            combinations are split across processes.
+
+        --sweep-outputs
+            Write each combination's SNAP-OG FASTA files (and -st trees
+            and -rih reports) to
+            sweep/support_<s>.occupancy_<o>.<inparalog_to_keep>/.
         """
         ),
     )
@@ -258,6 +356,63 @@ def create_parser():
         help=SUPPRESS,
     )
 
+    optional.add_argument(
+        "--jobs",
+        type=int,
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--cache-dir",
+        type=str,
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--cache-max-size",
+        type=int,
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--input-hash",
+        type=str,
+        choices=["sha256", "blake2b", "sampled"],
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--sweep-support",
+        type=str,
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--sweep-occupancy",
+        type=str,
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--sweep-inparalog-to-keep",
+        type=str,
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--sweep-outputs",
+        action="store_true",
+        required=False,
+        help=SUPPRESS,
+    )
+
     optional.add_argument(
         "--validate-only",
         action="store_true",
@@ -318,6 +473,30 @@ def create_parser():
         help=SUPPRESS,
     )
 
+    optional.add_argument(
+        "--engine",
+        type=str,
+        choices=["legacy", "array"],
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--fasta-backend",
+        type=str,
+        choices=["memory", "indexed"],
+        required=False,
+        help=SUPPRESS,
+    )
+
+    optional.add_argument(
+        "--fasta-output",
+        type=str,
+        choices=["formatted", "raw"],
+        required=False,
+        help=SUPPRESS,
+    )
+
     optional.add_argument(
         "-h",
         "--help",
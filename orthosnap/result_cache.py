@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from .version import __version__
+
+ENTRY_SUFFIX = ".orthosnap-result.json"
+
+
+class ResultCache:
+    """
+    Directory of SNAP-OG extraction results, addressed by content.
+
+    An entry is keyed by the SHA-256 of the tree and FASTA files, the
+    parameters that shape subgroups and the orthosnap version, and holds
+    subgroup membership plus the text of SNAP-OG trees and inparalog
+    report rows, i.e., everything the FASTA file alone cannot give back.
+    Entries are single files written atomically, so concurrent runs may
+    share a directory. Reading an entry refreshes its modification time,
+    and storing one evicts the least recently used entries until the
+    directory is back under max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(tree_sha256: str, fasta_sha256: str, parameters: dict) -> str:
+        payload = json.dumps(
+            {
+                "orthosnap_version": __version__,
+                "tree_sha256": tree_sha256,
+                "fasta_sha256": fasta_sha256,
+                "parameters": parameters,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{ENTRY_SUFFIX}")
+
+    def get(self, key: str):
+        """Stored result for key, or None; unreadable entries are dropped."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as handle:
+                entry = json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError):
+            self._remove(path)
+            return None
+        if entry.get("key") != key:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict) -> bool:
+        """
+        Store entry under key and evict old entries; entries larger than
+        the whole cache are not stored.
+        """
+        data = json.dumps(dict(entry, key=key)).encode()
+        if len(data) > self.max_bytes:
+            return False
+
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as output:
+                output.write(data)
+            os.replace(temporary, self._path(key))
+        except OSError:
+            self._remove(temporary)
+            return False
+
+        self.evict(keep=key)
+        return True
+
+    def evict(self, keep: str = None):
+        """Remove least recently used entries until under max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, item.name, item.path, stat.st_size))
+                total += stat.st_size
+
+        keep_name = f"{keep}{ENTRY_SUFFIX}" if keep is not None else None
+        for _, name, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep_name:
+                continue
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+
+import numpy as np
+from Bio.Phylo import Newick
+
+from .flat_tree import FlatTree
+from .version import __version__
+
+TREE_INDEX_SUFFIX = ".orthosnap.treeidx"
+_INDEX_MAGIC = b"#orthosnap-tree-index\t1\n"
+_ALIGNMENT = 8
+# FlatTree arrays stored as-is; names go into a byte table
+_ARRAYS = (
+    ("parent", "<i8"),
+    ("first_child", "<i8"),
+    ("next_sibling", "<i8"),
+    ("branch_length", "<f8"),
+    ("confidence", "<f8"),
+)
+
+
+def _index_path(tree: str) -> str:
+    return tree + TREE_INDEX_SUFFIX
+
+
+def _source_sha256(tree: str) -> str:
+    digest = hashlib.sha256()
+    with open(tree, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _name_table(names: list) -> tuple:
+    """Names as one UTF-8 blob with end offsets; -1 marks a missing name."""
+    encoded = []
+    ends = np.empty(len(names), dtype="<i8")
+    end = 0
+    for node, name in enumerate(names):
+        if name is None:
+            ends[node] = -1
+            continue
+        data = name.encode()
+        encoded.append(data)
+        end += len(data)
+        ends[node] = end
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), ends
+
+
+def _read_names(blob: bytes, ends) -> list:
+    names = []
+    start = 0
+    for end in ends.tolist():
+        if end == -1:
+            names.append(None)
+            continue
+        names.append(blob[start:end].decode())
+        start = end
+    return names
+
+
+def _flat_arrays(flat: FlatTree) -> list:
+    blob, name_ends = _name_table(flat.names)
+    arrays = [(name, getattr(flat, name).astype(dtype)) for name, dtype in _ARRAYS]
+    arrays += [("name_ends", name_ends), ("names", blob)]
+    return arrays
+
+
+def _write_index(tree: str, arrays: list, midpoint_rooted: bool):
+    layout = dict()
+    offset = 0
+    for name, values in arrays:
+        layout[name] = [values.dtype.str, offset, len(values)]
+        offset = _aligned(offset + values.nbytes)
+
+    index_path = _index_path(tree)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        stat = os.stat(tree)
+        header = json.dumps(
+            {
+                "orthosnap_version": __version__,
+                "source_size": stat.st_size,
+                "source_mtime_ns": stat.st_mtime_ns,
+                "source_sha256": _source_sha256(tree),
+                "midpoint_rooted": midpoint_rooted,
+                "arrays": layout,
+            }
+        ).encode() + b"\n"
+        data_start = _aligned(len(_INDEX_MAGIC) + len(header))
+        with open(tmp_path, "wb") as handle:
+            handle.write(_INDEX_MAGIC)
+            handle.write(header)
+            for name, values in arrays:
+                handle.seek(data_start + layout[name][1])
+                handle.write(values.tobytes())
+            handle.truncate(data_start + offset)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_tree_index(tree: str, flat: FlatTree, midpoint_rooted: bool):
+    """
+    Persist a FlatTree next to its Newick file: a header with the source
+    file's size, mtime and SHA-256, then the node arrays and name table
+    aligned for memory mapping. Read-only locations are skipped.
+    """
+    _write_index(tree, _flat_arrays(flat), midpoint_rooted)
+
+
+def _restorable_confidence(clade) -> bool:
+    confidence = clade.confidence
+    if confidence is None or type(confidence) is float:
+        return True
+    return type(confidence) is int and float(confidence) == confidence
+
+
+def write_phylo_tree_index(tree: str, phylo_tree, midpoint_rooted: bool):
+    """
+    As write_tree_index, for a tree read with Bio.Phylo. Whether each
+    support value was an int or a float is stored too, so the index can
+    stand in for Bio.Phylo.read; trees it cannot restore exactly (e.g.,
+    with comments) get a FlatTree-only index.
+    """
+    flat = FlatTree.from_phylo(phylo_tree)
+    arrays = _flat_arrays(flat)
+    if all(
+        getattr(clade, "comment", None) is None
+        and (clade.branch_length is None or type(clade.branch_length) is float)
+        and _restorable_confidence(clade)
+        for clade in flat.clades
+    ):
+        integer_confidence = np.array(
+            [type(clade.confidence) is int for clade in flat.clades], dtype=np.uint8
+        )
+        arrays.append(("integer_confidence", integer_confidence))
+    _write_index(tree, arrays, midpoint_rooted)
+
+
+def _read_index(tree: str, midpoint_rooted: bool):
+    """
+    Arrays of the sidecar index, memory-mapped, or None if it is missing,
+    was written for the other rooting or by another version, or no
+    longer matches the source file. A source whose mtime changed but
+    whose size and SHA-256 did not (e.g., a copy or touch) is still
+    matched, and the index is rewritten with the new stamp.
+    """
+    try:
+        with open(_index_path(tree), "rb") as handle:
+            if handle.readline() != _INDEX_MAGIC:
+                return None
+            header = json.loads(handle.readline())
+            data_start = _aligned(handle.tell())
+            stat = os.stat(tree)
+            if (
+                header.get("orthosnap_version") != __version__
+                or header.get("midpoint_rooted") != midpoint_rooted
+                or header.get("source_size") != stat.st_size
+            ):
+                return None
+            restamp = header.get("source_mtime_ns") != stat.st_mtime_ns
+            if restamp and header.get("source_sha256") != _source_sha256(tree):
+                return None
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        arrays = dict()
+        for name, (dtype, offset, count) in header["arrays"].items():
+            arrays[name] = np.frombuffer(
+                data, dtype=dtype, count=count, offset=data_start + offset
+            )
+        names = _read_names(bytes(arrays["names"]), arrays["name_ends"])
+    except (KeyError, TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+    if restamp:
+        _write_index(tree, list(arrays.items()), midpoint_rooted)
+    return arrays, names
+
+
+def read_tree_index(tree: str, midpoint_rooted: bool) -> FlatTree:
+    """
+    FlatTree memory-mapped from the sidecar index, or None when there is
+    no index that matches the source file and rooting.
+    """
+    index = _read_index(tree, midpoint_rooted)
+    if index is None:
+        return None
+    arrays, names = index
+    try:
+        return FlatTree(*(arrays[name] for name, _ in _ARRAYS), names)
+    except (KeyError, ValueError):
+        return None
+
+
+def read_phylo_tree_index(tree: str, midpoint_rooted: bool):
+    """
+    The tree Bio.Phylo.read (and midpoint rooting) would give, built from
+    the sidecar index without parsing the Newick file, or None when there
+    is no matching index written by write_phylo_tree_index.
+    """
+    index = _read_index(tree, midpoint_rooted)
+    if index is None or "integer_confidence" not in index[0]:
+        return None
+    arrays, names = index
+
+    clades = []
+    parents = arrays["parent"].tolist()
+    rows = zip(
+        parents,
+        arrays["branch_length"].tolist(),
+        arrays["confidence"].tolist(),
+        arrays["integer_confidence"].tolist(),
+        names,
+    )
+    for parent, length, confidence, integer, name in rows:
+        if math.isnan(confidence):
+            confidence = None
+        elif integer:
+            confidence = int(confidence)
+        clade = Newick.Clade(
+            branch_length=None if math.isnan(length) else length,
+            name=name,
+            confidence=confidence,
+        )
+        if parent != -1:
+            clades[parent].clades.append(clade)
+        clades.append(clade)
+    if not clades or parents[0] != -1:
+        return None
+
+    # Bio.Phylo.read leaves trees unrooted; midpoint rooting roots them
+    return Newick.Tree(root=clades[0], rooted=midpoint_rooted)
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _user_cache_home(tmp_path_factory, monkeypatch):
+    # keep the fingerprint store of test runs out of the user's cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache_home")))
@@ -1,7 +1,16 @@
+import gzip
+import hashlib
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
+from Bio import Phylo, SeqIO
 
+import orthosnap.orthosnap as orthosnap_module
+from orthosnap import helper
+from orthosnap.fasta_index import IndexedFasta
 from orthosnap.orthosnap import main
 
 
@@ -28,6 +37,27 @@ class TestNewWorkflows:
 
         assert not list(tmp_path.glob("*.orthosnap.*.fa"))
 
+    def test_inputs_are_parsed_once(self, tmp_path, mocker):
+        tree = tmp_path / SAMPLE_TREE.name
+        fasta = tmp_path / SAMPLE_FASTA.name
+        shutil.copy(SAMPLE_TREE, tree)
+        shutil.copy(SAMPLE_FASTA, fasta)
+        fasta_parse = mocker.spy(SeqIO, "parse")
+        tree_read = mocker.spy(Phylo, "read")
+
+        main(["-t", str(tree), "-f", str(fasta), "-op", str(tmp_path)])
+
+        assert fasta_parse.call_count == 1
+        assert tree_read.call_count == 1
+        assert list(tmp_path.glob(f"{SAMPLE_FASTA.name}.orthosnap.*.fa"))
+
+        # later runs load the midpoint-rooted tree from its sidecar index
+        root_at_midpoint = mocker.spy(helper, "root_at_midpoint")
+        main(["-t", str(tree), "-f", str(fasta), "-op", str(tmp_path)])
+
+        assert tree_read.call_count == 1
+        assert root_at_midpoint.call_count == 0
+
     def test_structured_output_and_resume(self, tmp_path):
         args = [
             "-t",
@@ -54,6 +84,210 @@ class TestNewWorkflows:
         second_subgroups = list(tmp_path.glob(f"{SAMPLE_FASTA.name}.orthosnap.*.fa"))
         assert len(second_subgroups) == len(first_subgroups)
 
+    @pytest.mark.parametrize(
+        "input_hash, digest_name",
+        [("sha256", "sha256"), ("blake2b", "blake2b"), ("sampled", "sampled_blake2b")],
+    )
+    def test_structured_output_input_hash(self, tmp_path, input_hash, digest_name):
+        main(
+            [
+                "-t",
+                str(SAMPLE_TREE),
+                "-f",
+                str(SAMPLE_FASTA),
+                "--structured-output",
+                "--input-hash",
+                input_hash,
+                "-op",
+                str(tmp_path),
+            ]
+        )
+
+        run_json = json.loads(
+            (tmp_path / f"{SAMPLE_FASTA.name}.orthosnap.run.json").read_text()
+        )
+        assert set(run_json["input"]) == {
+            "tree",
+            "fasta",
+            f"tree_{digest_name}",
+            f"fasta_{digest_name}",
+        }
+        assert run_json["arguments"]["input_hash"] == input_hash
+        if input_hash == "sha256":
+            assert (
+                run_json["input"]["fasta_sha256"]
+                == hashlib.sha256(SAMPLE_FASTA.read_bytes()).hexdigest()
+            )
+
+    def test_result_cache_restores_outputs_without_extraction(self, tmp_path, mocker):
+        cache_dir = tmp_path / "cache"
+
+        def run(out_dir):
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "-st",
+                    "-rih",
+                    "--structured-output",
+                    "--cache-dir",
+                    str(cache_dir),
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            outputs = {
+                path.name: path.read_text()
+                for path in out_dir.glob(f"{SAMPLE_FASTA.name}.*")
+                if not path.name.endswith(".run.json")
+            }
+            run_json = json.loads(
+                (out_dir / f"{SAMPLE_FASTA.name}.orthosnap.run.json").read_text()
+            )
+            return outputs, run_json
+
+        first_outputs, first_run = run(tmp_path / "first")
+        assert first_run["extra"]["result_cache"] == "miss"
+        assert len(list(cache_dir.glob("*.orthosnap-result.json"))) == 1
+
+        extract = mocker.spy(orthosnap_module, "_extract_subgroups")
+        second_outputs, second_run = run(tmp_path / "second")
+
+        assert extract.call_count == 0
+        assert second_run["extra"]["result_cache"] == "hit"
+        assert second_run["subgroups"] == first_run["subgroups"]
+        assert second_outputs == first_outputs
+        assert any(name.endswith(".tre") for name in second_outputs)
+        assert f"{SAMPLE_FASTA.name}.inparalog_report.txt" in second_outputs
+
+    def test_result_cache_misses_on_changed_parameters(self, tmp_path, mocker):
+        args = [
+            "-t",
+            str(SAMPLE_TREE),
+            "-f",
+            str(SAMPLE_FASTA),
+            "--cache-dir",
+            str(tmp_path / "cache"),
+            "-op",
+            str(tmp_path / "out"),
+        ]
+        main(args)
+        extract = mocker.spy(orthosnap_module, "_extract_subgroups")
+
+        main(args + ["-s", "60"])
+
+        assert extract.call_count == 1
+        assert len(list((tmp_path / "cache").glob("*.orthosnap-result.json"))) == 2
+
+        # both engines write the same outputs, so they share entries
+        main(args + ["--engine", "array"])
+
+        assert extract.call_count == 1
+
+    @pytest.mark.parametrize("engine", ["legacy", "array"])
+    def test_sweep_outputs_match_single_runs(self, tmp_path, engine):
+        sweep_dir = tmp_path / "sweep_run"
+        main(
+            [
+                "-t",
+                str(SAMPLE_TREE),
+                "-f",
+                str(SAMPLE_FASTA),
+                "-st",
+                "-rih",
+                "--engine",
+                engine,
+                "--sweep-support",
+                "60,95",
+                "--sweep-occupancy",
+                "2,5",
+                "--sweep-inparalog-to-keep",
+                "longest_seq_len,median_branch_len",
+                "--sweep-outputs",
+                "-op",
+                str(sweep_dir),
+            ]
+        )
+
+        summary = json.loads(
+            (
+                sweep_dir / f"{SAMPLE_FASTA.name}.orthosnap.sweep_summary.json"
+            ).read_text()
+        )
+        assert len(summary) == 8
+        assert [row["combination"] for row in summary] == list(range(1, 9))
+
+        for row in summary:
+            single_dir = tmp_path / f"single{row['combination']}"
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "-st",
+                    "-rih",
+                    "--engine",
+                    engine,
+                    "-s",
+                    str(row["support"]),
+                    "-o",
+                    str(row["occupancy"]),
+                    "-ip",
+                    row["inparalog_to_keep"],
+                    "-op",
+                    str(single_dir),
+                ]
+            )
+            single = {
+                path.name: path.read_bytes()
+                for path in single_dir.glob(f"{SAMPLE_FASTA.name}.*")
+            }
+            swept = {
+                path.name: path.read_bytes()
+                for path in Path(row["output_path"]).glob(f"{SAMPLE_FASTA.name}.*")
+            }
+            assert swept == single
+            assert row["subgroup_count"] == len(
+                [name for name in single if name.endswith(".fa")]
+            )
+
+    def test_sweep_jobs_match_serial(self, tmp_path):
+        summaries = dict()
+        for jobs in ["1", "2"]:
+            out_dir = tmp_path / f"jobs{jobs}"
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "--sweep-support",
+                    "60,80,95",
+                    "--sweep-occupancy",
+                    "2,5",
+                    "--jobs",
+                    jobs,
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            rows = json.loads(
+                (
+                    out_dir / f"{SAMPLE_FASTA.name}.orthosnap.sweep_summary.json"
+                ).read_text()
+            )
+            summaries[jobs] = [
+                {key: value for key, value in row.items() if key != "seconds"}
+                for row in rows
+            ]
+
+        assert len(summaries["1"]) == 6
+        assert {row["inparalog_to_keep"] for row in summaries["1"]} == {"longest_seq_len"}
+        assert summaries["2"] == summaries["1"]
+
     def test_manifest_mode(self, tmp_path):
         manifest = tmp_path / "manifest.tsv"
         manifest.write_text(
@@ -77,6 +311,94 @@ class TestNewWorkflows:
         assert len(summary_json) == 1
         assert (out_dir / "job1").exists()
 
+    def test_manifest_jobs_keep_row_order_and_record_failures(self, tmp_path):
+        manifest = tmp_path / "manifest.tsv"
+        manifest.write_text(
+            "tree\tfasta\tid\n"
+            f"{SAMPLE_TREE}\t{SAMPLE_FASTA}\tjob1\n"
+            f"{SAMPLE_TREE}\t{tmp_path / 'missing.fa'}\tjob2\n"
+            f"{SAMPLE_TREE}\t{SAMPLE_FASTA}\tjob3\n"
+        )
+
+        out_dir = tmp_path / "batch"
+        with pytest.raises(SystemExit) as exit_info:
+            main(["--manifest", str(manifest), "--jobs", "2", "-op", str(out_dir)])
+        assert exit_info.value.code == 1
+
+        summary_json = list(out_dir.glob("manifest_summary_*.json"))
+        assert len(summary_json) == 1
+        summary = json.loads(summary_json[0].read_text())
+
+        assert [row["row"] for row in summary] == [1, 2, 3]
+        assert [row["status"] for row in summary] == [
+            "completed",
+            "failed",
+            "completed",
+        ]
+        assert summary[1]["error"]
+        assert summary[0]["subgroup_count"] == summary[2]["subgroup_count"] > 0
+        for job in ("job1", "job3"):
+            assert list(
+                (out_dir / job).glob(f"{SAMPLE_FASTA.name}.orthosnap.*.fa")
+            )
+
+    def test_manifest_rows_release_their_inputs(self, tmp_path, mocker):
+        rows = 4
+        manifest = tmp_path / "manifest.tsv"
+        manifest.write_text(
+            "tree\tfasta\tid\n"
+            + "".join(
+                f"{SAMPLE_TREE}\t{SAMPLE_FASTA}\tjob{idx}\n" for idx in range(rows)
+            )
+        )
+        run_configs = mocker.spy(orthosnap_module, "_manifest_run_config")
+        close = mocker.spy(IndexedFasta, "close")
+
+        out_dir = tmp_path / "batch"
+        main([
+            "--manifest",
+            str(manifest),
+            "--fasta-backend",
+            "indexed",
+            "-op",
+            str(out_dir),
+        ])
+
+        assert close.call_count == rows
+        assert all(
+            run_cfg.get("inputs") is None for run_cfg in run_configs.spy_return_list
+        )
+
+    def test_manifest_jobs_dispatch_largest_rows_first(self, tmp_path, monkeypatch):
+        small_tree = HERE.parents[1] / "samples" / "already_single_copy.tre"
+        small_fasta = HERE.parents[1] / "samples" / "already_single_copy.fa"
+        manifest = tmp_path / "manifest.tsv"
+        manifest.write_text(
+            "tree\tfasta\tid\n"
+            f"{small_tree}\t{small_fasta}\tsmall\n"
+            f"{SAMPLE_TREE}\t{SAMPLE_FASTA}\tlarge\n"
+        )
+
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, idx, *args):
+                submitted.append(idx)
+                return super().submit(fn, idx, *args)
+
+        monkeypatch.setattr(orthosnap_module, "ProcessPoolExecutor", RecordingExecutor)
+
+        out_dir = tmp_path / "batch"
+        main(["--manifest", str(manifest), "--jobs", "2", "-op", str(out_dir)])
+
+        summary = json.loads(
+            next(out_dir.glob("manifest_summary_*.json")).read_text()
+        )
+        assert submitted == [2, 1]
+        assert [row["row"] for row in summary] == [1, 2]
+        assert summary[1]["estimated_cost"] > summary[0]["estimated_cost"] > 0
+        assert all(row["actual_seconds"] >= 0 for row in summary)
+
     def test_bootstrap_consensus_mode(self, tmp_path):
         bootstrap = tmp_path / "bootstrap_trees.txt"
         bootstrap.write_text(f"{SAMPLE_TREE}\n{SAMPLE_TREE}\n")
@@ -106,6 +428,202 @@ class TestNewWorkflows:
         assert len(consensus_fa) > 0
         assert len(consensus_tre) > 0
 
+    @pytest.mark.parametrize(
+        "engine, jobs", [("legacy", "1"), ("array", "1"), ("array", "2")]
+    )
+    def test_bootstrap_consensus_from_multi_tree_gzip(self, tmp_path, engine, jobs):
+        replicate = Phylo.read(str(SAMPLE_TREE), "newick")
+        for position, clade in enumerate(replicate.get_nonterminals()):
+            if position % 2:
+                clade.confidence = 10
+        replicate_path = tmp_path / "replicate.tre"
+        Phylo.write(replicate, str(replicate_path), "newick")
+        paths = tmp_path / "bootstrap_trees.txt"
+        paths.write_text(f"{SAMPLE_TREE}\n{replicate_path}\n{SAMPLE_TREE}\n")
+        multi_tree = tmp_path / "bootstrap.ufboot.gz"
+        with gzip.open(multi_tree, "wt") as handle:
+            for path in [SAMPLE_TREE, replicate_path, SAMPLE_TREE]:
+                handle.write(Path(path).read_text())
+
+        consensus = dict()
+        for name, bootstrap in [("paths", paths), ("newick", multi_tree)]:
+            out_dir = tmp_path / name
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "--bootstrap-trees",
+                    str(bootstrap),
+                    "--consensus-min-frequency",
+                    "0.3",
+                    "--engine",
+                    engine,
+                    "--jobs",
+                    jobs,
+                    "--structured-output",
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            consensus[name] = (
+                out_dir / f"{SAMPLE_FASTA.name}.orthosnap.consensus.tsv"
+            ).read_text()
+            run_json = json.loads(
+                (out_dir / f"{SAMPLE_FASTA.name}.orthosnap.run.json").read_text()
+            )
+            assert run_json["extra"]["bootstrap_tree_count"] == 3
+            assert run_json["extra"]["bootstrap_trees_format"] == name
+
+        assert consensus["newick"] == consensus["paths"]
+
+    def test_consensus_trees_read_reference_once(self, tmp_path, mocker):
+        bootstrap = tmp_path / "bootstrap_trees.txt"
+        bootstrap.write_text(f"{SAMPLE_TREE}\n{SAMPLE_TREE}\n")
+        tree_read = mocker.spy(Phylo, "read")
+
+        main(
+            [
+                "-t",
+                str(SAMPLE_TREE),
+                "-f",
+                str(SAMPLE_FASTA),
+                "--bootstrap-trees",
+                str(bootstrap),
+                "--consensus-trees",
+                "--engine",
+                "array",
+                "-op",
+                str(tmp_path),
+            ]
+        )
+
+        consensus_tre = list(tmp_path.glob(f"{SAMPLE_FASTA.name}.orthosnap.consensus_*.tre"))
+        assert len(consensus_tre) > 1
+        assert tree_read.call_count == 1
+
+    def test_bootstrap_replicates_reuse_loaded_fasta(self, tmp_path, mocker):
+        bootstrap = tmp_path / "bootstrap_trees.txt"
+        bootstrap.write_text(f"{SAMPLE_TREE}\n{SAMPLE_TREE}\n{SAMPLE_TREE}\n")
+        fasta_parse = mocker.spy(SeqIO, "parse")
+
+        main(
+            [
+                "-t",
+                str(SAMPLE_TREE),
+                "-f",
+                str(SAMPLE_FASTA),
+                "--bootstrap-trees",
+                str(bootstrap),
+                "-op",
+                str(tmp_path),
+            ]
+        )
+
+        assert fasta_parse.call_count == 1
+
+    def test_bootstrap_consensus_array_engine_matches_legacy(self, tmp_path):
+        bootstrap = tmp_path / "bootstrap_trees.txt"
+        bootstrap.write_text(f"{SAMPLE_TREE}\n{SAMPLE_TREE}\n")
+
+        consensus = dict()
+        for engine in ["legacy", "array"]:
+            out_dir = tmp_path / engine
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "--bootstrap-trees",
+                    str(bootstrap),
+                    "--engine",
+                    engine,
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            consensus[engine] = (
+                out_dir / f"{SAMPLE_FASTA.name}.orthosnap.consensus.tsv"
+            ).read_text()
+
+        assert consensus["array"] == consensus["legacy"]
+
+    @pytest.mark.parametrize("engine", ["legacy", "array"])
+    def test_bootstrap_consensus_jobs_match_serial(self, tmp_path, engine):
+        # a replicate with weaker support on every other internal node
+        # gives subgroups with different frequencies
+        replicate = Phylo.read(str(SAMPLE_TREE), "newick")
+        for position, clade in enumerate(replicate.get_nonterminals()):
+            if position % 2:
+                clade.confidence = 10
+        replicate_path = tmp_path / "replicate.tre"
+        Phylo.write(replicate, str(replicate_path), "newick")
+        bootstrap = tmp_path / "bootstrap_trees.txt"
+        bootstrap.write_text(f"{SAMPLE_TREE}\n{replicate_path}\n{SAMPLE_TREE}\n")
+
+        consensus = dict()
+        for jobs in ["1", "2"]:
+            out_dir = tmp_path / f"jobs{jobs}"
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "--bootstrap-trees",
+                    str(bootstrap),
+                    "--consensus-min-frequency",
+                    "0.3",
+                    "--engine",
+                    engine,
+                    "--jobs",
+                    jobs,
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            consensus[jobs] = (
+                out_dir / f"{SAMPLE_FASTA.name}.orthosnap.consensus.tsv"
+            ).read_text()
+
+        assert consensus["2"] == consensus["1"]
+        assert {line.split("\t")[1] for line in consensus["1"].splitlines()[1:]} == {
+            "2",
+            "3",
+        }
+
+    def test_bootstrap_workers_are_not_forked(self, tmp_path, mocker):
+        # structured output hashes the inputs on a thread while the
+        # replicates run, which forking the workers would not survive
+        bootstrap = tmp_path / "bootstrap_trees.txt"
+        bootstrap.write_text(f"{SAMPLE_TREE}\n{SAMPLE_TREE}\n")
+        pool = mocker.spy(orthosnap_module, "ProcessPoolExecutor")
+
+        main(
+            [
+                "-t",
+                str(SAMPLE_TREE),
+                "-f",
+                str(SAMPLE_FASTA),
+                "--bootstrap-trees",
+                str(bootstrap),
+                "--structured-output",
+                "--jobs",
+                "2",
+                "-op",
+                str(tmp_path),
+            ]
+        )
+
+        assert pool.call_args.kwargs["mp_context"].get_start_method() != "fork"
+        assert (tmp_path / f"{SAMPLE_FASTA.name}.orthosnap.consensus.tsv").exists()
+        run_json = tmp_path / f"{SAMPLE_FASTA.name}.orthosnap.run.json"
+        assert json.loads(run_json.read_text())["input"]["fasta_sha256"] == (
+            hashlib.sha256(SAMPLE_FASTA.read_bytes()).hexdigest()
+        )
+
     def test_bootstrap_consensus_ids_are_stable(self, tmp_path):
         bootstrap = tmp_path / "bootstrap_trees.txt"
         bootstrap.write_text(f"{SAMPLE_TREE}\n{SAMPLE_TREE}\n")
@@ -170,3 +688,137 @@ class TestNewWorkflows:
 
         assert (out_fraction / f"{SAMPLE_FASTA.name}.orthosnap.run.json").exists()
         assert (out_count / f"{SAMPLE_FASTA.name}.orthosnap.run.json").exists()
+
+    @pytest.mark.parametrize(
+        "inparalog_to_keep", ["longest_seq_len", "median_branch_len"]
+    )
+    @pytest.mark.parametrize("snap_trees", [True, False])
+    def test_array_engine_matches_legacy(
+        self, tmp_path, inparalog_to_keep, snap_trees
+    ):
+        outputs = dict()
+        for engine in ["legacy", "array"]:
+            out_dir = tmp_path / engine
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "-o",
+                    "2",
+                    "-ip",
+                    inparalog_to_keep,
+                    "-rih",
+                    "--engine",
+                    engine,
+                    "-op",
+                    str(out_dir),
+                ]
+                + (["-st"] if snap_trees else [])
+            )
+            outputs[engine] = {
+                path.name: path.read_bytes()
+                for path in out_dir.glob(f"{SAMPLE_FASTA.name}.*")
+            }
+
+        assert len(outputs["legacy"]) > 0
+        assert outputs["array"] == outputs["legacy"]
+
+    def test_tree_index_sidecar_is_reused(self, tmp_path, mocker):
+        tree = tmp_path / SAMPLE_TREE.name
+        tree.write_bytes(SAMPLE_TREE.read_bytes())
+
+        outputs = []
+        for run in range(2):
+            if run:
+                read_newick = mocker.spy(helper, "read_flat_newick")
+            out_dir = tmp_path / f"run{run}"
+            main(
+                [
+                    "-t",
+                    str(tree),
+                    "-f",
+                    str(SAMPLE_FASTA),
+                    "--engine",
+                    "array",
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            outputs.append(
+                {
+                    path.name: path.read_bytes()
+                    for path in out_dir.glob(f"{SAMPLE_FASTA.name}.*")
+                }
+            )
+
+        assert (tmp_path / f"{tree.name}.orthosnap.treeidx").exists()
+        assert read_newick.call_count == 0
+        assert len(outputs[0]) > 0
+        assert outputs[1] == outputs[0]
+
+    def test_indexed_fasta_backend_matches_memory(self, tmp_path):
+        fasta = tmp_path / SAMPLE_FASTA.name
+        fasta.write_bytes(SAMPLE_FASTA.read_bytes())
+
+        outputs = dict()
+        for fasta_backend in ["memory", "indexed", "indexed"]:
+            out_dir = tmp_path / fasta_backend
+            main(
+                [
+                    "-t",
+                    str(SAMPLE_TREE),
+                    "-f",
+                    str(fasta),
+                    "-o",
+                    "2",
+                    "-ip",
+                    "median_seq_len",
+                    "-st",
+                    "-rih",
+                    "--fasta-backend",
+                    fasta_backend,
+                    "-op",
+                    str(out_dir),
+                ]
+            )
+            outputs[fasta_backend] = {
+                path.name: path.read_bytes()
+                for path in out_dir.glob(f"{fasta.name}.orthosnap.*")
+                if not path.name.endswith(".run.json")
+            }
+
+        assert (tmp_path / f"{fasta.name}.orthosnap.fai").exists()
+        assert len(outputs["memory"]) > 0
+        assert outputs["indexed"] == outputs["memory"]
+
+    def test_raw_fasta_output_copies_input_records(self, tmp_path):
+        fasta = tmp_path / SAMPLE_FASTA.name
+        fasta.write_bytes(SAMPLE_FASTA.read_bytes())
+        out_dir = tmp_path / "raw"
+        main(
+            [
+                "-t",
+                str(SAMPLE_TREE),
+                "-f",
+                str(fasta),
+                "--fasta-output",
+                "raw",
+                "-op",
+                str(out_dir),
+            ]
+        )
+
+        records = dict()
+        for record in fasta.read_bytes().split(b"\n>"):
+            record = record.lstrip(b">")
+            records[record.split(None, 1)[0].decode()] = b">" + record.rstrip(b"\n") + b"\n"
+
+        subgroups = list(out_dir.glob(f"{fasta.name}.orthosnap.*.fa"))
+        assert subgroups
+        for subgroup in subgroups:
+            names = [
+                record.id for record in SeqIO.parse(str(subgroup), "fasta")
+            ]
+            assert subgroup.read_bytes() == b"".join(records[name] for name in names)
@@ -2,9 +2,10 @@ import pytest
 
 from argparse import Namespace
 
+from Bio import SeqIO
+
 from orthosnap.args_processing import (
     count_unique_taxa_in_fasta,
-    determine_occupancy_threshold,
     process_args,
     proper_round,
 )
@@ -65,9 +66,17 @@ class TestArgsProcessing(object):
         with pytest.raises(SystemExit):
             process_args(args)
 
-    def test_determine_occupancy_threshold(self, args):
-        res = determine_occupancy_threshold(args.fasta, args.delimiter)
-        assert res == 3
+    def test_default_occupancy_threshold(self, args):
+        args.occupancy = None
+        res = process_args(args)
+        assert res["occupancy"] == 3
+
+    def test_process_args_loads_inputs_once(self, args, mocker):
+        parse = mocker.spy(SeqIO, "parse")
+        res = process_args(args)
+        assert parse.call_count == 1
+        assert res["inputs"].unique_taxa == res["total_taxa"] == 5
+        assert res["inputs"].fasta_path == args.fasta
 
     def test_count_unique_taxa_in_fasta(self, args):
         res = count_unique_taxa_in_fasta(args.fasta, args.delimiter)
@@ -203,6 +212,62 @@ class TestArgsProcessing(object):
         args.manifest = str(manifest)
         res = process_args(args)
         assert res["manifest"] == str(manifest)
+        assert res["jobs"] == 1
+
+    def test_jobs_below_one(self, args):
+        args.jobs = 0
+        with pytest.raises(SystemExit):
+            process_args(args)
+
+    def test_cache_defaults(self, args):
+        res = process_args(args)
+        assert res["cache_dir"] is None
+        assert res["cache_max_size"] == 1024
+        assert res["input_hash"] == "sha256"
+
+    def test_cache_max_size_below_one(self, args):
+        args.cache_max_size = 0
+        with pytest.raises(SystemExit):
+            process_args(args)
+
+    def test_sweep_fills_unswept_parameters(self, args):
+        args.sweep_support = "70, 80,70"
+        args.sweep_inparalog_to_keep = "shortest_seq_len,median_branch_len"
+        res = process_args(args)
+        assert res["sweep"] == {
+            "support": [70.0, 80.0],
+            "occupancy": [1],
+            "inparalog_to_keep": [
+                InparalogToKeep.shortest_seq_len,
+                InparalogToKeep.median_branch_len,
+            ],
+        }
+        assert res["sweep_outputs"] is False
+
+    def test_no_sweep_by_default(self, args):
+        res = process_args(args)
+        assert res["sweep"] is None
+
+    @pytest.mark.parametrize(
+        "flag, value",
+        [
+            ("sweep_support", "80,101"),
+            ("sweep_support", "eighty"),
+            ("sweep_occupancy", "0,2"),
+            ("sweep_inparalog_to_keep", "longest"),
+            ("sweep_occupancy", ","),
+        ],
+    )
+    def test_invalid_sweep_values(self, args, flag, value):
+        setattr(args, flag, value)
+        with pytest.raises(SystemExit):
+            process_args(args)
+
+    def test_sweep_with_bootstrap_trees(self, args):
+        args.sweep_support = "70,80"
+        args.bootstrap_trees = "tests/samples/OG0000010.renamed.fa.mafft.clipkit.treefile"
+        with pytest.raises(SystemExit):
+            process_args(args)
 
     def test_consensus_trees_flag(self, args):
         args.consensus_trees = True
@@ -0,0 +1,180 @@
+from io import StringIO
+
+import numpy as np
+from Bio import Phylo
+from Bio.Phylo.BaseTree import TreeMixin
+
+from orthosnap.array_engine import count_distinct_taxa
+from orthosnap.flat_tree import FlatTree
+from orthosnap.helper import (
+    SubtreeView,
+    build_subtree_taxa_cache,
+    build_snap_tree,
+    clone_subtree_as_tree,
+    collapse_low_support_bipartitions,
+    collapse_low_support_once,
+    intern_taxa,
+)
+
+
+class TestFlatTree(object):
+    def test_from_phylo_preorder_arrays(self):
+        tree = Phylo.read(StringIO("((a:1,b:2)90:0.5,c:3);"), "newick")
+        flat = FlatTree.from_phylo(tree)
+
+        assert flat.parent.tolist() == [-1, 0, 1, 1, 0]
+        assert flat.tip_names() == ["a", "b", "c"]
+        assert flat.children(0) == [1, 4]
+        assert flat.subtree_end.tolist() == [5, 4, 3, 4, 5]
+        assert flat.tip_start.tolist() == [0, 0, 0, 1, 2]
+        assert flat.tip_end.tolist() == [3, 2, 1, 2, 3]
+        assert flat.confidence[1] == 90
+        assert np.isnan(flat.confidence[0])
+
+    def test_tip_lca(self):
+        tree = Phylo.read(StringIO("(((a,b),c),d);"), "newick")
+        flat = FlatTree.from_phylo(tree)
+
+        assert flat.tip_lca(0, 1) == 2
+        assert flat.tip_lca(0, 2) == 1
+        assert flat.tip_lca(1, 3) == 0
+
+
+class TestTaxonCounts(object):
+    def test_count_distinct_taxa(self):
+        tree = Phylo.read(
+            StringIO("((sp1|a,sp1|b),(sp2|c,(sp1|d,sp3|e)));"), "newick"
+        )
+        flat = FlatTree.from_phylo(tree)
+        tip_taxa, _ = intern_taxa(flat.tip_names(), "|")
+
+        assert tip_taxa.tolist() == [0, 0, 1, 0, 2]
+        assert count_distinct_taxa(flat, tip_taxa).tolist() == [
+            3, 1, 1, 1, 3, 1, 2, 1, 1
+        ]
+
+
+class TestSubtreeView(object):
+    def test_sister_test_follows_collapsed_clades(self):
+        tree = Phylo.read(
+            StringIO("(((sp1|a,sp2|b)50,sp1|c)90,sp2|d);"), "newick"
+        )
+        flat = FlatTree.from_phylo(tree)
+
+        # (sp1|a,sp2|b) is collapsed, so sp1|a and sp1|c become sisters
+        # once sp2|b is pruned
+        candidate = SubtreeView(collapse_low_support_once(flat, 0, 80), 1)
+        assert not candidate.dups_are_sister([0, 2])
+        candidate.prune(1)
+        assert candidate.dups_are_sister([0, 2])
+
+    def test_sister_test_on_deep_caterpillar(self):
+        newick = "sp|t0"
+        for idx in range(1, 2000):
+            newick = f"({newick},sp|t{idx})"
+        flat = FlatTree.from_phylo(Phylo.read(StringIO(newick + ";"), "newick"))
+        candidate = SubtreeView(collapse_low_support_once(flat, 0, 80), 0)
+
+        assert candidate.dups_are_sister(list(range(1500)))
+        assert not candidate.dups_are_sister([0, 1, 3])
+        candidate.prune(2)
+        assert candidate.dups_are_sister([0, 1, 3])
+
+    def test_distances_match_cloned_subtree(self):
+        tree = Phylo.read(
+            StringIO(
+                "((((sp1|a:0.1,sp1|b:0.2)40:0.3,sp2|c:0.4)60:0.5,"
+                "sp1|d:0.6)95:0.7,sp2|e:0.8);"
+            ),
+            "newick",
+        )
+        flat = FlatTree.from_phylo(tree)
+        candidate = SubtreeView(collapse_low_support_once(flat, 0, 80), 1)
+        newtree = collapse_low_support_bipartitions(
+            clone_subtree_as_tree(flat.clades[1]), 80
+        )
+
+        for tip, name in enumerate(flat.tip_names()[:4]):
+            assert candidate.distance(tip) == TreeMixin.distance(newtree, name)
+
+        candidate.prune(2)
+        candidate.prune(3)
+        newtree.prune("sp2|c")
+        newtree.prune("sp1|d")
+
+        for tip, name in enumerate(flat.tip_names()[:2]):
+            assert candidate.distance(tip) == TreeMixin.distance(newtree, name)
+
+    def test_distances_with_missing_and_tiny_lengths(self):
+        tree = Phylo.read(
+            StringIO(
+                "(((sp1|a:0.1,sp1|b:0.2):0.3,sp2|c:0.7):0.11,"
+                "(sp3|d,sp4|e:1e-9):0.05,sp5|f);"
+            ),
+            "newick",
+        )
+        flat = FlatTree.from_phylo(tree)
+        view = SubtreeView(collapse_low_support_once(flat, 0, 80), 0)
+
+        for tip, name in enumerate(flat.tip_names()):
+            assert view.distance(tip) == TreeMixin.distance(tree, name)
+
+    def test_distances_on_deep_caterpillar_sum_each_branch_once(self, mocker):
+        newick = "sp|t0:1"
+        for idx in range(1, 2000):
+            newick = f"({newick},sp|t{idx}:1):0.5"
+        flat = FlatTree.from_phylo(Phylo.read(StringIO(newick + ";"), "newick"))
+        view = SubtreeView(collapse_low_support_once(flat, 0, 80), 0)
+        branch_length = mocker.spy(view, "branch_length")
+
+        distances = [view.distance(tip) for tip in range(2000)]
+
+        assert distances[0] == distances[1] == 1 + 0.5 * 1998
+        assert distances[1999] == 1
+        assert branch_length.call_count == len(flat.parent) - 1
+
+        # merging t1 into its parent resets the memoized distances
+        view.prune(0)
+        assert view.distance(1) == 1 + 0.5 * 1998
+        assert view.distance(2) == 1 + 0.5 * 1997
+
+    def test_clade_index_matches_flat_index(self):
+        tree = Phylo.read(
+            StringIO(
+                "((((sp1|a:0.1,sp1|b:0.2)40:0.3,sp2|c:0.4)60:0.5,"
+                "sp1|d:0.6)95:0.7,sp2|e:0.8);"
+            ),
+            "newick",
+        )
+        flat = FlatTree.from_phylo(tree)
+        cache = build_subtree_taxa_cache(tree, "|")
+        by_node = SubtreeView(collapse_low_support_once(flat, 0, 80), 1)
+        by_clade = SubtreeView(
+            collapse_low_support_once(cache, tree.root, 80), tree.root.clades[0]
+        )
+
+        assert by_clade.dups_are_sister([0, 1, 3]) == \
+            by_node.dups_are_sister([0, 1, 3])
+        for view in (by_node, by_clade):
+            view.prune(2)
+        for tip in range(4):
+            if tip != 2:
+                assert by_clade.distance(tip) == by_node.distance(tip)
+
+    def test_snap_tree_matches_collapse_all(self):
+        tree = Phylo.read(
+            StringIO(
+                "((((sp1|a:0.1,sp2|b:0.2)40:0.3,sp3|c:0.4)60:0.5,"
+                "(sp4|d:0.6,sp5|e:0.7)30:0.8)95:0.9,sp6|f:1.0);"
+            ),
+            "newick",
+        )
+        flat = FlatTree.from_phylo(tree)
+        collapsed_tree = collapse_low_support_once(flat, 0, 80)
+
+        for node in (1, 2):
+            expected = collapse_low_support_bipartitions(
+                clone_subtree_as_tree(flat.clades[node]), 80
+            )
+            newtree = build_snap_tree(collapsed_tree, node, [])
+            assert newtree.format("newick") == expected.format("newick")
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from Bio import SeqIO
+
+from orthosnap.fasta_index import (
+    INDEX_SUFFIX,
+    open_indexed_fasta,
+    scan_fasta_offsets,
+)
+
+
+FASTA = (
+    b">sp1|a first record\r\n"
+    b"ACG-T\r\n"
+    b"AC GT\r\n"
+    b">sp2|b\n"
+    b">sp3|c  trailing spaces  \n"
+    b"--AA\n"
+    b"\n"
+    b"CC\n"
+    b">sp4|d"
+)
+
+
+def _write(tmp_path, content=FASTA):
+    path = tmp_path / "genes.fa"
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestIndexedFasta(object):
+    def test_records_match_seqio(self, tmp_path):
+        path = _write(tmp_path)
+        expected = list(SeqIO.parse(path, "fasta"))
+        fasta_index = open_indexed_fasta(path)
+
+        assert fasta_index.ids == [record.id for record in expected]
+        for record in expected:
+            indexed = fasta_index[record.id]
+            assert indexed.id == record.id
+            assert indexed.description == record.description
+            assert str(indexed.seq) == str(record.seq)
+            assert fasta_index.ungapped_length(record.id) == \
+                len(record.seq) - record.seq.count("-")
+        assert "sp5|e" not in fasta_index
+
+    def test_index_is_persisted_and_reused(self, tmp_path, mocker):
+        path = _write(tmp_path)
+        open_indexed_fasta(path)
+        assert os.path.exists(path + INDEX_SUFFIX)
+
+        scan = mocker.patch("orthosnap.fasta_index.scan_fasta_offsets")
+        fasta_index = open_indexed_fasta(path)
+        assert not scan.called
+        assert str(fasta_index["sp3|c"].seq) == "--AACC"
+
+    def test_stale_index_is_rebuilt(self, tmp_path):
+        path = _write(tmp_path)
+        open_indexed_fasta(path)
+        _write(tmp_path, b">sp9|z\nGGG\n")
+
+        fasta_index = open_indexed_fasta(path)
+        assert fasta_index.ids == ["sp9|z"]
+        assert str(fasta_index["sp9|z"].seq) == "GGG"
+
+    def test_scan_without_records(self):
+        assert scan_fasta_offsets(b"") == []
+
+    @pytest.mark.parametrize(
+        "disabled", [(), ("_copy_file_range",), ("_copy_file_range", "_sendfile")]
+    )
+    def test_copy_records_is_verbatim(self, tmp_path, mocker, disabled):
+        for name in disabled:
+            mocker.patch(f"orthosnap.fasta_index.{name}", None)
+        path = _write(tmp_path)
+        fasta_index = open_indexed_fasta(path, raw_output=True)
+        output = tmp_path / "subgroup.fa"
+
+        fasta_index.copy_records(["sp3|c", "sp1|a", "sp4|d"], str(output))
+
+        assert output.read_bytes() == (
+            b">sp3|c  trailing spaces  \n--AA\n\nCC\n"
+            b">sp1|a first record\r\nACG-T\r\nAC GT\r\n"
+            b">sp4|d\n"
+        )
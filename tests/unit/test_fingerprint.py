@@ -0,0 +1,105 @@
+import hashlib
+import os
+
+import pytest
+
+from orthosnap import fingerprint
+from orthosnap.fingerprint import FingerprintStore, file_digest, input_digests
+
+
+def _write(tmp_path, content: bytes, name="genes.fa", age_seconds=60):
+    path = tmp_path / name
+    path.write_bytes(content)
+    stat = os.stat(path)
+    # files modified just now are not remembered
+    mtime_ns = stat.st_mtime_ns - age_seconds * 10**9
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+class TestFileDigest(object):
+    def test_full_digests(self, tmp_path):
+        path = _write(tmp_path, b">sp1|a\nACGT\n")
+
+        assert file_digest(path) == hashlib.sha256(b">sp1|a\nACGT\n").hexdigest()
+        assert (
+            file_digest(path, "blake2b")
+            == hashlib.blake2b(b">sp1|a\nACGT\n").hexdigest()
+        )
+
+    def test_sampled_digest(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fingerprint, "_SAMPLE_SIZE", 4)
+        monkeypatch.setattr(fingerprint, "_SAMPLE_COUNT", 3)
+        small = _write(tmp_path, b"0123456789", name="small.fa")
+        expected = hashlib.blake2b((10).to_bytes(8, "little") + b"0123456789")
+        assert file_digest(small, "sampled") == expected.hexdigest()
+
+        content = bytes(range(100))
+        digest = file_digest(_write(tmp_path, content), "sampled")
+        # samples cover bytes 0-3, 48-51 and 96-99
+        unsampled = content[:10] + b"x" + content[11:]
+        sampled = content[:49] + b"x" + content[50:]
+        assert file_digest(_write(tmp_path, unsampled), "sampled") == digest
+        assert file_digest(_write(tmp_path, sampled), "sampled") != digest
+
+    def test_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            file_digest(_write(tmp_path, b"ACGT"), "md5")
+
+    def test_input_digest_names(self, tmp_path):
+        tree = _write(tmp_path, b"(a,b);", name="genes.tre")
+        fasta = _write(tmp_path, b">a\nA\n>b\nC\n")
+
+        assert set(input_digests(tree, fasta, "sampled")) == {
+            "tree_sampled_blake2b",
+            "fasta_sampled_blake2b",
+        }
+
+
+class TestFingerprintStore(object):
+    def test_unchanged_file_is_not_rehashed(self, tmp_path, mocker):
+        store = FingerprintStore(str(tmp_path / "store" / "fingerprints.json"))
+        path = _write(tmp_path, b">sp1|a\nACGT\n")
+        digest = file_digest(path, store=store)
+
+        full_digest = mocker.spy(fingerprint, "_full_digest")
+        assert file_digest(path, store=store) == digest
+        assert full_digest.call_count == 0
+
+        _write(tmp_path, b">sp1|a\nACGTT\n")
+        assert file_digest(path, store=store) != digest
+        assert full_digest.call_count == 1
+
+    def test_modes_are_stored_apart(self, tmp_path):
+        store = FingerprintStore(str(tmp_path / "fingerprints.json"))
+        path = _write(tmp_path, b"ACGT")
+
+        assert file_digest(path, "sha256", store) != file_digest(path, "blake2b", store)
+        assert file_digest(path, "sha256", store) == hashlib.sha256(b"ACGT").hexdigest()
+
+    def test_recently_modified_file_is_not_stored(self, tmp_path):
+        store = FingerprintStore(str(tmp_path / "fingerprints.json"))
+        path = _write(tmp_path, b"ACGT", age_seconds=0)
+
+        file_digest(path, store=store)
+
+        assert store.get(path, "sha256", os.stat(path)) is None
+
+    def test_oldest_entries_are_dropped(self, tmp_path):
+        store = FingerprintStore(str(tmp_path / "fingerprints.json"), max_entries=2)
+        paths = [_write(tmp_path, b"ACGT", name=f"{idx}.fa") for idx in range(3)]
+        for path in paths:
+            file_digest(path, store=store)
+
+        assert store.get(paths[0], "sha256", os.stat(paths[0])) is None
+        assert store.get(paths[2], "sha256", os.stat(paths[2])) is not None
+
+    def test_default_location(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        assert FingerprintStore.default().path == str(
+            tmp_path / "orthosnap" / "fingerprints.json"
+        )
+        assert FingerprintStore.default("results").path == os.path.join(
+            "results", "fingerprints.json"
+        )
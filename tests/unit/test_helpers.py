@@ -2,52 +2,36 @@ from collections import Counter
 import copy
 from io import StringIO
 from pathlib import Path
+import shutil
 import pytest
 
 from Bio import Phylo
 from Bio import SeqIO
+from Bio.Phylo.BaseTree import TreeMixin
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 
 from orthosnap.helper import (
     build_subtree_taxa_cache,
-    build_clade_terminal_set_index,
     check_if_single_copy,
     clone_subtree_as_tree,
     collapse_low_support_bipartitions,
-    determine_if_dups_are_sister,
+    collapse_low_support_once,
     get_all_tips_and_taxa_names,
-    get_tips_and_taxa_names_and_taxa_counts_from_subtrees,
-    get_subtree_tips,
-    inparalog_to_keep_determination,
-    build_terminal_parent_maps,
-    prune_terminal_fast,
-    prune_subtree,
-    read_input_files,
-    update_clade_terminal_set_index_for_pruned_tips,
+    group_duplicate_taxa,
+    intern_taxa,
+    load_inputs,
+    read_tree,
+    resolve_inparalogs,
+    ungapped_sequence_lengths,
     write_output_fasta_and_account_for_assigned_tips_single_copy_case,
 )
-from orthosnap.helper import InparalogToKeep
+from orthosnap.helper import InparalogToKeep, SubtreeTaxaCache, SubtreeView
+from orthosnap.orthosnap import _extract_subgroups
 
 here = Path(__file__)
 
 
-def _index_to_terminal_sets(index):
-    bit_to_tip = {bit: tip for tip, bit in index["tip_bits"].items()}
-    terminal_sets = set()
-
-    for mask in index["masks"]:
-        members = set()
-        remaining = mask
-        while remaining:
-            lowest_bit = remaining & -remaining
-            members.add(bit_to_tip[lowest_bit])
-            remaining ^= lowest_bit
-        terminal_sets.add(frozenset(members))
-
-    return terminal_sets
-
-
 class TestCollapseLowSupportBipartitions(object):
     def test_collapses_bipartitions(self):
         ## setup
@@ -94,75 +78,6 @@ class TestCloneSubtreeAsTree(object):
         assert len(cloned_tree.root.clades) == original_children - 1
 
 
-class TestDetermineIfDupsAreSister(object):
-    def test_determine_if_dups_are_sister_true(self):
-        tree = Phylo.read(StringIO("((sp|a,sp|b),sp|c);"), "newick")
-        clade_terminal_sets = build_clade_terminal_set_index(tree)
-
-        assert determine_if_dups_are_sister(["sp|a", "sp|b"], clade_terminal_sets)
-
-    def test_determine_if_dups_are_sister_false(self):
-        tree = Phylo.read(StringIO("((sp|a,sp|b),sp|c);"), "newick")
-        clade_terminal_sets = build_clade_terminal_set_index(tree)
-
-        assert not determine_if_dups_are_sister(
-            ["sp|a", "sp|c"], clade_terminal_sets
-        )
-
-
-class TestUpdateCladeTerminalSetIndexForPrunedTips(object):
-    def test_incremental_index_matches_rebuild(self):
-        tree = Phylo.read(StringIO("(((sp|a,sp|b),sp|c),sp|d);"), "newick")
-        before = build_clade_terminal_set_index(tree)
-
-        tree.prune("sp|d")
-        tree.prune("sp|c")
-        rebuilt = build_clade_terminal_set_index(tree)
-
-        updated = update_clade_terminal_set_index_for_pruned_tips(
-            before, ["sp|d", "sp|c"]
-        )
-
-        assert _index_to_terminal_sets(updated) == _index_to_terminal_sets(rebuilt)
-
-    def test_repeated_pruned_tip_is_idempotent(self):
-        tree = Phylo.read(StringIO("(((sp|a,sp|b),sp|c),sp|d);"), "newick")
-        before = build_clade_terminal_set_index(tree)
-
-        once = update_clade_terminal_set_index_for_pruned_tips(
-            copy.deepcopy(before), ["sp|d"]
-        )
-        repeated = update_clade_terminal_set_index_for_pruned_tips(
-            copy.deepcopy(before), ["sp|d", "sp|d"]
-        )
-
-        assert repeated == once
-
-    def test_missing_pruned_tip_does_not_change_index(self):
-        tree = Phylo.read(StringIO("(((sp|a,sp|b),sp|c),sp|d);"), "newick")
-        before = build_clade_terminal_set_index(tree)
-
-        updated = update_clade_terminal_set_index_for_pruned_tips(
-            copy.deepcopy(before), ["sp|not_present"]
-        )
-
-        assert updated == before
-
-    def test_prune_to_singleton_matches_rebuild(self):
-        tree = Phylo.read(StringIO("((sp|a,sp|b),sp|c);"), "newick")
-        before = build_clade_terminal_set_index(tree)
-
-        tree.prune("sp|b")
-        tree.prune("sp|c")
-        rebuilt = build_clade_terminal_set_index(tree)
-
-        updated = update_clade_terminal_set_index_for_pruned_tips(
-            before, ["sp|b", "sp|c"]
-        )
-
-        assert _index_to_terminal_sets(updated) == _index_to_terminal_sets(rebuilt)
-
-
 # class TestDetermineIfDupsAreSister(object):
 #     def test_determine_if_dups_are_sister_true(self):
 #         ## setup
@@ -280,166 +195,106 @@ class TestGetAllTipsAndTaxaNames(object):
         assert set(all_tips) == set(expected_all_tips)
 
 
-class TestGetTipsAndTaxaNamesAndTaxaCountsFromSubtrees(object):
-    def test_get_all_tips_and_taxa_names1(self):
-        ## setup
+class TestBuildSubtreeTaxaCache(object):
+    def test_cache_matches_clade_terminals(self):
         tree = Phylo.read(
             f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile",
             "newick",
         )
         tree.root_at_midpoint()
-        expected_taxa_from_terms = [
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_fischeri_NRRL181",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_fischeri_NRRL181",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_fischeri_NRRL181",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_fischeri_NRRL181",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_fischeri_NRRL181",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_awamori_IFM_58123",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_oerlinghausenensis_CBS139183",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_fumigatus_Af293",
-            "Aspergillus_fischeri_NRRL181",
-            "Aspergillus_niger_CBS_513.88",
-            "Aspergillus_awamori_IFM_58123",
-        ]
-        expected_terms = [
-            "Aspergillus_awamori_IFM_58123|GCB22318.1",
-            "Aspergillus_fumigatus_Af293|EAL93843.2",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_04905-RA",
-            "Aspergillus_fischeri_NRRL181|XP_001261009.1",
-            "Aspergillus_niger_CBS_513.88|XP_001397083.2",
-            "Aspergillus_awamori_IFM_58123|GCB27653.1",
-            "Aspergillus_niger_CBS_513.88|XP_001397349.2",
-            "Aspergillus_awamori_IFM_58123|GCB25420.1",
-            "Aspergillus_fumigatus_Af293|EAL87116.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_03570-RA",
-            "Aspergillus_fischeri_NRRL181|XP_001265570.1",
-            "Aspergillus_niger_CBS_513.88|XP_001390417.1",
-            "Aspergillus_niger_CBS_513.88|XP_001390415.2",
-            "Aspergillus_awamori_IFM_58123|GCB24160.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_08472-RA",
-            "Aspergillus_fumigatus_Af293|EAL94045.1",
-            "Aspergillus_fischeri_NRRL181|XP_001261225.1",
-            "Aspergillus_niger_CBS_513.88|XP_001402298.1",
-            "Aspergillus_awamori_IFM_58123|GCB23392.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_10038-RA",
-            "Aspergillus_fumigatus_Af293|EAL84942.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_06972-RA",
-            "Aspergillus_fumigatus_Af293|EAL85274.1",
-            "Aspergillus_fischeri_NRRL181|XP_001262055.1",
-            "Aspergillus_niger_CBS_513.88|XP_001398067.1",
-            "Aspergillus_awamori_IFM_58123|GCB24888.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_09150-RA",
-            "Aspergillus_fumigatus_Af293|EAL84262.1",
-            "Aspergillus_fischeri_NRRL181|XP_001267441.1",
-            "Aspergillus_niger_CBS_513.88|XP_001400898.1",
-            "Aspergillus_awamori_IFM_58123|GCB19337.1",
-        ]
-        expected_counts_of_taxa_from_terms = Counter(
-            {
-                "Aspergillus_awamori_IFM_58123": 7,
-                "Aspergillus_niger_CBS_513.88": 7,
-                "Aspergillus_fumigatus_Af293": 6,
-                "Aspergillus_oerlinghausenensis_CBS139183": 6,
-                "Aspergillus_fischeri_NRRL181": 5,
-            }
-        )
-        expected_counts = [7, 6, 6, 5, 7]
+        cache = build_subtree_taxa_cache(tree, "|")
 
-        ## execution
         for inter in tree.get_nonterminals()[1:]:
-            (
-                taxa_from_terms,
-                terms,
-                counts_of_taxa_from_terms,
-                counts,
-            ) = get_tips_and_taxa_names_and_taxa_counts_from_subtrees(inter, "|")
-            break
+            terms = [term.name for term in inter.get_terminals()]
+            counts_of_taxa_from_terms = Counter(
+                term.split("|", 1)[0] for term in terms
+            )
+            taxon_counts = cache.get_taxon_counts(inter)
 
-        ## check results
-        assert set(taxa_from_terms) == set(expected_taxa_from_terms)
-        assert set(terms) == set(expected_terms)
-        assert counts_of_taxa_from_terms == expected_counts_of_taxa_from_terms
-        assert counts == expected_counts
+            assert cache.get_terms(inter) == terms
+            assert {
+                cache.taxon_names[taxon]: int(count)
+                for taxon, count in enumerate(taxon_counts)
+                if count
+            } == counts_of_taxa_from_terms
 
+    def test_cache_uses_contiguous_tip_intervals(self):
+        tree = Phylo.read(
+            StringIO("((sp1|a,sp2|b),(sp1|c,(sp2|d,sp3|e)));"), "newick"
+        )
+        cache = build_subtree_taxa_cache(tree, "|")
+        left, right = tree.root.clades
+
+        assert cache.terms == ["sp1|a", "sp2|b", "sp1|c", "sp2|d", "sp3|e"]
+        assert cache.intervals[left] == (0, 2)
+        assert cache.intervals[right] == (2, 5)
+        assert cache.get_taxon_counts(left).max() == 1
+        assert cache.get_taxon_ids(right).tolist() == [0, 1, 2]
+        assert cache.get_taxon_counts(tree.root).tolist() == [2, 2, 1]
+
+        assigned_flags = bytearray(len(cache.terms))
+        assigned_flags[cache.tip_positions["sp1|a"]] = 1
+        assert not cache.is_disjoint(left, assigned_flags)
+        assert cache.is_disjoint(right, assigned_flags)
+
+    def test_cache_handles_deep_caterpillar_tree(self):
+        newick = "sp0|t0"
+        for idx in range(1, 3000):
+            newick = f"({newick},sp{idx % 7}|t{idx})"
+        tree = Phylo.read(StringIO(newick + ";"), "newick")
 
-class TestBuildSubtreeTaxaCache(object):
-    def test_cache_matches_subtree_function(self):
+        cache = build_subtree_taxa_cache(tree, "|")
+
+        assert cache.intervals[tree.root] == (0, 3000)
+        assert cache.internal_counts[tree.root] == 2999
+        assert cache.taxon_names == [f"sp{idx}" for idx in range(7)]
+        assert (cache.get_taxon_counts(tree.root) > 0).sum() == 7
+
+
+class TestInternTaxa(object):
+    def test_intern_taxa_numbers_taxa_by_first_appearance(self):
+        taxon_ids, taxon_names = intern_taxa(
+            ["sp2|a", "sp1|b", "sp2|c", "sp10|d"], "|"
+        )
+
+        assert taxon_ids.tolist() == [0, 1, 0, 2]
+        assert taxon_names == ["sp2", "sp1", "sp10"]
+
+    def test_group_duplicate_taxa(self):
+        taxon_ids, _ = intern_taxa(
+            ["sp2|a", "sp1|b", "sp3|c", "sp1|d", "sp2|e", "sp1|f"], "|"
+        )
+
+        assert group_duplicate_taxa(taxon_ids) == [[0, 4], [1, 3, 5]]
+
+
+class TestExtractSubgroupsScan(object):
+    def test_emitted_subtree_is_not_rescanned(self, mocker):
         tree = Phylo.read(
-            f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile",
+            StringIO(
+                "(((sp1|a,sp2|b),(sp3|c,sp4|d)),((sp1|e,sp2|f),(sp3|g,sp4|h)));"
+            ),
             "newick",
         )
-        tree.root_at_midpoint()
-        cache = build_subtree_taxa_cache(tree, "|")
+        counts_spy = mocker.spy(SubtreeTaxaCache, "get_taxon_counts")
+
+        extraction = _extract_subgroups(
+            tree=tree,
+            fasta="input.fa",
+            fasta_dict=dict(),
+            support=80,
+            occupancy=4,
+            snap_trees=False,
+            inparalog_to_keep=InparalogToKeep.longest_seq_len,
+            output_path="./",
+            report_inparalog_handling=False,
+            delimiter="|",
+            write_outputs=False,
+        )
 
-        for inter in tree.get_nonterminals()[1:]:
-            (
-                _,
-                terms,
-                counts_of_taxa_from_terms,
-                counts,
-            ) = get_tips_and_taxa_names_and_taxa_counts_from_subtrees(inter, "|")
-            (
-                cached_terms,
-                cached_terms_set,
-                cached_counts_of_taxa_from_terms,
-                cached_counts,
-            ) = cache[inter]
-
-            assert cached_terms == terms
-            assert cached_terms_set == set(terms)
-            assert cached_counts_of_taxa_from_terms == counts_of_taxa_from_terms
-            assert cached_counts == counts
-
-
-class TestGetSubtreeTips(object):
-    def test_taxon_prefix_collision_is_not_matched(self):
-        terms = ["sp1|geneA", "sp10|geneB", "sp1|geneC"]
-        _, dups = get_subtree_tips(terms, "sp1", "|")
-        assert dups == ["sp1|geneA", "sp1|geneC"]
-
-
-class TestFastTerminalPrune(object):
-    def test_fast_prune_matches_sequential_prune_for_terminals(self):
-        tree_fast = Phylo.read(StringIO("(((a:1,b:1):1,c:1):1,d:1);"), "newick")
-        tree_seq = Phylo.read(StringIO("(((a:1,b:1):1,c:1):1,d:1);"), "newick")
-
-        terminal_lookup, parent_lookup = build_terminal_parent_maps(tree_fast)
-        prune_terminal_fast(tree_fast, "b", terminal_lookup, parent_lookup)
-        prune_terminal_fast(tree_fast, "d", terminal_lookup, parent_lookup)
-        tree_seq.prune("b")
-        tree_seq.prune("d")
-
-        assert tree_fast.format("newick") == tree_seq.format("newick")
+        assert extraction["subgroup_counter"] == 2
+        # only the two emitted clades are evaluated, not their four children
+        assert counts_spy.call_count == 2
 
 
 # class TestGetSubtreeTips(object):
@@ -903,146 +758,21 @@ class TestFastTerminalPrune(object):
 #         assert terms == expected_terms
 
 
-class TestPruneSubtree(object):
-    def test_prune_subtree(self):
-        ## setup
-        tree = Phylo.read(
-            f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile",
-            "newick",
-        )
-        tree.root_at_midpoint()
-        newtree = copy.deepcopy(tree)
-        tips_to_prune = ["Aspergillus_awamori_IFM_58123|GCB22318.1"]
-        for tip in tips_to_prune:
-            tree.prune(tip)
-
-        ## execution
-        all_tips = [
-            "Aspergillus_fumigatus_Af293|EAL84942.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_10038-RA",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_06972-RA",
-            "Aspergillus_fumigatus_Af293|EAL85274.1",
-            "Aspergillus_fischeri_NRRL181|XP_001262055.1",
-            "Aspergillus_niger_CBS_513.88|XP_001398067.1",
-            "Aspergillus_awamori_IFM_58123|GCB24888.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_09150-RA",
-            "Aspergillus_fumigatus_Af293|EAL84262.1",
-            "Aspergillus_fischeri_NRRL181|XP_001267441.1",
-            "Aspergillus_niger_CBS_513.88|XP_001400898.1",
-            "Aspergillus_awamori_IFM_58123|GCB19337.1",
-            "Aspergillus_niger_CBS_513.88|XP_001397349.2",
-            "Aspergillus_awamori_IFM_58123|GCB25420.1",
-            "Aspergillus_fumigatus_Af293|EAL87116.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_03570-RA",
-            "Aspergillus_fischeri_NRRL181|XP_001265570.1",
-            "Aspergillus_niger_CBS_513.88|XP_001390417.1",
-            "Aspergillus_niger_CBS_513.88|XP_001390415.2",
-            "Aspergillus_awamori_IFM_58123|GCB24160.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_08472-RA",
-            "Aspergillus_fumigatus_Af293|EAL94045.1",
-            "Aspergillus_fischeri_NRRL181|XP_001261225.1",
-            "Aspergillus_niger_CBS_513.88|XP_001402298.1",
-            "Aspergillus_awamori_IFM_58123|GCB23392.1",
-            "Aspergillus_fumigatus_Af293|EAL93843.2",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_04905-RA",
-            "Aspergillus_fischeri_NRRL181|XP_001261009.1",
-            "Aspergillus_niger_CBS_513.88|XP_001397083.2",
-            "Aspergillus_awamori_IFM_58123|GCB27653.1",
-            "Aspergillus_niger_CBS_513.88|XP_001391581.1",
-            "Aspergillus_awamori_IFM_58123|GCB17486.1-duplicate1",
-            "Aspergillus_awamori_IFM_58123|GCB17486.1-duplicate",
-            "Aspergillus_awamori_IFM_58123|GCB17486.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_05774-RA",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_05774-RA-duplicate",
-            "Aspergillus_fumigatus_Af293|EAL85095.2-duplicate",
-            "Aspergillus_fumigatus_Af293|EAL85095.2",
-            "Aspergillus_fischeri_NRRL181|XP_001261692.1",
-            "Aspergillus_niger_CBS_513.88|XP_001401336.1",
-            "Aspergillus_awamori_IFM_58123|GCB19008.1",
-            "Aspergillus_awamori_IFM_58123|GCB22318.1",
-        ]
-        terms = [
-            "Aspergillus_fumigatus_Af293|EAL84942.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_10038-RA",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_06972-RA",
-            "Aspergillus_fumigatus_Af293|EAL85274.1",
-            "Aspergillus_fischeri_NRRL181|XP_001262055.1",
-            "Aspergillus_niger_CBS_513.88|XP_001398067.1",
-            "Aspergillus_awamori_IFM_58123|GCB24888.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_09150-RA",
-            "Aspergillus_fumigatus_Af293|EAL84262.1",
-            "Aspergillus_fischeri_NRRL181|XP_001267441.1",
-            "Aspergillus_niger_CBS_513.88|XP_001400898.1",
-            "Aspergillus_awamori_IFM_58123|GCB19337.1",
-            "Aspergillus_niger_CBS_513.88|XP_001397349.2",
-            "Aspergillus_awamori_IFM_58123|GCB25420.1",
-            "Aspergillus_fumigatus_Af293|EAL87116.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_03570-RA",
-            "Aspergillus_fischeri_NRRL181|XP_001265570.1",
-            "Aspergillus_niger_CBS_513.88|XP_001390417.1",
-            "Aspergillus_niger_CBS_513.88|XP_001390415.2",
-            "Aspergillus_awamori_IFM_58123|GCB24160.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_08472-RA",
-            "Aspergillus_fumigatus_Af293|EAL94045.1",
-            "Aspergillus_fischeri_NRRL181|XP_001261225.1",
-            "Aspergillus_niger_CBS_513.88|XP_001402298.1",
-            "Aspergillus_awamori_IFM_58123|GCB23392.1",
-            "Aspergillus_fumigatus_Af293|EAL93843.2",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_04905-RA",
-            "Aspergillus_fischeri_NRRL181|XP_001261009.1",
-            "Aspergillus_niger_CBS_513.88|XP_001397083.2",
-            "Aspergillus_awamori_IFM_58123|GCB27653.1",
-            "Aspergillus_niger_CBS_513.88|XP_001391581.1",
-            "Aspergillus_awamori_IFM_58123|GCB17486.1-duplicate1",
-            "Aspergillus_awamori_IFM_58123|GCB17486.1-duplicate",
-            "Aspergillus_awamori_IFM_58123|GCB17486.1",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_05774-RA",
-            "Aspergillus_oerlinghausenensis_CBS139183|A_oerling_CBS139183_05774-RA-duplicate",
-            "Aspergillus_fumigatus_Af293|EAL85095.2-duplicate",
-            "Aspergillus_fumigatus_Af293|EAL85095.2",
-            "Aspergillus_fischeri_NRRL181|XP_001261692.1",
-            "Aspergillus_niger_CBS_513.88|XP_001401336.1",
-            "Aspergillus_awamori_IFM_58123|GCB19008.1",
-        ]
-
-        prune_subtree(all_tips, terms, newtree)
-
-        ## check results
-        for term0, term1 in zip(tree.get_terminals(), newtree.get_terminals()):
-            assert term0.name == term1.name
-            assert term0.branch_length == term1.branch_length
-
-
-class TestReadInputFiles(object):
-    def test_read_input_files(self):
-        ## setup
-        expected_tree = Phylo.read(
-            f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile",
-            "newick",
-        )
-        expected_tree.root_at_midpoint()
-        expected_fasta = SeqIO.to_dict(
-            SeqIO.parse(
-                f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit",
-                "fasta",
-            )
-        )
-
-        ## execution
-        fasta = f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit"
+class TestReadTree(object):
+    def test_read_tree_skips_fasta(self, mocker):
         tree = (
             f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile"
         )
+        expected_tree = Phylo.read(tree, "newick")
+        expected_tree.root_at_midpoint()
+        fasta_parse = mocker.spy(SeqIO, "parse")
 
-        (tree, fasta) = read_input_files(tree, fasta, False)
+        result = read_tree(tree, False)
 
-        ## check results
-        for term0, term1 in zip(tree.get_terminals(), expected_tree.get_terminals()):
+        assert fasta_parse.call_count == 0
+        for term0, term1 in zip(result.get_terminals(), expected_tree.get_terminals()):
             assert term0.name == term1.name
             assert term0.branch_length == term1.branch_length
-        for key, value in fasta.items():
-            assert key in expected_fasta.keys()
-            assert value.seq == expected_fasta[key].seq
 
 
 # class TestWriteOutputFastaAndAccountForAssignedTipsSingleCopyCase(object):
@@ -1187,50 +917,97 @@ class TestDetermineIfInputTreeIsSingleCopy(object):
 
 
 class TestInparalogMedianSelection(object):
-    def test_median_seq_len_more_than_two_duplicates(self):
-        newtree = Phylo.read(StringIO("(sp|g1:0.1,sp|g2:0.2,sp|g3:0.3);"), "newick")
-        dups = ["sp|g1", "sp|g2", "sp|g3"]
-        terms = dups.copy()
+    @staticmethod
+    def _resolve(inparalog_to_keep):
+        tree = Phylo.read(StringIO("(sp|g1:0.1,sp|g2:0.2,sp|g3:0.3);"), "newick")
         fasta_dict = {
             "sp|g1": SeqRecord(Seq("A"), id="sp|g1"),
             "sp|g2": SeqRecord(Seq("AA"), id="sp|g2"),
             "sp|g3": SeqRecord(Seq("AAA"), id="sp|g3"),
         }
+        cache = build_subtree_taxa_cache(tree, "|")
+        view = SubtreeView(collapse_low_support_once(cache, tree.root, 80), tree.root)
         inparalog_handling = dict()
 
-        _, updated_terms, inparalog_handling, pruned_tips = inparalog_to_keep_determination(
-            newtree,
+        pruned_groups = resolve_inparalogs(
+            view,
+            cache.terms,
+            cache.taxon_ids,
             fasta_dict,
-            dups,
-            terms,
-            InparalogToKeep.median_seq_len,
+            inparalog_to_keep,
             inparalog_handling,
+            False,
+            dict(),
         )
 
-        assert updated_terms == ["sp|g2"]
+        return pruned_groups, inparalog_handling
+
+    def test_median_seq_len_more_than_two_duplicates(self):
+        pruned_groups, inparalog_handling = self._resolve(
+            InparalogToKeep.median_seq_len
+        )
+
+        assert pruned_groups == [["sp|g1", "sp|g3"]]
         assert inparalog_handling["sp|g2"] == ["sp|g1", "sp|g3"]
-        assert pruned_tips == ["sp|g1", "sp|g3"]
+
+    def test_branch_lengths_match_tree_distance(self):
+        tree = Phylo.read(
+            StringIO("((sp|g1:0.1,sp|g2:0.2)95:0.3,(sp|g3:1e-9,sp|g4)90:0.7);"),
+            "newick",
+        )
+        cache = build_subtree_taxa_cache(tree, "|")
+        view = SubtreeView(collapse_low_support_once(cache, tree.root, 80), tree.root)
+
+        for tip, name in enumerate(cache.terms):
+            assert view.distance(tip) == TreeMixin.distance(tree, name)
 
     def test_median_branch_len_more_than_two_duplicates(self):
-        newtree = Phylo.read(StringIO("(sp|g1:0.1,sp|g2:0.2,sp|g3:0.3);"), "newick")
-        dups = ["sp|g1", "sp|g2", "sp|g3"]
-        terms = dups.copy()
+        pruned_groups, inparalog_handling = self._resolve(
+            InparalogToKeep.median_branch_len
+        )
+
+        assert pruned_groups == [["sp|g1", "sp|g3"]]
+        assert inparalog_handling["sp|g2"] == ["sp|g1", "sp|g3"]
+
+
+class TestUngappedSequenceLengths(object):
+    def test_matches_gap_stripped_length(self):
         fasta_dict = {
-            "sp|g1": SeqRecord(Seq("A"), id="sp|g1"),
-            "sp|g2": SeqRecord(Seq("AA"), id="sp|g2"),
-            "sp|g3": SeqRecord(Seq("AAA"), id="sp|g3"),
+            "sp|a": SeqRecord(Seq("A-C--GT-"), id="sp|a"),
+            "sp|b": SeqRecord(Seq("----"), id="sp|b"),
+            "sp|c": SeqRecord(Seq("ACGT"), id="sp|c"),
         }
-        inparalog_handling = dict()
 
-        _, updated_terms, inparalog_handling, pruned_tips = inparalog_to_keep_determination(
-            newtree,
-            fasta_dict,
-            dups,
-            terms,
-            InparalogToKeep.median_branch_len,
-            inparalog_handling,
-        )
+        assert ungapped_sequence_lengths(fasta_dict) == {
+            "sp|a": 4,
+            "sp|b": 0,
+            "sp|c": 4,
+        }
 
-        assert updated_terms == ["sp|g2"]
-        assert inparalog_handling["sp|g2"] == ["sp|g1", "sp|g3"]
-        assert pruned_tips == ["sp|g1", "sp|g3"]
+
+class TestLoadInputs(object):
+    def test_loaded_inputs_match_separate_reads(self, tmp_path, mocker):
+        # copies, so that no tree index sidecar is shared with other tests
+        samples = here.parent.parent / "samples"
+        tree = str(tmp_path / "OG0000010.renamed.fa.mafft.clipkit.treefile")
+        fasta = str(tmp_path / "OG0000010.renamed.fa.mafft.clipkit")
+        shutil.copy(samples / "OG0000010.renamed.fa.mafft.clipkit.treefile", tree)
+        shutil.copy(samples / "OG0000010.renamed.fa.mafft.clipkit", fasta)
+        expected_tree = read_tree(tree, False)
+        expected_fasta = SeqIO.to_dict(SeqIO.parse(fasta, "fasta"))
+        tree_read = mocker.spy(Phylo, "read")
+        fasta_parse = mocker.spy(SeqIO, "parse")
+
+        inputs = load_inputs(tree, fasta, "|")
+
+        assert inputs.unique_taxa == 5
+        assert list(inputs.fasta_dict) == list(expected_fasta)
+        rooted_tree = inputs.get_tree(rooted=False)
+        assert rooted_tree.format("newick") == expected_tree.format("newick")
+        # parsing and midpoint rooting happen once, however often the
+        # tree and records are requested
+        assert inputs.get_tree(rooted=False) is rooted_tree
+        assert inputs.fasta_dict is inputs.fasta_dict
+        assert len(inputs.records) == len(expected_fasta)
+        assert tree_read.call_count == 1
+        assert fasta_parse.call_count == 1
@@ -0,0 +1,127 @@
+from copy import deepcopy
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from Bio import Phylo
+
+from orthosnap.flat_tree import FlatTree
+from orthosnap.helper import build_snap_tree, collapse_low_support_once
+from orthosnap.induced_subtrees import InducedSubtrees
+
+here = Path(__file__)
+
+SAMPLE_TREE = f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile"
+
+
+def _clade_signature(clade):
+    return (
+        clade.name,
+        repr(clade.branch_length),
+        clade.confidence,
+        tuple(_clade_signature(child) for child in clade.clades),
+    )
+
+
+def _keep_terminals(tree, tips):
+    pruned_tree = deepcopy(tree)
+    for terminal in list(pruned_tree.get_terminals()):
+        if terminal.name not in tips:
+            pruned_tree.prune(terminal)
+    return pruned_tree
+
+
+def _prune_terminals(tree, tips):
+    pruned_tree = deepcopy(tree)
+    terminals = {terminal.name: terminal for terminal in pruned_tree.get_terminals()}
+    for tip in tips:
+        pruned_tree.prune(terminals[tip])
+    return pruned_tree
+
+
+class TestInducedSubtrees(object):
+    def test_subtrees_match_tree_prune(self):
+        tree = Phylo.read(SAMPLE_TREE, "newick")
+        tree.root_at_midpoint()
+        names = [term.name for term in tree.get_terminals()]
+        induced = InducedSubtrees.from_tree(tree)
+
+        for tips in [names, names[:1], names[::3], names[5:17], names[-2:]]:
+            subtree = induced.subtree(tips)
+            expected = _keep_terminals(tree, set(tips))
+            assert _clade_signature(subtree.root) == _clade_signature(expected.root)
+            assert subtree.rooted == expected.rooted
+
+    @pytest.mark.parametrize(
+        "newick, tips",
+        [
+            # the root and an inner node are spliced out, in that order
+            ("((a:0.1,(b:0.2,c:0.3):0.4):0.5,(d:0.6,e:0.7):0.8)x:0.9;", ["b", "c"]),
+            ("(a:1,(b:1e-9,(c:1,(d:1e5,e:3)x:2):1):1,f);", ["b", "e"]),
+            # missing branch lengths and a multifurcation
+            ("(a,(b:1,c,d:2):1,(e:1,f:1));", ["b", "d", "f"]),
+            # unary nodes go through Tree.prune
+            ("((a:1,(b:1):1):1,c:1);", ["a", "b"]),
+        ],
+    )
+    def test_subtree_matches_tree_prune_on_chains(self, newick, tips):
+        tree = Phylo.read(StringIO(newick), "newick")
+
+        subtree = InducedSubtrees.from_tree(tree).subtree(tips)
+
+        expected = _keep_terminals(tree, set(tips))
+        assert _clade_signature(subtree.root) == _clade_signature(expected.root)
+
+    def test_subtree_matches_tree_prune_on_long_chains(self):
+        newick = "t0:0.1"
+        for idx in range(1, 120):
+            newick = f"({newick},t{idx}:{idx / 7}):{1 / idx}"
+        tree = Phylo.read(StringIO(newick + ";"), "newick")
+        induced = InducedSubtrees.from_tree(tree)
+
+        # keeping tips far apart splices long chains out of one edge,
+        # in an order that alternates between its ends
+        for tips in [["t0", "t119"], ["t0", "t60", "t118"], ["t1", "t2"]]:
+            subtree = induced.subtree(tips)
+            expected = _keep_terminals(tree, set(tips))
+            assert _clade_signature(subtree.root) == _clade_signature(expected.root)
+
+    @pytest.mark.parametrize(
+        "pruned",
+        [
+            [],
+            ["c"],
+            # the root collapses twice
+            ["a", "c"],
+            ["e", "b", "a"],
+        ],
+    )
+    def test_prune_follows_the_given_order(self, pruned):
+        tree = Phylo.read(
+            StringIO("(a:0.3,((b:0.1,c:0.7)90:0.2,(d:1e-9,e:5)70:0.4):0.5):0.9;"),
+            "newick",
+        )
+
+        subtree = InducedSubtrees.from_tree(tree).prune(pruned)
+
+        expected = _prune_terminals(tree, pruned)
+        assert _clade_signature(subtree.root) == _clade_signature(expected.root)
+
+    def test_snap_tree_matches_collapsed_and_pruned_clone(self):
+        tree = Phylo.read(SAMPLE_TREE, "newick")
+        flat = FlatTree.from_phylo(tree)
+        collapsed_tree = collapse_low_support_once(flat, 0, 80)
+        # the largest clade below the root
+        node = max(
+            flat.children(0), key=lambda child: flat.tip_end[child] - flat.tip_start[child]
+        )
+        names = [flat.names[flat.tip_node(tip)] for tip in range(*flat.tip_span(node))]
+        pruned_groups = [names[1:3], names[-1:]]
+
+        snap_tree = build_snap_tree(collapsed_tree, node, pruned_groups)
+
+        expected = build_snap_tree(collapsed_tree, node, [])
+        expected = _prune_terminals(
+            expected, [tip for group in pruned_groups for tip in group]
+        )
+        assert _clade_signature(snap_tree.root) == _clade_signature(expected.root)
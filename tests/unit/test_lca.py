@@ -0,0 +1,36 @@
+from io import StringIO
+
+from Bio import Phylo
+
+from orthosnap.flat_tree import FlatTree
+from orthosnap.lca import EulerTourLCA
+
+
+def _naive_lca(parent, first, second):
+    ancestors = set()
+    node = first
+    while node != -1:
+        ancestors.add(node)
+        node = parent[node]
+    node = second
+    while node not in ancestors:
+        node = parent[node]
+    return node
+
+
+class TestEulerTourLCA(object):
+    def test_matches_naive_lca_for_all_pairs(self):
+        tree = Phylo.read(
+            StringIO("(((sp1|a,sp2|b),(sp3|c,(sp4|d,sp5|e))),((sp6|f),sp7|g),sp8|h);"),
+            "newick",
+        )
+        flat = FlatTree.from_phylo(tree)
+        parent = flat.parent.tolist()
+        lca = EulerTourLCA(parent)
+
+        for first in range(flat.size):
+            for second in range(flat.size):
+                assert lca.query(first, second) == _naive_lca(parent, first, second)
+
+    def test_single_node_tree(self):
+        assert EulerTourLCA([-1]).query(0, 0) == 0
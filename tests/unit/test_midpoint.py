@@ -0,0 +1,112 @@
+from copy import deepcopy
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from Bio import Phylo
+
+from orthosnap.flat_tree import FlatTree
+from orthosnap.midpoint import _UnrootedTree, flat_root_at_midpoint, root_at_midpoint
+from orthosnap.newick import read_flat_newick
+
+here = Path(__file__)
+
+
+def _clade_signature(clade):
+    return (
+        clade.name,
+        repr(clade.branch_length),
+        clade.confidence,
+        tuple(_clade_signature(child) for child in clade.clades),
+    )
+
+
+def _balanced_newick(tips: int, length: float) -> str:
+    nodes = [f"t{idx}:{length}" for idx in range(tips)]
+    while len(nodes) > 1:
+        nodes = [
+            f"({nodes[idx]},{nodes[idx + 1]}):{length}"
+            for idx in range(0, len(nodes), 2)
+        ]
+    return nodes[0].rsplit(":", 1)[0] + ";"
+
+
+def _assert_matches_biopython(tree):
+    expected = deepcopy(tree)
+    expected.root_at_midpoint()
+    root_at_midpoint(tree)
+
+    assert tree.rooted
+    assert _clade_signature(tree.root) == _clade_signature(expected.root)
+
+
+class TestRootAtMidpoint(object):
+    @pytest.mark.parametrize(
+        "tree_file",
+        [
+            "OG0000010.renamed.fa.mafft.clipkit.treefile",
+            "OG0000005.ampersand_delimiter.treefile",
+            "already_single_copy.tre",
+        ],
+    )
+    def test_matches_biopython_on_samples(self, tree_file):
+        tree = Phylo.read(f"{here.parent.parent}/samples/{tree_file}", "newick")
+        _assert_matches_biopython(tree)
+
+    @pytest.mark.parametrize(
+        "newick",
+        [
+            # several tips tie for the longest path
+            "((a:1,b:1):1,(c:1,d:1):1,(e:1,f:1):1);",
+            "(((a:1,b:1):1,(c:1,d:1):1):1,((e:1,f:1):1,(g:1,h:1):1):1);",
+            # the midpoint falls on the first tip's own branch
+            "((a:5,b:1):1,c:1);",
+            # zero-length branches, a unary node and a root branch length
+            "((a:0,(b:2):0):1,(c:1,d:0):0,e:2):0.5;",
+        ],
+    )
+    def test_matches_biopython_on_ties(self, newick):
+        _assert_matches_biopython(Phylo.read(StringIO(newick), "newick"))
+
+    @pytest.mark.parametrize(
+        "newick",
+        [
+            _balanced_newick(64, 0.1),
+            _balanced_newick(64, 1),
+            "(" + ",".join(f"t{idx}:0.1" for idx in range(50)) + ");",
+        ],
+    )
+    def test_matches_biopython_when_every_tip_ties(self, newick):
+        _assert_matches_biopython(Phylo.read(StringIO(newick), "newick"))
+
+    def test_tied_tips_share_depth_sums(self):
+        tree = Phylo.read(StringIO(_balanced_newick(256, 0.1)), "newick")
+        unrooted = _UnrootedTree.from_phylo(tree)
+        farthest = dict()
+
+        for tip in unrooted.tips:
+            assert unrooted.farthest_depth(tip, farthest) == max(
+                depth for _, depth in unrooted.depths_from_tip(tip)
+            )
+        # walking the whole tree from every tip would visit 256 * 511 nodes
+        assert len(farthest) < 10 * len(unrooted.parent)
+
+    def test_negative_branch_lengths_fall_back_to_biopython(self):
+        tree = Phylo.read(StringIO("((a:1,b:-0.5):1,(c:1,d:3):1);"), "newick")
+        _assert_matches_biopython(tree)
+
+    def test_flat_tree_is_rooted_like_clades(self):
+        tree_file = f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile"
+        tree = Phylo.read(tree_file, "newick")
+        root_at_midpoint(tree)
+
+        flat = flat_root_at_midpoint(read_flat_newick(tree_file))
+        expected = FlatTree.from_phylo(tree)
+
+        assert flat.parent.tolist() == expected.parent.tolist()
+        assert np.array_equal(
+            flat.branch_length, expected.branch_length, equal_nan=True
+        )
+        assert np.array_equal(flat.confidence, expected.confidence, equal_nan=True)
+        assert flat.names == expected.names
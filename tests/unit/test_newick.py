@@ -0,0 +1,103 @@
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from Bio import Phylo
+from Bio.Phylo.NewickIO import NewickError
+
+from orthosnap.flat_tree import FlatTree
+from orthosnap.newick import iter_newick_trees, read_flat_newick
+
+here = Path(__file__)
+
+
+def _assert_same_flat_tree(flat, expected):
+    assert flat.parent.tolist() == expected.parent.tolist()
+    assert np.array_equal(flat.branch_length, expected.branch_length, equal_nan=True)
+    assert np.array_equal(flat.confidence, expected.confidence, equal_nan=True)
+    assert flat.names == expected.names
+
+
+class TestReadFlatNewick(object):
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+    def test_matches_bio_phylo_on_sample(self, chunk_size):
+        tree_file = f"{here.parent.parent}/samples/OG0000010.renamed.fa.mafft.clipkit.treefile"
+
+        flat = read_flat_newick(tree_file, chunk_size=chunk_size)
+
+        _assert_same_flat_tree(
+            flat, FlatTree.from_phylo(Phylo.read(tree_file, "newick"))
+        )
+
+    @pytest.mark.parametrize(
+        "newick",
+        [
+            "((a:1,b:2)95:0.5,c:1e-3)root;",
+            # no outer parentheses
+            "a:1,(b,c)0.9:2;",
+            # quoted labels, comments and a tree split over lines
+            "('sp 1|a':1,'it''s|b':2[&&NHX:S=x],\n(c|d\n,e|f)x:3);\n",
+        ],
+    )
+    def test_matches_bio_phylo(self, tmp_path, newick):
+        tree_file = tmp_path / "tree.nwk"
+        tree_file.write_text(newick)
+
+        for chunk_size in [1, 3, 1 << 20]:
+            _assert_same_flat_tree(
+                read_flat_newick(str(tree_file), chunk_size=chunk_size),
+                FlatTree.from_phylo(Phylo.read(str(tree_file), "newick")),
+            )
+
+    def test_deep_caterpillar(self, tmp_path):
+        tips = 50000
+        tree_file = tmp_path / "caterpillar.nwk"
+        tree_file.write_text(
+            "(" * (tips - 1)
+            + "t0:1"
+            + "".join(f",t{idx}:1):1" for idx in range(1, tips))
+            + ";"
+        )
+
+        flat = read_flat_newick(str(tree_file))
+
+        assert flat.size == 2 * tips - 1
+        assert flat.tip_names()[0] == "t0"
+        assert flat.subtree_end[0] == flat.size
+
+    @pytest.mark.parametrize(
+        "newick, error",
+        [
+            ("((a,b);", NewickError),
+            ("(a,b);\n(c,d);\n", ValueError),
+            ("", ValueError),
+        ],
+    )
+    def test_errors_match_bio_phylo(self, tmp_path, newick, error):
+        tree_file = tmp_path / "tree.nwk"
+        tree_file.write_text(newick)
+
+        with pytest.raises(error):
+            Phylo.read(str(tree_file), "newick")
+        with pytest.raises(error):
+            read_flat_newick(str(tree_file))
+
+
+class TestIterNewickTrees(object):
+    def test_splits_trees_as_bio_phylo(self):
+        newick = "(a,b,\n(c,d));  \n\n((a,b),c,d);\n(a,\nb)x;"
+
+        texts = list(iter_newick_trees(StringIO(newick)))
+
+        assert texts == ["(a,b,(c,d));", "((a,b),c,d);", "(a,b)x;"]
+        for text, expected in zip(texts, Phylo.parse(StringIO(newick), "newick")):
+            _assert_same_flat_tree(
+                read_flat_newick(StringIO(text)), FlatTree.from_phylo(expected)
+            )
+
+    def test_trailing_tree_without_semicolon(self):
+        assert list(iter_newick_trees(StringIO("(a,b);\n(c,d)"))) == [
+            "(a,b);",
+            "(c,d)",
+        ]
@@ -85,3 +85,58 @@ class TestParser(object):
         assert parsed.consensus_min_frequency == 0.7
         assert parsed.consensus_trees is True
         assert parsed.occupancy_count == 4
+
+    def test_engine_flag(self, parser):
+        parsed = parser.parse_args(
+            ["-f", "my/input/file.fa", "-t", "my/input/tree.tree", "--engine", "array"]
+        )
+        assert parsed.engine == "array"
+
+    def test_fasta_backend_flag(self, parser):
+        parsed = parser.parse_args(
+            [
+                "-f",
+                "my/input/file.fa",
+                "-t",
+                "my/input/tree.tree",
+                "--fasta-backend",
+                "indexed",
+            ]
+        )
+        assert parsed.fasta_backend == "indexed"
+
+    def test_jobs_flag(self, parser):
+        parsed = parser.parse_args(["--manifest", "manifest.tsv", "--jobs", "4"])
+        assert parsed.jobs == 4
+
+    def test_cache_flags(self, parser):
+        parsed = parser.parse_args(
+            ["-f", "in.fa", "-t", "in.tre", "--cache-dir", "cache", "--cache-max-size", "64"]
+        )
+        assert parsed.cache_dir == "cache"
+        assert parsed.cache_max_size == 64
+
+    def test_input_hash_flag(self, parser):
+        parsed = parser.parse_args(["-f", "in.fa", "-t", "in.tre", "--input-hash", "sampled"])
+        assert parsed.input_hash == "sampled"
+
+    def test_sweep_flags(self, parser):
+        parsed = parser.parse_args(
+            [
+                "-f",
+                "in.fa",
+                "-t",
+                "in.tre",
+                "--sweep-support",
+                "70,80",
+                "--sweep-occupancy",
+                "3",
+                "--sweep-inparalog-to-keep",
+                "longest_seq_len,shortest_branch_len",
+                "--sweep-outputs",
+            ]
+        )
+        assert parsed.sweep_support == "70,80"
+        assert parsed.sweep_occupancy == "3"
+        assert parsed.sweep_inparalog_to_keep == "longest_seq_len,shortest_branch_len"
+        assert parsed.sweep_outputs is True
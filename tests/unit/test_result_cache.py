@@ -0,0 +1,68 @@
+import os
+
+from orthosnap.result_cache import ENTRY_SUFFIX, ResultCache
+
+
+def _entry(tips):
+    return {
+        "subgroup_counter": 1,
+        "subgroup_records": [{"subgroup_id": 0, "tips": tips}],
+        "snap_trees": [],
+        "inparalog_report": [],
+    }
+
+
+def _age(cache, key, seconds):
+    path = os.path.join(cache.directory, f"{key}{ENTRY_SUFFIX}")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 10**9))
+
+
+class TestResultCache(object):
+    def test_key_depends_on_hashes_and_parameters(self):
+        key = ResultCache.key("tree", "fasta", {"support": 80})
+        assert key == ResultCache.key("tree", "fasta", {"support": 80})
+        assert key != ResultCache.key("tree", "other", {"support": 80})
+        assert key != ResultCache.key("tree", "fasta", {"support": 70})
+
+    def test_put_and_get(self, tmp_path):
+        cache = ResultCache(str(tmp_path / "cache"), 1 << 20)
+        assert cache.get("abc") is None
+
+        assert cache.put("abc", _entry(["sp1|a", "sp2|b"]))
+
+        entry = cache.get("abc")
+        assert entry["subgroup_records"] == [{"subgroup_id": 0, "tips": ["sp1|a", "sp2|b"]}]
+        assert not list((tmp_path / "cache").glob("*.tmp"))
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        cache = ResultCache(str(tmp_path), 1 << 20)
+        path = tmp_path / f"abc{ENTRY_SUFFIX}"
+        path.write_text("{not json")
+
+        assert cache.get("abc") is None
+        assert not path.exists()
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = ResultCache(str(tmp_path), 1 << 20)
+        for age, key in enumerate(["c", "b", "a"]):
+            cache.put(key, _entry([key * 100]))
+            _age(cache, key, 10 * (age + 1))
+        # reading refreshes "a", leaving "b" the least recently used
+        assert cache.get("a") is not None
+
+        size = os.path.getsize(tmp_path / f"a{ENTRY_SUFFIX}")
+        cache.max_bytes = 3 * size
+        cache.put("d", _entry(["d" * 100]))
+
+        assert sorted(path.name[0] for path in tmp_path.glob(f"*{ENTRY_SUFFIX}")) == [
+            "a",
+            "c",
+            "d",
+        ]
+
+    def test_entry_larger_than_cache_is_not_stored(self, tmp_path):
+        cache = ResultCache(str(tmp_path), 10)
+
+        assert not cache.put("abc", _entry(["sp1|a"]))
+        assert cache.get("abc") is None
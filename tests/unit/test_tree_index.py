@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pytest
+from Bio import Phylo
+from Bio.Phylo import Newick
+
+from orthosnap.flat_tree import FlatTree
+from orthosnap.helper import LoadedInputs
+from orthosnap.midpoint import root_at_midpoint
+from orthosnap.newick import read_flat_newick
+from orthosnap.tree_index import (
+    TREE_INDEX_SUFFIX,
+    read_phylo_tree_index,
+    read_tree_index,
+    write_phylo_tree_index,
+    write_tree_index,
+)
+
+
+NEWICK = "(('sp1|a':1,sp2|b:2)95:0.5,(sp3|c,'sp é|d':4)x:3,sp5|e:1e-3);\n"
+
+
+def _write(tmp_path, content=NEWICK):
+    path = tmp_path / "genes.tre"
+    path.write_text(content)
+    return str(path)
+
+
+def _assert_same_flat_tree(flat, expected):
+    assert flat.parent.tolist() == expected.parent.tolist()
+    assert flat.first_child.tolist() == expected.first_child.tolist()
+    assert flat.next_sibling.tolist() == expected.next_sibling.tolist()
+    assert np.array_equal(flat.branch_length, expected.branch_length, equal_nan=True)
+    assert np.array_equal(flat.confidence, expected.confidence, equal_nan=True)
+    assert flat.names == expected.names
+
+
+def _clade_signature(tree):
+    return [tree.rooted] + [
+        (
+            type(clade),
+            clade.name,
+            repr(clade.branch_length),
+            repr(clade.confidence),
+            clade.comment,
+            clade.width,
+            len(clade.clades),
+        )
+        for clade in tree.find_clades(order="preorder")
+    ]
+
+
+class TestTreeIndex(object):
+    def test_round_trip(self, tmp_path):
+        tree = _write(tmp_path)
+        flat = read_flat_newick(tree)
+
+        write_tree_index(tree, flat, midpoint_rooted=False)
+        indexed = read_tree_index(tree, midpoint_rooted=False)
+
+        _assert_same_flat_tree(indexed, flat)
+        assert indexed.tip_names() == flat.tip_names()
+        assert indexed.subtree_end.tolist() == flat.subtree_end.tolist()
+
+    def test_other_rooting_is_a_miss(self, tmp_path):
+        tree = _write(tmp_path)
+        write_tree_index(tree, read_flat_newick(tree), midpoint_rooted=False)
+
+        assert read_tree_index(tree, midpoint_rooted=True) is None
+
+    def test_changed_source_is_a_miss(self, tmp_path):
+        tree = _write(tmp_path)
+        write_tree_index(tree, read_flat_newick(tree), midpoint_rooted=False)
+
+        _write(tmp_path, NEWICK.replace("sp5|e", "sp5|f"))
+
+        assert read_tree_index(tree, midpoint_rooted=False) is None
+
+    def test_touched_source_is_matched_by_hash(self, tmp_path):
+        tree = _write(tmp_path)
+        flat = read_flat_newick(tree)
+        write_tree_index(tree, flat, midpoint_rooted=False)
+        stat = os.stat(tree)
+        os.utime(tree, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        _assert_same_flat_tree(read_tree_index(tree, midpoint_rooted=False), flat)
+        with open(tree + TREE_INDEX_SUFFIX, "rb") as handle:
+            handle.readline()
+            assert str(stat.st_mtime_ns + 10**9) in handle.readline().decode()
+
+    def test_loaded_inputs_reuse_index(self, tmp_path, mocker):
+        tree = _write(tmp_path)
+        first = LoadedInputs(tree, "genes.fa", "|", records=[]).get_flat_tree(False)
+        assert os.path.exists(tree + TREE_INDEX_SUFFIX)
+
+        read_newick = mocker.patch("orthosnap.helper.read_flat_newick")
+        midpoint = mocker.patch("orthosnap.helper.flat_root_at_midpoint")
+        second = LoadedInputs(tree, "genes.fa", "|", records=[]).get_flat_tree(False)
+
+        assert read_newick.call_count == 0
+        assert midpoint.call_count == 0
+        _assert_same_flat_tree(second, first)
+
+    @pytest.mark.parametrize("midpoint_rooted", [False, True])
+    def test_phylo_round_trip(self, tmp_path, midpoint_rooted):
+        tree = _write(tmp_path)
+        expected = Phylo.read(tree, "newick")
+        if midpoint_rooted:
+            root_at_midpoint(expected)
+
+        write_phylo_tree_index(tree, expected, midpoint_rooted)
+        indexed = read_phylo_tree_index(tree, midpoint_rooted)
+
+        assert _clade_signature(indexed) == _clade_signature(expected)
+        assert indexed.format("newick") == expected.format("newick")
+        # the same index serves the array engine
+        _assert_same_flat_tree(
+            read_tree_index(tree, midpoint_rooted), FlatTree.from_phylo(expected)
+        )
+
+    def test_flat_index_is_a_phylo_miss(self, tmp_path):
+        tree = _write(tmp_path)
+        write_tree_index(tree, read_flat_newick(tree), midpoint_rooted=False)
+
+        assert read_phylo_tree_index(tree, midpoint_rooted=False) is None
+
+    def test_comments_are_not_restored(self, tmp_path):
+        tree = _write(tmp_path, "((a:1,b:2)[&support=1]:1,c:1);\n")
+        phylo_tree = Phylo.read(tree, "newick", comments_are_confidence=False)
+        write_phylo_tree_index(tree, phylo_tree, midpoint_rooted=False)
+
+        assert read_phylo_tree_index(tree, midpoint_rooted=False) is None
+        assert read_tree_index(tree, midpoint_rooted=False) is not None
+
+    def test_loaded_inputs_reuse_phylo_index(self, tmp_path, mocker):
+        tree = _write(tmp_path)
+        first = LoadedInputs(tree, "genes.fa", "|", records=[]).get_tree(False)
+        assert os.path.exists(tree + TREE_INDEX_SUFFIX)
+
+        read = mocker.spy(Phylo, "read")
+        midpoint = mocker.patch("orthosnap.helper.root_at_midpoint")
+        second = LoadedInputs(tree, "genes.fa", "|", records=[]).get_tree(False)
+
+        assert read.call_count == 0
+        assert midpoint.call_count == 0
+        assert isinstance(second.root, Newick.Clade)
+        assert _clade_signature(second) == _clade_signature(first)